@@ -1,4 +1,6 @@
 from google.adk.agents import LlmAgent
+from agent.intent_router import route_intent, time_model_call
+from agent.parallel_tools import prefetch_read_only_calls, use_prefetched_result
 from agent.prompt import ROOT_AGENT_PROMPT
 from agent.tools import (
     get_all_events,
@@ -6,8 +8,14 @@ from agent.tools import (
     events_by_location,
     events_by_month,
     check_event_exists,
+    find_event_fuzzy,
+    find_location_fuzzy,
+    similar_events,
     update_event_location,
     delete_event_by_title,
+    get_events_by_ids,
+    update_events_location_bulk,
+    delete_events_by_titles,
     total_events_count,
     events_this_month,
     city_with_most_events,
@@ -15,11 +23,15 @@ from agent.tools import (
     most_recently_added_event,
     events_created_last_n_days,
     location_with_most_past_events,
+    analytics_query_tool,
+    event_calendar_tool,
+    next_events,
     create_organizer_tool,
     list_organizers_tool,
     events_managed_by_company_tool,
     region_with_max_cultural_events_tool,
     top_organizer_2025_tool,
+    top_organizer_for_year_tool,
 )
 from constants import AGENT_NAME, AGENT_DESCRIPTION, AGENT_MODEL
 
@@ -35,8 +47,14 @@ root_agent = LlmAgent(
         events_by_location,
         events_by_month,
         check_event_exists,
+        find_event_fuzzy,
+        find_location_fuzzy,
+        similar_events,
         update_event_location,
         delete_event_by_title,
+        get_events_by_ids,
+        update_events_location_bulk,
+        delete_events_by_titles,
         total_events_count,
         events_this_month,
         city_with_most_events,
@@ -44,10 +62,19 @@ root_agent = LlmAgent(
         most_recently_added_event,
         events_created_last_n_days,
         location_with_most_past_events,
+        analytics_query_tool,
+        event_calendar_tool,
+        next_events,
         create_organizer_tool,
         list_organizers_tool,
         events_managed_by_company_tool,
         region_with_max_cultural_events_tool,
         top_organizer_2025_tool,
-    ]
+        top_organizer_for_year_tool,
+    ],
+    # Stock questions are answered from the tools directly, skipping the model
+    before_model_callback=route_intent,
+    # Read-only tool calls in one response run together; writes stay in order
+    after_model_callback=[time_model_call, prefetch_read_only_calls],
+    before_tool_callback=use_prefetched_result,
 )
@@ -0,0 +1,331 @@
+"""Fast path for the stock questions listed in agent/prompt.py.
+
+`route_intent` is the agent's `before_model_callback`. When the newest user
+message is, as a whole, one of a fixed set of phrasings ("How many total
+events are listed?", "Which city has the most events?", "Show all events in
+Bangalore", ...), it calls the matching function from agent/tools.py itself
+and returns the reply, rendered with the prompt's templates, as the model's
+response, so the turn costs no model call. Anything else (including every
+write) goes to the model unchanged, as does a question whose tool fails.
+
+Matching is deliberately literal: a pattern must cover the whole message,
+so "how many events in Goa last year?" is not mistaken for the total. A
+place is a bare name (no digits or words like "next month"), and a place or
+month that finds no events is also passed on, in case the model reads the
+question differently.
+
+Metrics: hits per intent and misses (the hit rate), the fast path's own
+latency, and an estimate of the time saved: a routed question skips the
+model call that picks the tool and the one that phrases the answer, so each
+hit saves about two average model calls minus the fast path's latency.
+"""
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+import metrics
+from agent import tools
+from constants import AGENT_FAST_PATH_ENABLED
+
+HITS = metrics.counter("agent_fast_path_hits_total", "Turns answered without the model", ["intent"])
+MISSES = metrics.counter("agent_fast_path_misses_total", "User messages passed on to the model")
+ERRORS = metrics.counter("agent_fast_path_errors_total", "Matched turns whose tool failed", ["intent"])
+FAST_SECONDS = metrics.summary("agent_fast_path_seconds", "Time to answer a turn locally", ["intent"])
+MODEL_SECONDS = metrics.summary("agent_model_call_seconds", "Model round-trip time")
+SAVED_SECONDS = metrics.counter(
+    "agent_fast_path_saved_seconds_total", "Estimated model time saved by the fast path"
+)
+# Model calls a routed question avoids: choosing the tool, phrasing the answer.
+MODEL_CALLS_SAVED = 2
+# Used for the saved-time estimate until a model call has been timed.
+_DEFAULT_MODEL_SECONDS = 1.0
+
+_MONTHS = (
+    "january february march april may june july august september october november december "
+    "jan feb mar apr jun jul aug sep sept oct nov dec"
+).split()
+
+_PREFIX = r"(?:(?:hi|hey|ok|okay|so|please|can you|could you|tell me|show me)[ ,]+)*"
+# Words that qualify a question rather than name a place ("in Goa next
+# month", "for music lovers"): a place slot holding one is left to the model.
+_QUALIFIERS = (
+    "next this last coming upcoming today tonight tomorrow yesterday now soon "
+    "week weekend weekends month months year years "
+    "for with on at during between before after from until till by and or"
+).split()
+_WORD = r"(?!(?:" + "|".join(_QUALIFIERS) + r")\b)[^\W\d_]+"  # letters only, no digits
+_PLACE = r"['\"]?(?P<place>" + _WORD + r"(?:[ .'-]+" + _WORD + r")*)['\"]?"
+
+
+def _hit_ratio() -> float:
+    hits = sum(HITS.value(intent=intent.name) for intent in INTENTS)
+    total = hits + MISSES.value()
+    return hits / total if total else 0.0
+
+
+metrics.gauge("agent_fast_path_hit_ratio", "Share of user messages answered by the fast path", _hit_ratio)
+
+
+# -----------------------------------------------------
+# Rendering (the reply formats from agent/prompt.py)
+# -----------------------------------------------------
+
+def _event_line(event: Dict[str, Any]) -> str:
+    line = f"{event.get('title')} — {event.get('date')} — {event.get('location')}"
+    if event.get("description"):
+        line += f" — {event['description']}"
+    if event.get("performers"):
+        line += f" (performers: {', '.join(event['performers'])})"
+    return line
+
+
+def _event_list(heading: str, events: List[Dict[str, Any]], empty: str) -> str:
+    if not events:
+        return empty
+    lines = [f"{heading} ({len(events)}):"]
+    lines.extend(f"  {number}) {_event_line(event)}" for number, event in enumerate(events[:3], 1))
+    if len(events) > 3:
+        lines.append(f"  and {len(events) - 3} more...")
+    return "\n".join(lines)
+
+
+def _plural(count: int) -> str:
+    return "event" if count == 1 else "events"
+
+
+# -----------------------------------------------------
+# Intents
+# -----------------------------------------------------
+
+async def _total_events(match: re.Match) -> str:
+    result = await tools.total_events_count()
+    return f"Total events listed: {result['total_events']}."
+
+
+async def _events_this_month(match: re.Match) -> str:
+    result = await tools.events_this_month()
+    return _event_list("Events this month", result["events"], "There are no events this month.")
+
+
+async def _city_with_most_events(match: re.Match) -> str:
+    result = await tools.city_with_most_events()
+    if not result.get("city"):
+        return "There are no events with a location yet."
+    return f"City with most events: {result['city']} ({result['count']} {_plural(result['count'])})."
+
+
+async def _top_performer(match: re.Match) -> str:
+    result = await tools.top_performer()
+    if not result.get("performer"):
+        return "No performers are listed on any event yet."
+    return f"Top performer(s): {result['performer']} (appears in {result['count']} {_plural(result['count'])})."
+
+
+async def _most_recent_event(match: re.Match) -> str:
+    result = await tools.most_recently_added_event()
+    event = result.get("most_recent")
+    if not event:
+        return "There are no events yet."
+    return f"Most recently added event: {_event_line(event)} — created_at: {event.get('created_at')}."
+
+
+async def _created_last_days(match: re.Match) -> str:
+    days = int(match.group("days"))
+    result = await tools.events_created_last_n_days(days)
+    return _event_list(
+        f"Events created in the last {days} days",
+        result["events"],
+        f"No events were created in the last {days} days.",
+    )
+
+
+async def _location_with_most_past_events(match: re.Match) -> str:
+    result = await tools.location_with_most_past_events()
+    if not result.get("location"):
+        return "No past events are listed yet."
+    return (
+        f"Location with the most past events: {result['location']} "
+        f"({result['count']} {_plural(result['count'])})."
+    )
+
+
+async def _events_in(match: re.Match) -> Optional[str]:
+    place = match.group("place").strip()
+    if place.lower() in _MONTHS:
+        events = await tools.events_by_month(place)
+        place = place.title()
+    else:
+        events = await tools.events_by_location(place)
+    if not events:
+        return None  # a misread place or month: let the model try
+    return _event_list(f"Events in {place}", events, "")
+
+
+async def _event_exists(match: re.Match) -> str:
+    title = match.group("title").strip()
+    result = await tools.check_event_exists(title)
+    if result["exists"]:
+        return f"Yes, '{title}' is listed: {_event_line(result['event'])}."
+    suggestions = result.get("did_you_mean") or []
+    if suggestions:
+        return f"No, '{title}' is not listed. Did you mean: {', '.join(suggestions)}?"
+    return f"No, '{title}' is not listed."
+
+
+async def _next_events(match: re.Match) -> Optional[str]:
+    place = match.group("place")
+    result = await tools.next_events(limit=5, location=place.strip() if place else None)
+    if place and not result["events"]:
+        return None  # a misread place: let the model try
+    where = f" in {place.strip()}" if place else ""
+    return _event_list(f"Coming up{where}", result["events"], f"No upcoming events{where}.")
+
+
+class Intent(NamedTuple):
+    name: str
+    patterns: List[str]  # each must match the whole (cleaned) message
+    answer: Callable[[re.Match], Awaitable[Optional[str]]]  # None: leave it to the model
+
+    def match(self, text: str) -> Optional[re.Match]:
+        for pattern in self.patterns:
+            found = re.fullmatch(_PREFIX + pattern, text, re.IGNORECASE)
+            if found:
+                return found
+        return None
+
+
+INTENTS = (
+    Intent("total_events", [
+        r"how many (?:total )?events are (?:there|listed)(?: in total)?",
+        r"how many events (?:do (?:we|you) have|in total)",
+        r"(?:what is |what's )?the total (?:number of )?events",
+    ], _total_events),
+    Intent("events_this_month", [
+        r"how many events are (?:happening |scheduled )?this month",
+        r"(?:which|what) events are (?:happening|scheduled|on) this month",
+        r"(?:list |show )?(?:all )?events (?:happening )?this month",
+    ], _events_this_month),
+    Intent("city_with_most_events", [
+        r"which (?:city|location) has the most (?:number of )?events",
+        r"(?:which|what) city (?:hosts|has) the (?:most|highest number of) events",
+    ], _city_with_most_events),
+    Intent("top_performer", [
+        r"which performer appears in the most events",
+        r"who is the top performer",
+        r"(?:which|what) performer (?:has|appears in) the most events",
+    ], _top_performer),
+    Intent("most_recent_event", [
+        r"which event was (?:added|created) most recently",
+        r"(?:what is|what's|which is) the (?:most recently added|latest|newest) event",
+    ], _most_recent_event),
+    Intent("created_last_days", [
+        r"(?:list|show) (?:me )?(?:all )?(?:the )?events (?:created|added) in the (?:last|past) (?P<days>\d{1,4}) days",
+    ], _created_last_days),
+    Intent("location_with_most_past_events", [
+        r"which (?:location|city) has hosted the most past events",
+    ], _location_with_most_past_events),
+    Intent("next_events", [
+        r"what(?:'s| is) (?:next|coming up)(?: in " + _PLACE + r")?",
+        r"(?:show |list )?(?:me )?(?:the )?upcoming events(?: in " + _PLACE + r")?",
+    ], _next_events),
+    Intent("events_in", [
+        r"(?:show|list) (?:me )?(?:all )?(?:the )?events (?:happening |scheduled |held )?in " + _PLACE,
+        r"which events are (?:scheduled|happening) (?:for|in) " + _PLACE,
+    ], _events_in),
+    Intent("event_exists", [
+        r"is ['\"](?P<title>[^'\"]+)['\"] listed(?: in the events)?",
+        r"is there an event (?:called|named) ['\"](?P<title>[^'\"]+)['\"]",
+    ], _event_exists),
+)
+
+
+def _clean(text: str) -> str:
+    text = text.replace("’", "'").replace("‘", "'").replace("“", '"').replace("”", '"')
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!. ")
+
+
+def match_intent(text: str) -> Optional[Tuple[Intent, re.Match]]:
+    """(Intent, match) for a message the fast path can answer, else None."""
+    cleaned = _clean(text)
+    for intent in INTENTS:
+        found = intent.match(cleaned)
+        if found:
+            return intent, found
+    return None
+
+
+# -----------------------------------------------------
+# ADK callbacks
+# -----------------------------------------------------
+
+_model_started: Dict[str, float] = {}  # invocation id -> model call start
+_MAX_TIMED_CALLS = 1000  # calls that never complete (errors) are dropped past this
+
+
+def _start_model_timer(callback_context: CallbackContext):
+    if len(_model_started) >= _MAX_TIMED_CALLS:
+        _model_started.clear()
+    _model_started[callback_context.invocation_id] = time.perf_counter()
+
+
+def _new_user_text(llm_request: LlmRequest) -> Optional[str]:
+    """The user's message if this model call starts a turn, else None (e.g.
+    the call that follows a tool response)."""
+    if not llm_request.contents:
+        return None
+    last = llm_request.contents[-1]
+    if last.role != "user" or not last.parts:
+        return None
+    if any(part.function_response for part in last.parts):
+        return None
+    text = "".join(part.text for part in last.parts if part.text)
+    return text or None
+
+
+async def route_intent(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: answer known questions locally, else let the model run."""
+    text = _new_user_text(llm_request) if AGENT_FAST_PATH_ENABLED else None
+    matched = match_intent(text) if text else None
+    if matched is None:
+        if text:
+            MISSES.inc()
+        _start_model_timer(callback_context)
+        return None
+
+    intent, found = matched
+    start = time.perf_counter()
+    try:
+        reply = await intent.answer(found)
+    except Exception:
+        # Let the model handle it (and report the error) the usual way.
+        ERRORS.inc(intent=intent.name)
+        _start_model_timer(callback_context)
+        return None
+    if reply is None:
+        MISSES.inc()
+        _start_model_timer(callback_context)
+        return None
+    elapsed = time.perf_counter() - start
+    HITS.inc(intent=intent.name)
+    FAST_SECONDS.observe(elapsed, intent=intent.name)
+    model_seconds = MODEL_SECONDS.mean() or _DEFAULT_MODEL_SECONDS
+    SAVED_SECONDS.inc(max(0.0, MODEL_CALLS_SAVED * model_seconds - elapsed))
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=reply)]))
+
+
+def time_model_call(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """after_model_callback: record the model's round-trip time."""
+    if getattr(llm_response, "partial", False):
+        return None  # streaming: wait for the final response
+    started = _model_started.pop(callback_context.invocation_id, None)
+    if started is not None:
+        MODEL_SECONDS.observe(time.perf_counter() - started)
+    return None
@@ -0,0 +1,180 @@
+"""Concurrent execution of the read-only tools a model asks for in one turn.
+
+Every tool in agent/tools.py is marked `@read_only` or `@mutating`:
+
+- `prefetch_read_only_calls` (an `after_model_callback`) starts every
+  read-only call in the model's response as an asyncio task as soon as the
+  response arrives, so they run together over the shared read pool
+  (`repos.db.read_connection`) instead of one after another. Calls listed
+  after the first mutating one are left alone: they may depend on it.
+- `use_prefetched_result` (the `before_tool_callback`) hands ADK the
+  prefetched result instead of running the tool again. If a prefetch failed
+  the tool runs normally and reports its own error.
+- `@mutating` tools take a per-event-loop lock, so writes run one at a time
+  in the order they were called even when the framework dispatches the calls
+  of a response concurrently.
+
+Prefetches are matched by (invocation, tool name, arguments) rather than by
+function-call id, which may not be assigned yet when the model callback runs.
+
+Metrics: prefetched calls per tool, each batch's wall time and the time it
+saved (the sum of the calls' own durations minus the batch's wall time;
+negative when the calls only competed for the CPU).
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+PREFETCHED = metrics.counter("agent_tool_prefetched_total", "Read-only tool calls started concurrently", ["tool"])
+BATCH_SECONDS = metrics.summary("agent_tool_batch_seconds", "Wall time of a turn's concurrent read-only calls")
+SAVED_SECONDS = metrics.summary(
+    "agent_tool_parallel_saved_seconds", "Per turn: serial time of the read-only calls minus their wall time"
+)
+
+ToolFunction = Callable[..., Awaitable[Any]]
+
+READ_ONLY_TOOLS: Dict[str, ToolFunction] = {}
+MUTATING_TOOLS: Dict[str, ToolFunction] = {}
+
+
+# -----------------------------------------------------
+# Tool markers
+# -----------------------------------------------------
+
+def read_only(fn: ToolFunction) -> ToolFunction:
+    """Mark a tool that only reads; it may run alongside other calls."""
+    fn.read_only = True
+    READ_ONLY_TOOLS[fn.__name__] = fn
+    return fn
+
+
+_write_locks: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = WeakKeyDictionary()
+
+
+def _write_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        lock = _write_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def mutating(fn: ToolFunction) -> ToolFunction:
+    """Mark a tool that writes; calls run one at a time, in call order."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        async with _write_lock():  # asyncio.Lock wakes waiters first come, first served
+            return await fn(*args, **kwargs)
+
+    wrapper.read_only = False
+    MUTATING_TOOLS[fn.__name__] = wrapper
+    return wrapper
+
+
+def is_read_only(name: str) -> bool:
+    return name in READ_ONLY_TOOLS
+
+
+# -----------------------------------------------------
+# Prefetching
+# -----------------------------------------------------
+
+CallKey = Tuple[str, str]  # (tool name, arguments as sorted JSON)
+
+_prefetched: Dict[str, Dict[CallKey, List[asyncio.Task]]] = {}  # invocation id -> calls
+_MAX_INVOCATIONS = 1000  # invocations whose prefetches were never claimed are dropped past this
+_background: set = set()  # keeps the batch observers alive until they finish
+
+
+def _call_key(name: str, args: Optional[Dict[str, Any]]) -> CallKey:
+    return name, json.dumps(args or {}, sort_keys=True, default=str)
+
+
+async def _timed(fn: ToolFunction, args: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = await fn(**args)
+    return result, time.perf_counter() - start
+
+
+async def _observe_batch(tasks: List[asyncio.Task], started: float):
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - started
+    serial = sum(outcome[1] for outcome in outcomes if not isinstance(outcome, BaseException))
+    BATCH_SECONDS.observe(wall)
+    SAVED_SECONDS.observe(serial - wall)  # negative when the calls only contended
+    logger.debug("Ran %d read-only tools in %.3fs (%.3fs one after another)", len(tasks), wall, serial)
+
+
+def _read_only_prefix(llm_response: LlmResponse) -> List[Tuple[str, Dict[str, Any]]]:
+    """The response's function calls up to (not including) the first that may write."""
+    calls = []
+    parts = llm_response.content.parts if llm_response.content else None
+    for part in parts or []:
+        call = part.function_call
+        if call is None:
+            continue
+        if not is_read_only(call.name):
+            break
+        calls.append((call.name, dict(call.args or {})))
+    return calls
+
+
+def prefetch_read_only_calls(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """after_model_callback: start the response's read-only calls together."""
+    if getattr(llm_response, "partial", False):
+        return None
+    calls = _read_only_prefix(llm_response)
+    if len(calls) < 2:
+        return None  # nothing to overlap; ADK runs a single call as usual
+    if len(_prefetched) >= _MAX_INVOCATIONS:
+        for pending in _prefetched.pop(next(iter(_prefetched))).values():
+            for task in pending:
+                task.cancel()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    batch = _prefetched.setdefault(callback_context.invocation_id, {})
+    tasks = []
+    for name, args in calls:
+        task = loop.create_task(_timed(READ_ONLY_TOOLS[name], args))
+        batch.setdefault(_call_key(name, args), []).append(task)
+        tasks.append(task)
+        PREFETCHED.inc(tool=name)
+    observer = loop.create_task(_observe_batch(tasks, started))
+    _background.add(observer)
+    observer.add_done_callback(_background.discard)
+    return None
+
+
+async def use_prefetched_result(tool: Any, args: Dict[str, Any], tool_context: Any) -> Optional[Dict[str, Any]]:
+    """before_tool_callback: return a prefetched call's result, if there is one."""
+    batch = _prefetched.get(tool_context.invocation_id)
+    if not batch:
+        return None
+    pending = batch.get(_call_key(tool.name, args))
+    if not pending:
+        return None
+    task = pending.pop(0)
+    if not pending:
+        del batch[_call_key(tool.name, args)]
+    if not batch:
+        del _prefetched[tool_context.invocation_id]
+    try:
+        result, _ = await task
+    except Exception:
+        return None  # run the tool normally; it reports its own error
+    # ADK wraps non-dict tool results the same way.
+    return result if isinstance(result, dict) else {"result": result}
@@ -1,16 +1,20 @@
 # tools.py
 from typing import List, Dict, Any, Optional, Union
-from models.data_models import Event, Organizer
-from repos.repo import Repo
-from repos.organizer_repo import OrganizerRepo
+from dependencies import get_container
+from models.data_models import MAX_SIMILAR_EVENTS, MAX_UPCOMING_EVENTS, AnalyticsQuery, Event, Organizer
 from services.service import Service
 from services.organizer_service import OrganizerService
+from agent.parallel_tools import mutating, read_only
 
-repo = Repo()
-service = Service(repo)
 
-organizer_repo = OrganizerRepo()
-organizer_service = OrganizerService(organizer_repo)
+# Tools share the app's repo/service instances instead of building their own.
+def _service() -> Service:
+    return get_container().service
+
+
+def _organizer_service() -> OrganizerService:
+    return get_container().organizer_service
+
 
 # --- existing helpers ---
 def _event_to_dict(e: Union[Event, Dict[str, Any]]) -> Dict[str, Any]:
@@ -27,13 +31,17 @@ def _event_to_dict(e: Union[Event, Dict[str, Any]]) -> Dict[str, Any]:
         "description": data.get("description") or "",
         "created_at": data.get("created_at"),
         "updated_at": data.get("updated_at"),
+        "organizer_id": data.get("organizer_id"),
+        "category": data.get("category"),
     }
 
 # reuse earlier tools if present or keep here for completeness
+@read_only
 async def get_all_events() -> List[Dict[str, Any]]:
-    events = await service.get_all_events()
+    events = await _service().get_all_events()
     return [_event_to_dict(e) for e in events]
 
+@mutating
 async def create_event_tool(event_data: Dict[str, Any]) -> Dict[str, Any]:
     required = ["title", "date", "location"]
     missing = [f for f in required if f not in event_data or not event_data[f]]
@@ -44,17 +52,21 @@ async def create_event_tool(event_data: Dict[str, Any]) -> Dict[str, Any]:
         date=event_data["date"],
         location=event_data["location"],
         performers=event_data.get("performers", []),
-        description=event_data.get("description", "")
+        description=event_data.get("description", ""),
+        organizer_id=event_data.get("organizer_id"),
+        category=event_data.get("category"),
     )
-    created = await service.create_event(ev)
+    created = await _service().create_event(ev)
     return _event_to_dict(created)
 
+@read_only
 async def events_by_location(location: str) -> List[Dict[str, Any]]:
     location_l = (location or "").strip().lower()
-    all_events = await service.get_all_events()
+    all_events = await _service().get_all_events()
     filtered = [e for e in all_events if location_l in (e.location or "").lower()]
     return [_event_to_dict(e) for e in filtered]
 
+@read_only
 async def events_by_month(month: str) -> List[Dict[str, Any]]:
     # same implementation as before (keeps month matching tolerant)
     if not month:
@@ -80,7 +92,7 @@ async def events_by_month(month: str) -> List[Dict[str, Any]]:
         if month.lower() in mapping:
             month_num = mapping[month.lower()]
 
-    all_events = await service.get_all_events()
+    all_events = await _service().get_all_events()
     result = []
     for e in all_events:
         date_str = (e.date or "").lower()
@@ -95,72 +107,163 @@ async def events_by_month(month: str) -> List[Dict[str, Any]]:
             continue
     return [_event_to_dict(ev) for ev in result]
 
+async def _find_by_title(title: str) -> Optional[Event]:
+    matches = await _service().find_events_by_titles([title])
+    return matches[0] if matches else None
+
+async def _title_suggestions(title: str) -> List[str]:
+    result = await _service().find_events_fuzzy(title, limit=3)
+    return [m["event"].title for m in result["matches"]]
+
+@read_only
 async def check_event_exists(title: str) -> Dict[str, Any]:
     if not title:
         return {"exists": False, "event": None}
-    all_events = await service.get_all_events()
-    for e in all_events:
-        if (e.title or "").strip().lower() == title.strip().lower():
-            return {"exists": True, "event": _event_to_dict(e)}
-    return {"exists": False, "event": None}
+    target = await _find_by_title(title)
+    if target:
+        return {"exists": True, "event": _event_to_dict(target)}
+    # Close titles let the model ask "did you mean ...?" instead of rescanning.
+    return {"exists": False, "event": None, "did_you_mean": await _title_suggestions(title)}
+
+@read_only
+async def find_event_fuzzy(query: str, limit: int = 5) -> Dict[str, Any]:
+    """Find events whose title resembles `query`, tolerating typos and partial
+    titles (e.g. "diwali nite"). Returns ranked matches with a 0-1 score."""
+    result = await _service().find_events_fuzzy(query, limit=limit)
+    return {
+        "query": query,
+        "matches": [
+            {"score": m["score"], "event": _event_to_dict(m["event"])} for m in result["matches"]
+        ],
+    }
 
+@read_only
+async def find_location_fuzzy(query: str, limit: int = 5) -> Dict[str, Any]:
+    """Find stored locations resembling `query`, tolerating typos and known
+    alternative names (e.g. "Bengaluru" -> "Bangalore"), with event counts."""
+    return await _service().find_locations_fuzzy(query, limit=limit)
+
+@read_only
+async def similar_events(title: str, limit: int = 5) -> Dict[str, Any]:
+    """Find events most like the one titled `title`: shared performers, title
+    and description words. Returns ranked matches with a 0-1 score."""
+    if not title:
+        raise ValueError("Title required")
+    target = await _find_by_title(title)
+    if not target:
+        raise LookupError(f"Event titled '{title}' not found; close titles: {await _title_suggestions(title)}")
+    result = await _service().find_similar_events(target.id, limit=max(1, min(limit, MAX_SIMILAR_EVENTS)))
+    return {
+        "event": _event_to_dict(target),
+        "matches": [
+            {"score": m["score"], "event": _event_to_dict(m["event"])} for m in result["matches"]
+        ],
+    }
+
+@mutating
 async def update_event_location(title: str, new_location: str) -> Dict[str, Any]:
     if not title:
         raise ValueError("Title required")
-    all_events = await service.get_all_events()
-    target = None
-    for e in all_events:
-        if (e.title or "").strip().lower() == title.strip().lower():
-            target = e
-            break
+    target = await _find_by_title(title)
     if not target:
-        raise LookupError(f"Event titled '{title}' not found")
+        raise LookupError(f"Event titled '{title}' not found; close titles: {await _title_suggestions(title)}")
     target.location = new_location
-    updated = await service.update_event(target.id, target)
+    updated = await _service().update_event(target.id, target)
     return _event_to_dict(updated)
 
+@mutating
 async def delete_event_by_title(title: str) -> Dict[str, Any]:
     if not title:
         raise ValueError("Title required")
-    all_events = await service.get_all_events()
-    target = None
-    for e in all_events:
-        if (e.title or "").strip().lower() == title.strip().lower():
-            target = e
-            break
+    target = await _find_by_title(title)
     if not target:
-        raise LookupError(f"Event titled '{title}' not found")
-    await service.delete_event(target.id)
+        raise LookupError(f"Event titled '{title}' not found; close titles: {await _title_suggestions(title)}")
+    await _service().delete_event(target.id)
     return {"deleted": True, "deleted_event": _event_to_dict(target)}
 
+# -------------------------------
+# Batch tools: one query / one transaction for many records
+# -------------------------------
+
+def _missing_titles(titles: List[str], found: List[Event]) -> List[str]:
+    found_keys = {(e.title or "").strip().lower() for e in found}
+    return [t for t in titles if t.strip().lower() not in found_keys]
+
+@read_only
+async def get_events_by_ids(event_ids: List[str]) -> Dict[str, Any]:
+    """Fetch several events by their IDs in one lookup."""
+    result = await _service().get_events(event_ids)
+    return {
+        "events": [_event_to_dict(e) for e in result["events"]],
+        "missing": result["missing"],
+    }
+
+@mutating
+async def update_events_location_bulk(titles: List[str], new_location: str) -> Dict[str, Any]:
+    """Move every event whose title is listed to `new_location` in one transaction.
+
+    `conflicts` lists titles of events changed by someone else since they were
+    looked up; those were not moved (look them up again and retry)."""
+    if not titles:
+        raise ValueError("At least one title required")
+    targets = await _service().find_events_by_titles(titles)
+    for event in targets:
+        event.location = new_location
+    result = await _service().update_events(targets) if targets else {"updated": [], "conflicts": [], "missing": []}
+    conflicts, gone = set(result["conflicts"]), set(result["missing"])
+    return {
+        "updated": [_event_to_dict(e) for e in result["updated"]],
+        "conflicts": [e.title for e in targets if e.id in conflicts],
+        # deleted between the lookup and the update count as not found
+        "not_found": _missing_titles(titles, targets) + [e.title for e in targets if e.id in gone],
+    }
+
+@mutating
+async def delete_events_by_titles(titles: List[str]) -> Dict[str, Any]:
+    """Delete every event whose title is listed in one transaction."""
+    if not titles:
+        raise ValueError("At least one title required")
+    targets = await _service().find_events_by_titles(titles)
+    result = await _service().delete_events([e.id for e in targets]) if targets else {"deleted": []}
+    deleted = set(result["deleted"])
+    return {
+        "deleted_events": [_event_to_dict(e) for e in targets if e.id in deleted],
+        "not_found": _missing_titles(titles, targets),
+    }
+
 # -------------------------------
 # New analytics tools (added here)
 # -------------------------------
 
+@read_only
 async def total_events_count() -> Dict[str, int]:
     """Return total number of events."""
-    total = await service.get_total_events()
+    total = await _service().get_total_events()
     return {"total_events": total}
 
+@read_only
 async def events_this_month() -> Dict[str, Any]:
     """Return events happening in the current month."""
-    monthly_events = await service.get_events_this_month()
+    monthly_events = await _service().get_events_this_month()
     return {
         "count": len(monthly_events),
         "events": [_event_to_dict(ev) for ev in monthly_events],
     }
 
+@read_only
 async def city_with_most_events() -> Dict[str, Any]:
     """Return the city (location) hosting the most events."""
-    return await service.get_city_with_most_events()
+    return await _service().get_city_with_most_events()
 
+@read_only
 async def top_performer() -> Dict[str, Any]:
     """Return the performer appearing most frequently."""
-    return await service.get_top_performer()
+    return await _service().get_top_performer()
 
+@read_only
 async def most_recently_added_event() -> Dict[str, Any]:
     """Return the single most recently created event."""
-    recent = await service.get_most_recent_event()
+    recent = await _service().get_most_recent_event()
     if not recent or (isinstance(recent, dict) and recent.get("message")):
         return {"most_recent": None}
     return {
@@ -169,14 +272,83 @@ async def most_recently_added_event() -> Dict[str, Any]:
         else _event_to_dict(recent)
     }
 
+@read_only
 async def events_created_last_n_days(n: int = 15) -> Dict[str, Any]:
     """Return events created within the last N days (default 15)."""
-    events = await service.get_recent_events_15_days(days=n)
+    events = await _service().get_recent_events_15_days(days=n)
     return {"count": len(events), "events": [_event_to_dict(ev) for ev in events]}
 
+@read_only
 async def location_with_most_past_events() -> Dict[str, Any]:
     """Return the location that has hosted the most past events."""
-    return await service.get_location_with_most_past_events()
+    return await _service().get_location_with_most_past_events()
+
+@read_only
+async def next_events(limit: int = 5, location: Optional[str] = None) -> Dict[str, Any]:
+    """Return the next `limit` events from today onwards, soonest first,
+    optionally only those in `location`."""
+    events = await _service().get_upcoming_events(
+        limit=max(1, min(limit, MAX_UPCOMING_EVENTS)), location=location
+    )
+    return {"count": len(events), "events": [_event_to_dict(ev) for ev in events]}
+
+@read_only
+async def event_calendar_tool(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    bucket: str = "month",
+    include_ids: bool = False,
+) -> Dict[str, Any]:
+    """Return how many events fall in each day, week or month between two dates.
+
+    date_from/date_to are inclusive (default: the next twelve months from the
+    start of this month). bucket is "day", "week" (keyed by its Monday) or
+    "month". include_ids adds the event IDs in each bucket, which
+    get_events_by_ids can resolve.
+    """
+    if bucket not in ("day", "week", "month"):
+        raise ValueError("bucket must be 'day', 'week' or 'month'")
+    return await _service().get_calendar(date_from, date_to, bucket, include_ids=include_ids)
+
+@read_only
+async def analytics_query_tool(
+    dimension: str,
+    metric: str = "count",
+    distinct: Optional[str] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    organizer_id: Optional[str] = None,
+    performer: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    year: Optional[int] = None,
+    top_k: int = 10,
+    sort: str = "value",
+) -> Dict[str, Any]:
+    """Answer grouped analytics questions in one query.
+
+    dimension: location, month, year, performer, organizer or category.
+    metric: "count" (events per group) or "distinct" (distinct values of the
+    `distinct` field per group, e.g. dimension="location", distinct="performer").
+    Filters: location, category, organizer_id, performer, year, date_from
+    (inclusive) / date_to (exclusive). top_k limits the groups returned;
+    sort="group" lists months/years in order instead of by value.
+    """
+    query = AnalyticsQuery(
+        dimension=dimension,
+        metric=metric,
+        distinct=distinct,
+        location=location,
+        category=category,
+        organizer_id=organizer_id,
+        performer=performer,
+        date_from=date_from,
+        date_to=date_to,
+        year=year,
+        top_k=top_k,
+        sort=sort,
+    )
+    return await _service().query_analytics(query)
 
 
 # -------------------------------
@@ -191,32 +363,49 @@ def _organizer_to_dict(org: Union[Organizer, Dict[str, Any]]) -> Dict[str, Any]:
     return data
 
 
+@mutating
 async def create_organizer_tool(organizer_data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new organizer entry."""
     organizer = Organizer(**organizer_data)
-    created = await organizer_service.create_organizer(organizer)
+    created = await _organizer_service().create_organizer(organizer)
     return _organizer_to_dict(created)
 
 
+@read_only
 async def list_organizers_tool() -> List[Dict[str, Any]]:
     """List organizers."""
-    organizers = await organizer_service.list_organizers()
+    organizers = await _organizer_service().list_organizers()
     return [_organizer_to_dict(org) for org in organizers]
 
 
+@read_only
 async def events_managed_by_company_tool(company: str) -> Dict[str, Any]:
     """Return how many events are managed by a given company."""
-    return await organizer_service.events_managed_by_company(company)
+    return await _organizer_service().events_managed_by_company(company)
 
 
+@read_only
 async def region_with_max_cultural_events_tool() -> Dict[str, Any]:
     """Return the region with the maximum number of cultural events."""
-    return await organizer_service.region_with_max_cultural_events()
+    return await _organizer_service().region_with_max_cultural_events()
+
+
+@read_only
+async def top_organizer_for_year_tool(year: int) -> Dict[str, Any]:
+    """Return the organizer linked to the most events dated in the given year."""
+    result = await _organizer_service().top_organizer_for_year(year)
+    organizer = result["organizer"]
+    return {
+        "year": year,
+        "organizer": _organizer_to_dict(organizer) if organizer else None,
+        "events": result["events"],
+    }
 
 
+@read_only
 async def top_organizer_2025_tool() -> Dict[str, Any]:
     """Return the organizer handling the most events in 2025."""
-    organizer = await organizer_service.top_organizer_2025()
+    organizer = await _organizer_service().top_organizer_2025()
     if not organizer:
         return {"organizer": None, "events_2025": 0}
     data = _organizer_to_dict(organizer)
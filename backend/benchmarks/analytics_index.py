@@ -0,0 +1,90 @@
+"""Event analytics with and without the in-memory columnar index.
+
+    python -m benchmarks.analytics_index --events 20000 --repeat 5
+
+Seeds `--events` events into a fresh database and times each `Service`
+analytics method over `Repo.list()` (the old full scan) and over the
+`EventIndex`, reporting the best of `--repeat` runs. Install NumPy to
+get the vectorized index queries; without it the index uses plain loops.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from repos import event_index
+from repos.event_index import EventIndex
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from services.service import Service
+
+METHODS = (
+    "get_total_events",
+    "get_events_this_month",
+    "get_city_with_most_events",
+    "get_top_performer",
+    "get_most_recent_event",
+    "get_recent_events_15_days",
+    "get_location_with_most_past_events",
+)
+
+
+async def _seed(repo: Repo, count: int):
+    rng = random.Random(7)
+    now = datetime.now()
+    cities = [f"City {i}" for i in range(50)]
+    performers = [f"Artist {i}" for i in range(500)]
+    for start in range(0, count, 500):
+        await asyncio.gather(*(
+            repo.insert({
+                "id": f"ev-{i}",
+                "title": f"Event {i}",
+                "date": (now + timedelta(days=rng.randint(-365, 365))).strftime("%Y-%m-%d"),
+                "location": rng.choice(cities),
+                "performers": rng.sample(performers, 3),
+                "created_at": (now - timedelta(days=rng.randint(0, 90))).isoformat(),
+            })
+            for i in range(start, min(start + 500, count))
+        ))
+
+
+async def _best(call, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "analytics.db")
+        await OrganizerRepo(db_path).init_db()
+        repo = Repo(db_path)
+        await _seed(repo, args.events)
+
+        index = EventIndex()
+        repo.add_listener(index.apply)
+        scan, indexed = Service(repo), Service(repo, index)
+        start = time.perf_counter()
+        await index.ensure_loaded(repo)
+        print(f"{args.events} events, numpy={'yes' if event_index.np is not None else 'no'}, "
+              f"index build {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        for name in METHODS:
+            full = await _best(getattr(scan, name), args.repeat)
+            fast = await _best(getattr(indexed, name), args.repeat)
+            print(f"{name:<38} scan={full * 1000:8.1f}ms  index={fast * 1000:7.2f}ms  "
+                  f"x{full / fast:6.1f}")
+        await repo.writes.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
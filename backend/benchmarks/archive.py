@@ -0,0 +1,100 @@
+"""Hot-table size and query latency before and after archiving past events.
+
+    python -m benchmarks.archive --events 50000 --after-days 30 --repeat 5
+
+Seeds `--events` events dated over the past three years and the next one
+into a fresh database, then times the list endpoint's query, the scan-based
+"location with most past events", the upcoming feed and an EventIndex build,
+archives everything older than `--after-days` (see `repos/archive.py`) and
+times them again. Reports the best of `--repeat` runs.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from repos.archive import Archiver
+from repos.event_index import EventIndex
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from repos.upcoming_cache import start_of_today
+from services.service import Service
+
+
+async def _seed(repo: Repo, count: int):
+    rng = random.Random(11)
+    now = datetime.now()
+    cities = [f"City {i}" for i in range(50)]
+    performers = [f"Artist {i}" for i in range(500)]
+    for start in range(0, count, 500):
+        await asyncio.gather(*(
+            repo.insert({
+                "id": f"ev-{i}",
+                "title": f"Event {i}",
+                "date": (now + timedelta(days=rng.randint(-3 * 365, 365))).strftime("%Y-%m-%dT%H:%M"),
+                "location": rng.choice(cities),
+                "performers": rng.sample(performers, 3),
+                "description": "x" * 200,
+            })
+            for i in range(start, min(start + 500, count))
+        ))
+
+
+async def _best(call, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def _index_build(repo: Repo):
+    await EventIndex().ensure_loaded(repo)
+
+
+async def _measure(repo: Repo, repeat: int) -> dict:
+    scan = Service(repo)
+    return {
+        "list": await _best(repo.list, repeat),
+        "past_location_scan": await _best(scan.get_location_with_most_past_events, repeat),
+        "upcoming_10": await _best(lambda: repo.upcoming(start_of_today(), 10), repeat),
+        "index_build": await _best(lambda: _index_build(repo), repeat),
+    }
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "archive.db")
+        await OrganizerRepo(db_path).init_db()
+        repo = Repo(db_path)
+        await repo.init_db()
+        await _seed(repo, args.events)
+
+        before = await _measure(repo, args.repeat)
+        answer = await Service(repo).get_location_with_most_past_events()
+        archiver = Archiver(repo, after_days=args.after_days)
+        start = time.perf_counter()
+        moved = await archiver.run_once()
+        elapsed = time.perf_counter() - start
+        after = await _measure(repo, args.repeat)
+        assert await Service(repo).get_location_with_most_past_events() == answer
+
+        hot = len(await repo.list())
+        print(f"{args.events} events; archived {moved} older than {args.after_days} days "
+              f"in {elapsed * 1000:.0f}ms; hot table {args.events} -> {hot} rows")
+        for name in before:
+            print(f"{name:<20} before={before[name] * 1000:8.2f}ms  after={after[name] * 1000:8.2f}ms  "
+                  f"x{before[name] / after[name]:6.1f}")
+        await repo.writes.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--after-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
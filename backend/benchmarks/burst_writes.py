@@ -0,0 +1,67 @@
+"""Burst-write benchmark for the group-commit write queue.
+
+    python -m benchmarks.burst_writes --writes 2000 --concurrency 200
+
+Fires `--writes` concurrent `Repo.insert` calls (at most `--concurrency` in
+flight) against a fresh database, once per batching configuration, and
+reports throughput, commits and per-call latency percentiles. Batch size 1
+is the old one-transaction-per-write behaviour.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from models.data_models import Event
+from repos.db import WriteQueue
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+
+
+async def _burst(db_path: str, writes: int, concurrency: int, max_size: int, max_delay_ms: float):
+    # events.organizer_id references organizers; this creates both tables.
+    await OrganizerRepo(db_path).init_db()
+    repo = Repo(db_path)
+    repo.writes = WriteQueue(db_path, max_batch_size=max_size, max_batch_delay_ms=max_delay_ms)
+    gate = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        async with gate:
+            start = time.perf_counter()
+            await repo.insert(
+                Event(id=f"burst-{i}", title=f"Drop {i}", date="2025-12-31", location="Goa")
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(writes)))
+    elapsed = time.perf_counter() - start
+    await repo.writes.close()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"batch<= {max_size:<4} delay={max_delay_ms:>4}ms  {writes / elapsed:8.0f} writes/s  "
+        f"commits={repo.writes.batches:<5} p50={statistics.median(latencies) * 1000:6.1f}ms "
+        f"p99={p99 * 1000:6.1f}ms"
+    )
+
+
+async def main(args):
+    configs = [(1, 0.0), (args.max_size, 0.0), (args.max_size, args.max_delay_ms)]
+    for max_size, max_delay_ms in configs:
+        with tempfile.TemporaryDirectory() as tmp:
+            await _burst(os.path.join(tmp, "burst.db"), args.writes, args.concurrency, max_size, max_delay_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--max-size", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Contended read-modify-write benchmark for optimistic concurrency.
+
+    python -m benchmarks.contended_updates --workers 50 --increments 20
+
+`--workers` tasks each increment a counter stored in one event's
+description `--increments` times through `Service`. The blind run does an
+unconditional PUT (the old behaviour) and counts lost updates; the CAS run
+sends the version it read and retries on 412, so the final count is exact.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import HTTPException
+
+from models.data_models import Event
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from services.service import Service
+
+EVENT_ID = "counter"
+
+
+async def _run(db_path: str, workers: int, increments: int, cas: bool):
+    await OrganizerRepo(db_path).init_db()  # events reference organizers
+    service = Service(Repo(db_path))
+    await service.create_event(
+        Event(id=EVENT_ID, title="Counter", date="2025-12-31", location="Goa", description="0")
+    )
+    retries = 0
+
+    async def worker():
+        nonlocal retries
+        for _ in range(increments):
+            while True:
+                current = await service.get_event(EVENT_ID)
+                updated = current.model_copy(update={"description": str(int(current.description) + 1)})
+                try:
+                    await service.update_event(
+                        EVENT_ID, updated, expected_version=current.version if cas else None
+                    )
+                    break
+                except HTTPException as exc:
+                    if exc.status_code != 412:
+                        raise
+                    retries += 1
+
+    if not cas:
+        # Blind writes: drop the version the event carries so the PUT is unconditional.
+        original_update = service.repo.update
+        service.repo.update = lambda event, expected_version=None: original_update(event, None)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+    await service.repo.writes.close()
+
+    expected = workers * increments
+    final = int((await Repo(db_path).get(EVENT_ID)).description)
+    print(
+        f"{'cas' if cas else 'blind':<6} {expected / elapsed:8.0f} increments/s  "
+        f"final={final:<6} lost={expected - final:<6} retries={retries}"
+    )
+
+
+async def main(args):
+    for cas in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            await _run(os.path.join(tmp, "contended.db"), args.workers, args.increments, cas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--increments", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""Fuzzy title/location lookup latency on a large synthetic event set.
+
+    python -m benchmarks.fuzzy_search --events 100000 --repeat 200
+
+Builds the trigram index (`repos/fuzzy_index.py`) in memory from generated
+titles/locations, no database involved, and reports build time and the
+mean/p99 latency of misspelt title and location queries.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from repos.fuzzy_index import EventTextIndex
+
+WORDS = (
+    "diwali night music fest christmas carnival holi party new year bash summer "
+    "fiesta concert dance food jazz rock folk classical comedy open mic theatre "
+    "lantern parade market beach sunset winter spring harvest light colour colours "
+    "garba dandiya onam pongal eid film poetry art craft wine beer street"
+).split()
+CITIES = (
+    "Bangalore Mumbai Delhi Chennai Kolkata Hyderabad Pune Goa Jaipur Kochi Mysore "
+    "Ahmedabad Lucknow Chandigarh Indore Bhopal Surat Nagpur Varanasi Udaipur"
+).split()
+TITLE_QUERIES = ("diwali nite", "crismas carnival", "new yr bash", "sumer fiesta", "jaz night")
+LOCATION_QUERIES = ("Bengaluru", "Bombay", "Hyderbad", "chenai", "Goa")
+
+
+def _build(count: int) -> EventTextIndex:
+    rng = random.Random(3)
+    index = EventTextIndex()
+    for i in range(count):
+        title = " ".join(rng.sample(WORDS, rng.randint(2, 4))).title()
+        index._append({"id": f"ev-{i}", "title": f"{title} {rng.randint(1, 500)}", "location": rng.choice(CITIES)})
+    index.loaded_at = time.monotonic()
+    return index
+
+
+def _measure(search, queries, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main(args):
+    start = time.perf_counter()
+    index = _build(args.events)
+    print(f"{args.events} events, index build {(time.perf_counter() - start) * 1000:.0f}ms")
+    for name, search, queries in (
+        ("title", index.titles.search, TITLE_QUERIES),
+        ("location", index.search_locations, LOCATION_QUERIES),
+    ):
+        mean, p99 = _measure(search, queries, args.repeat)
+        print(f"{name:<9} mean={mean * 1000:6.3f}ms  p99={p99 * 1000:6.3f}ms")
+    for query in TITLE_QUERIES[:2] + LOCATION_QUERIES[:2]:
+        hits = index.titles.search(query, limit=1) if query in TITLE_QUERIES else index.search_locations(query, limit=1)
+        print(f"  {query!r:<20} -> {[(text, score) for text, score, _ in hits]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+"""Wall time of one turn's read-only agent tools, one after another vs together.
+
+    python -m benchmarks.parallel_tools --events 20000 --repeat 5 [--no-index]
+    SQLITE_READ_POOL_SIZE=1 python -m benchmarks.parallel_tools   # no overlap in SQLite
+
+Seeds `--events` events into a fresh database and times the tools a model
+typically asks for together (`total_events_count`, `top_performer`,
+`analytics_query_tool`, `event_calendar_tool`, ...), awaited in turn and then with `asyncio.gather` as
+`agent/parallel_tools.py` runs them. `--no-index` answers from SQLite
+instead of the in-memory analytics index, which is where the pooled read
+connections pay off. Reports the best of `--repeat` runs.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from agent import tools
+from constants import SQLITE_READ_POOL_SIZE
+from dependencies import Container, set_container
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from services.service import Service
+
+TURN = (
+    (tools.total_events_count, {}),
+    (tools.city_with_most_events, {}),
+    (tools.top_performer, {}),
+    (tools.analytics_query_tool, {"dimension": "location", "metric": "distinct", "distinct": "performer"}),
+    (tools.analytics_query_tool, {"dimension": "month", "sort": "group"}),
+    (tools.event_calendar_tool, {"bucket": "week"}),
+    (tools.top_organizer_for_year_tool, {"year": datetime.now().year}),
+    (tools.region_with_max_cultural_events_tool, {}),
+)
+
+
+async def _seed(repo: Repo, count: int):
+    rng = random.Random(5)
+    now = datetime.now()
+    cities = [f"City {i}" for i in range(50)]
+    performers = [f"Artist {i}" for i in range(500)]
+    for start in range(0, count, 500):
+        await asyncio.gather(*(
+            repo.insert({
+                "id": f"ev-{i}",
+                "title": f"Event {i}",
+                "date": (now + timedelta(days=rng.randint(-365, 365))).strftime("%Y-%m-%dT%H:%M"),
+                "location": rng.choice(cities),
+                "performers": rng.sample(performers, 3),
+                "description": "x" * 200,
+            })
+            for i in range(start, min(start + 500, count))
+        ))
+
+
+async def _serial():
+    for tool, kwargs in TURN:
+        await tool(**kwargs)
+
+
+async def _concurrent():
+    await asyncio.gather(*(tool(**kwargs) for tool, kwargs in TURN))
+
+
+async def _best(call, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "parallel.db")
+        await OrganizerRepo(db_path).init_db()
+        container = Container(db_path)
+        if args.no_index:
+            container.service = Service(container.repo)
+        set_container(container)
+        await container.startup()
+        await _seed(container.repo, args.events)
+        await _serial()  # warm the indexes and the read pool
+
+        serial = await _best(_serial, args.repeat)
+        concurrent = await _best(_concurrent, args.repeat)
+        print(f"{args.events} events, {len(TURN)} tools, read pool of {SQLITE_READ_POOL_SIZE}, "
+              f"{'SQLite' if args.no_index else 'in-memory index'} analytics")
+        print(f"one after another {serial * 1000:8.2f}ms")
+        print(f"asyncio.gather    {concurrent * 1000:8.2f}ms  saved {(serial - concurrent) * 1000:.2f}ms "
+              f"(x{serial / concurrent:.1f})")
+        await container.shutdown()
+        set_container(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-index", action="store_true", help="answer analytics from SQLite")
+    asyncio.run(main(parser.parse_args()))
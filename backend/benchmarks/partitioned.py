@@ -0,0 +1,126 @@
+"""Single-region reads and cross-region analytics, one database vs region partitions.
+
+    python -m benchmarks.partitioned --events 1000000 --regions 8 --repeat 3
+
+Bulk-loads the same `--events` events into one file and into `--regions`
+partitions (repos/partitioned.py), then times, best of `--repeat`:
+
+- single-region reads: upcoming events and a monthly analytics query for
+  one location, which touch one partition;
+- cross-region analytics: events per location, distinct performers per
+  month and a month calendar, which fan out to every partition and merge;
+- a point lookup by id.
+
+Single-region reads already use the (location, starts_at) index on one
+file, so expect them to be about even. The fan-out queries run on all
+partitions at once and only gain with spare cores (see `os.cpu_count()` in
+the output).
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from models.data_models import AnalyticsQuery
+from repos.organizer_repo import OrganizerRepo
+from repos.partitioned import PartitionedRepo, Partitions
+from repos.repo import Repo
+
+_LOAD_BATCH = 20000
+
+
+def _regions(count: int):
+    return {f"region-{r}": [f"City {r}-{c}" for c in range(6)] for r in range(count)}
+
+
+def _events(count: int, cities, rng: random.Random):
+    now = datetime.now()
+    performers = [f"Artist {i}" for i in range(2000)]
+    for i in range(count):
+        yield {
+            "id": f"ev-{i}",
+            "title": f"Event {i}",
+            "date": (now + timedelta(days=rng.randint(-365, 365), hours=rng.randint(0, 23))).strftime(
+                "%Y-%m-%dT%H:00"
+            ),
+            "location": rng.choice(cities),
+            "performers": rng.sample(performers, 2),
+            "category": rng.choice(("cultural", "music", "food")),
+            "description": "x" * 80,
+        }
+
+
+async def _load(repos, count: int, cities):
+    rng = random.Random(7)
+    batch = []
+    start = time.perf_counter()
+    for event in _events(count, cities, rng):
+        batch.append(event)
+        if len(batch) >= _LOAD_BATCH:
+            await asyncio.gather(*(repo.import_events(batch, notify=False) for repo in repos))
+            batch = []
+    if batch:
+        await asyncio.gather(*(repo.import_events(batch, notify=False) for repo in repos))
+    return time.perf_counter() - start
+
+
+async def _best(call, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main(args):
+    regions = _regions(args.regions)
+    cities = [city for group in regions.values() for city in group]
+    with tempfile.TemporaryDirectory() as tmp:
+        await OrganizerRepo(os.path.join(tmp, "single.db")).init_db()
+        single = Repo(os.path.join(tmp, "single.db"))
+        partitions = Partitions(os.path.join(tmp, "partitions"), {
+            city.lower(): region for region, group in regions.items() for city in group
+        })
+        partitioned = PartitionedRepo(partitions)
+        await single.init_db()
+        await partitioned.init_db()
+        loaded = await _load([single, partitioned], args.events, cities)
+        print(f"{args.events} events, {args.regions} regions x 6 cities, {os.cpu_count()} CPUs "
+              f"(loaded both layouts in {loaded:.1f}s)")
+
+        city = cities[0]
+        now = datetime.now()
+        since = now.strftime("%Y-%m-%dT%H:%M")
+        month_start = now.replace(day=1).strftime("%Y-%m-%dT00:00")
+        month_end = (now.replace(day=1) + timedelta(days=32)).replace(day=1).strftime("%Y-%m-%dT00:00")
+        cases = (
+            ("single region", "upcoming(50, location)", lambda repo: repo.upcoming(since, 50, city)),
+            ("single region", "events per month in a location", lambda repo: repo.analytics_query(
+                AnalyticsQuery(dimension="month", location=city, top_k=24))),
+            ("cross region", "events per location", lambda repo: repo.analytics_query(
+                AnalyticsQuery(dimension="location", top_k=10))),
+            ("cross region", "distinct performers per month", lambda repo: repo.analytics_query(
+                AnalyticsQuery(dimension="month", metric="distinct", distinct="performer", top_k=24))),
+            ("cross region", "calendar, this month by day", lambda repo: repo.calendar(
+                month_start, month_end, "day")),
+            ("point", "get(id)", lambda repo: repo.get(f"ev-{args.events // 2}")),
+        )
+        print(f"{'':14} {'query':34} {'one file':>10} {'partitions':>11}")
+        for scope, name, query in cases:
+            one = await _best(lambda: query(single), args.repeat)
+            split = await _best(lambda: query(partitioned), args.repeat)
+            print(f"{scope:14} {name:34} {one * 1000:8.1f}ms {split * 1000:9.1f}ms  x{one / split:.1f}")
+        await single.writes.close()
+        await partitions.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--regions", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
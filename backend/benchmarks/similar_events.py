@@ -0,0 +1,137 @@
+"""Similar-events index: build time, memory, query latency and recall.
+
+    python -m benchmarks.similar_events --events 100000 --repeat 500
+
+Builds `repos/similar_index.py` in memory from generated events (themed
+titles, descriptions, two performers each) and reports:
+
+- build time (including generating the events) and the memory the index
+  holds (tracemalloc, on a second build);
+- mean/p99 latency of `similar(id, 10)` for random events, and recall of
+  those top 10 against an exhaustive scan (no postings budget);
+- the cost of one incremental update (an edited event through `apply`);
+- save and restore time and file size, against an empty database that
+  stands in for the events table version.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from repos.similar_index import SimilarEventsIndex
+
+THEMES = (
+    "diwali night lights lantern rangoli sweets",
+    "christmas carol xmas market winter gifts",
+    "music fest rock band live concert stage",
+    "jazz blues evening saxophone lounge",
+    "holi colour party dhol splash",
+    "food street festival biryani chaat tasting",
+    "comedy open mic standup laughs",
+    "garba dandiya navratri dance folk",
+    "film screening cinema short documentary",
+    "art craft fair pottery painting workshop",
+    "beach sunset party dj electronic",
+    "classical carnatic hindustani recital",
+)
+FILLER = "join us for an evening of fun with friends family great vibes tickets available at the venue".split()
+
+
+def _events(count: int, rng: random.Random):
+    themes = [theme.split() for theme in THEMES]
+    performers = [f"Artist {i}" for i in range(5000)]
+    for i in range(count):
+        words = rng.choice(themes)
+        title = " ".join(rng.sample(words, 3)).title()
+        description = rng.sample(words, 4) + rng.sample(FILLER, 8)
+        rng.shuffle(description)
+        yield {
+            "id": f"ev-{i}",
+            "title": f"{title} {rng.randint(1, 500)}",
+            "description": " ".join(description),
+            "performers": rng.sample(performers, 2),
+        }
+
+
+def _build(count: int) -> SimilarEventsIndex:
+    index = SimilarEventsIndex()
+    for event in _events(count, random.Random(5)):
+        index._append(event)
+    index.loaded_at = time.monotonic()
+    return index
+
+
+def _measure(index: SimilarEventsIndex, ids, budget: int):
+    latencies, results = [], []
+    for event_id in ids:
+        start = time.perf_counter()
+        results.append(index.similar(event_id, 10, budget=budget))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1], results
+
+
+async def _persistence(index: SimilarEventsIndex):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        await OrganizerRepo(db).init_db()
+        repo = Repo(db)
+        await repo.init_db()
+        index.path = os.path.join(tmp, "bench.similar.index")
+        start = time.perf_counter()
+        await index.save(repo)
+        saved = time.perf_counter() - start
+        size = os.path.getsize(index.path)
+        restored = SimilarEventsIndex(path=index.path)
+        start = time.perf_counter()
+        await restored._restore(repo)
+        loaded = time.perf_counter() - start
+        await repo.writes.close()
+    assert len(restored) == len(index)
+    print(f"save {saved * 1000:.0f}ms, restore {loaded * 1000:.0f}ms, file {size / 2**20:.1f}MiB")
+
+
+def main(args):
+    start = time.perf_counter()
+    index = _build(args.events)
+    built = time.perf_counter() - start
+    # tracemalloc slows allocation several times over: measure a second build.
+    tracemalloc.start()
+    traced = _build(args.events)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+    print(f"{args.events} events, {len(index.df)} terms: build {built:.1f}s, index holds {held / 2**20:.0f}MiB")
+
+    rng = random.Random(11)
+    ids = [f"ev-{rng.randrange(args.events)}" for _ in range(args.repeat)]
+    mean, p99, budgeted = _measure(index, ids, args.budget)
+    print(f"similar(id, 10)  mean={mean * 1000:6.2f}ms  p99={p99 * 1000:6.2f}ms  (budget {args.budget} postings)")
+    sample = ids[: args.recall_sample]
+    _, _, exact = _measure(index, sample, 10**9)
+    found = sum(len({i for i, _ in fast} & {i for i, _ in full}) for fast, full in zip(budgeted, exact))
+    wanted = sum(len(full) for full in exact)
+    print(f"recall@10 vs exhaustive scan ({len(sample)} queries): {found / max(wanted, 1):.3f}")
+
+    edited = next(_events(1, random.Random(99)))
+    edited["id"] = ids[0]
+    start = time.perf_counter()
+    for _ in range(100):
+        index.apply(upserts=[edited])
+    print(f"incremental update {(time.perf_counter() - start) * 10:.3f}ms per event")
+    asyncio.run(_persistence(index))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=20000)
+    parser.add_argument("--recall-sample", type=int, default=100)
+    main(parser.parse_args())
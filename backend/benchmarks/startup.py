@@ -0,0 +1,92 @@
+"""Startup benchmark: import-time breakdown and time-to-first-request.
+
+    python -m benchmarks.startup --top 15
+
+Import times come from `python -X importtime -c "import main"` grouped by
+top-level package. Time-to-first-request spawns `uvicorn main:app` against a
+throwaway database and polls `GET /events/` until it answers.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_breakdown(module: str = "main") -> Tuple[float, List[Tuple[str, float]]]:
+    """Return (total seconds, [(top-level package, cumulative seconds)])."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    per_package: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [f.strip() for f in line[len("import time:"):].split("|")]
+        if not fields[1].isdigit():
+            continue  # header line
+        cumulative_us, name = int(fields[1]), fields[2]
+        # Only count outermost imports (no leading indentation) to avoid
+        # double-counting nested modules.
+        if name == name.lstrip():
+            per_package[name.split(".")[0]] += cumulative_us / 1e6
+            total += cumulative_us / 1e6
+    return total, sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def time_to_first_request(port: int, timeout: float = 60.0) -> Tuple[float, float]:
+    """Return (seconds until the first 200 on /events/, latency of that request)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DB_NAME=os.path.join(tmp, "startup.db"))
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            while time.perf_counter() - start < timeout:
+                request_start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/events/") as resp:
+                        if resp.status == 200:
+                            now = time.perf_counter()
+                            return now - start, now - request_start
+                except (urllib.error.URLError, ConnectionError):
+                    time.sleep(0.02)
+            raise TimeoutError("server did not answer in time")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--skip-server", action="store_true")
+    args = parser.parse_args()
+
+    total, packages = import_breakdown()
+    print(f"import main: {total * 1000:.0f} ms")
+    for name, seconds in packages[: args.top]:
+        print(f"  {name:<30} {seconds * 1000:8.1f} ms")
+
+    if not args.skip_server:
+        ready, first = time_to_first_request(args.port)
+        print(f"time to first request: {ready * 1000:.0f} ms (request itself {first * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure agent time-to-first-byte vs. total turn latency over `/run_sse`.
+
+Runs the same prompt with `streaming` off and on against a running backend and
+reports, per mode, the time to the first SSE frame, the time to the first
+model text and the total turn latency.
+
+    python -m benchmarks.stream_latency --base-url http://localhost:8080 \\
+        --prompt "Which city has the most events?" --runs 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from constants import AGENT_NAME
+
+USER_ID = "bench"
+
+
+async def _create_session(http: aiohttp.ClientSession, base_url: str) -> str:
+    async with http.post(f"{base_url}/apps/{AGENT_NAME}/users/{USER_ID}/sessions", json={}) as resp:
+        resp.raise_for_status()
+        return (await resp.json())["id"]
+
+
+async def _run_turn(
+    http: aiohttp.ClientSession, base_url: str, prompt: str, streaming: bool
+) -> Dict[str, Optional[float]]:
+    session_id = await _create_session(http, base_url)
+    payload = {
+        "appName": AGENT_NAME,
+        "userId": USER_ID,
+        "sessionId": session_id,
+        "newMessage": {"role": "user", "parts": [{"text": prompt}]},
+        "streaming": streaming,
+    }
+    first_frame = first_text = None
+    frames = 0
+    start = time.perf_counter()
+    async with http.post(
+        f"{base_url}/run_sse", json=payload, headers={"Accept": "text/event-stream"}
+    ) as resp:
+        resp.raise_for_status()
+        async for raw in resp.content:
+            line = raw.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            now = time.perf_counter() - start
+            frames += 1
+            if first_frame is None:
+                first_frame = now
+            event = json.loads(line[5:])
+            parts = (event.get("content") or {}).get("parts") or []
+            if first_text is None and any(p.get("text") for p in parts):
+                first_text = now
+    return {
+        "ttfb": first_frame,
+        "first_text": first_text,
+        "total": time.perf_counter() - start,
+        "frames": frames,
+    }
+
+
+def _summary(samples: List[Dict[str, Optional[float]]], key: str) -> str:
+    values = [s[key] for s in samples if s[key] is not None]
+    if not values:
+        return "-"
+    return f"{statistics.median(values) * 1000:8.1f} ms"
+
+
+async def main(base_url: str, prompt: str, runs: int):
+    async with aiohttp.ClientSession() as http:
+        for streaming in (False, True):
+            samples = [await _run_turn(http, base_url, prompt, streaming) for _ in range(runs)]
+            mode = "streaming" if streaming else "buffered"
+            print(
+                f"{mode:<10} ttfb={_summary(samples, 'ttfb')} "
+                f"first_text={_summary(samples, 'first_text')} "
+                f"total={_summary(samples, 'total')} "
+                f"frames={statistics.median(s['frames'] for s in samples):.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--prompt", default="Which city has the most events?")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url.rstrip("/"), args.prompt, args.runs))
@@ -0,0 +1,119 @@
+"""Read/write throughput of the REST API from 1 to N uvicorn workers.
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 --duration 10 --concurrency 64
+
+Each configuration gets a fresh WAL database seeded with `--seed` events. Reads
+are `GET /events/{id}`, writes are `POST /events/`. Any non-2xx response
+(e.g. a `database is locked` 500) is counted as an error.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import List, Tuple
+
+import aiohttp
+
+from models.data_models import Event
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _seed(db_path: str, count: int) -> List[str]:
+    # events.organizer_id references organizers; this creates both tables.
+    await OrganizerRepo(db_path).init_db()
+    repo = Repo(db_path)
+    ids = []
+    for i in range(count):
+        event_id = f"seed-{i}"
+        await repo.insert(
+            Event(id=event_id, title=f"Seed event {i}", date="2025-12-01", location=f"City {i % 20}")
+        )
+        ids.append(event_id)
+    await repo.writes.close()
+    return ids
+
+
+def _wait_ready(port: int, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/events/analytics/total"):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    raise TimeoutError("server did not start")
+
+
+async def _load(
+    base_url: str, ids: List[str], duration: float, concurrency: int, write: bool
+) -> Tuple[int, int]:
+    ok = errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(http: aiohttp.ClientSession):
+        nonlocal ok, errors
+        while time.perf_counter() < deadline:
+            if write:
+                request = http.post(
+                    f"{base_url}/events/",
+                    json={"title": "Burst", "date": "2025-12-31", "location": "Goa"},
+                )
+            else:
+                request = http.get(f"{base_url}/events/{random.choice(ids)}")
+            async with request as resp:
+                await resp.read()
+                if resp.status < 300:
+                    ok += 1
+                else:
+                    errors += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+    return ok, errors
+
+
+def run(workers: int, args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        ids = asyncio.run(_seed(db_path, args.seed))
+        proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "main:app",
+                "--port", str(args.port), "--workers", str(workers), "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=dict(os.environ, DB_NAME=db_path),
+        )
+        try:
+            _wait_ready(args.port)
+            base_url = f"http://127.0.0.1:{args.port}"
+            for label, write in (("read", False), ("write", True)):
+                ok, errors = asyncio.run(_load(base_url, ids, args.duration, args.concurrency, write))
+                print(
+                    f"workers={workers:<3} {label:<5} {ok / args.duration:9.0f} req/s  errors={errors}"
+                )
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    for workers in args.workers:
+        run(workers, args)
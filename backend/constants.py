@@ -1,10 +1,117 @@
 # constants.py
+import os
+
 AGENT_NAME = "festive_agent"   # was "festive-agent"
 AGENT_DESCRIPTION = "Event assistant for Festive Connect..."
 AGENT_MODEL = "gemini-2.0-flash"
 
 
 # DB Details
-DB_NAME = "festiveconnect.db"
+DB_NAME = os.getenv("DB_NAME", "festiveconnect.db")
 TABLE_NAME = "events"
-ORGANIZER_TABLE_NAME = "organizers"
\ No newline at end of file
+ORGANIZER_TABLE_NAME = "organizers"
+EVENT_PERFORMERS_TABLE_NAME = "event_performers"  # one row per (event, performer)
+CULTURAL_CATEGORY = "cultural"  # events.category counted as cultural events
+
+# Region partitions (see repos/partitioned.py): one database per region in
+# PARTITION_DIR instead of DB_NAME. PARTITION_REGIONS maps event locations to
+# regions, e.g. "south=Bangalore,Chennai;west=Mumbai,Pune"; organizers go by
+# their `region`. Anything unmapped lands in PARTITION_DEFAULT.
+PARTITION_BY_REGION = os.getenv("PARTITION_BY_REGION", "0") == "1"
+PARTITION_DIR = os.getenv("PARTITION_DIR", "partitions")
+PARTITION_REGIONS = os.getenv("PARTITION_REGIONS", "")
+PARTITION_DEFAULT = os.getenv("PARTITION_DEFAULT", "other")
+
+# SQLite tuning (applied to every connection, see repos/db.py)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL
+SQLITE_WAL_AUTOCHECKPOINT = int(os.getenv("SQLITE_WAL_AUTOCHECKPOINT", "1000"))  # pages
+SQLITE_JOURNAL_SIZE_LIMIT = int(os.getenv("SQLITE_JOURNAL_SIZE_LIMIT", str(64 * 1024 * 1024)))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))  # pooled read connections
+
+# Group commit: concurrent writes are committed together (see repos/db.py)
+WRITE_BATCH_MAX_SIZE = int(os.getenv("WRITE_BATCH_MAX_SIZE", "64"))
+WRITE_BATCH_MAX_DELAY_MS = float(os.getenv("WRITE_BATCH_MAX_DELAY_MS", "2"))
+
+# Idempotency-Key header on POST /events/ and /organizers/
+IDEMPOTENCY_TABLE_NAME = "idempotency_keys"
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Worker processes serving the app (gunicorn.conf.py exports its count)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# In-memory columnar index used by the event analytics (see repos/event_index.py)
+EVENT_INDEX_ENABLED = os.getenv("EVENT_INDEX_ENABLED", "1") == "1"
+# Reload the index once it is this many seconds old (0 = never). Each worker
+# only sees its own writes, so multi-worker deployments refresh periodically.
+EVENT_INDEX_MAX_AGE_S = float(
+    os.getenv("EVENT_INDEX_MAX_AGE_S", "0" if WEB_CONCURRENCY <= 1 else "5")
+)
+
+# Fuzzy title/location search (see repos/fuzzy_index.py): minimum Dice score
+FUZZY_MIN_SCORE = float(os.getenv("FUZZY_MIN_SCORE", "0.3"))
+
+# "Similar events" (see repos/similar_index.py): postings read per lookup, and
+# where the index is saved between restarts (default: next to the database)
+SIMILAR_POSTINGS_BUDGET = int(os.getenv("SIMILAR_POSTINGS_BUDGET", "20000"))
+SIMILAR_INDEX_PATH = os.getenv("SIMILAR_INDEX_PATH", "")
+
+# GET /events/upcoming keeps events starting within this many hours in memory
+UPCOMING_CACHE_HOURS = int(os.getenv("UPCOMING_CACHE_HOURS", "24"))
+UPCOMING_CACHE_REFRESH_S = float(os.getenv("UPCOMING_CACHE_REFRESH_S", "300"))  # slide the window
+
+# Per-table change counters kept by triggers (see repos/table_versions.py)
+TABLE_VERSIONS_TABLE_NAME = "table_versions"
+DATABASE_META_TABLE_NAME = "database_meta"  # e.g. the random id naming this file
+
+# GET /events/calendar.ics keeps rendered feeds (per filter) up to this many bytes
+ICAL_CACHE_MAX_BYTES = int(os.getenv("ICAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Archival of past events (see repos/archive.py). Events that started more
+# than EVENT_ARCHIVE_AFTER_DAYS ago move to the archive table (0 = off).
+EVENTS_ARCHIVE_TABLE_NAME = "events_archive"
+EVENT_HISTORY_TABLE_NAME = "event_history"  # aggregates kept for archived events
+EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME = "events_archive_performers"  # event_performers of archived events
+EVENT_ARCHIVE_AFTER_DAYS = int(os.getenv("EVENT_ARCHIVE_AFTER_DAYS", "0"))
+EVENT_ARCHIVE_INTERVAL_S = float(os.getenv("EVENT_ARCHIVE_INTERVAL_S", "3600"))
+EVENT_ARCHIVE_BATCH_SIZE = int(os.getenv("EVENT_ARCHIVE_BATCH_SIZE", "500"))
+
+# Background database maintenance (see repos/maintenance.py): every
+# MAINTENANCE_INTERVAL_S (0 = off), only inside MAINTENANCE_WINDOW if set
+# ("HH:MM-HH:MM" local time, may wrap past midnight).
+MAINTENANCE_INTERVAL_S = float(os.getenv("MAINTENANCE_INTERVAL_S", "3600"))
+MAINTENANCE_WINDOW = os.getenv("MAINTENANCE_WINDOW", "")
+MAINTENANCE_VACUUM_PAGES = int(os.getenv("MAINTENANCE_VACUUM_PAGES", "2000"))  # per run, 0 = all free pages
+
+# Online backups (see repos/backup.py): gzip snapshots in BACKUP_DIR (default:
+# backups/ next to the database), copied BACKUP_PAGES_PER_STEP pages at a time
+BACKUP_DIR = os.getenv("BACKUP_DIR", "")
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_PAUSE_MS = float(os.getenv("BACKUP_STEP_PAUSE_MS", "1"))  # between steps
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))  # newest snapshots kept (0 = all)
+BACKUP_MAX_AGE_DAYS = float(os.getenv("BACKUP_MAX_AGE_DAYS", "30"))  # older ones deleted (0 = never)
+# Admin API (routers/admin.py): requests must send X-Admin-Token; unset = disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Answer the prompt's stock questions without a model call (see agent/intent_router.py)
+AGENT_FAST_PATH_ENABLED = os.getenv("AGENT_FAST_PATH_ENABLED", "1") == "1"
+
+# Admission control (see middleware/admission.py). Per-client token bucket:
+# RATE_LIMIT_PER_S requests a second with bursts of RATE_LIMIT_BURST (0 = off).
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+RATE_LIMIT_PER_S = float(os.getenv("RATE_LIMIT_PER_S", "20"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))  # buckets kept in memory
+# Proxies in front of the app that append to X-Forwarded-For (Cloud Run: 1).
+# The client is the entry the outermost of them added, counted from the right;
+# entries further left are whatever the client sent. 0: the peer address.
+# RATE_LIMIT_TRUST_FORWARDED=1 is the older spelling of 1.
+RATE_LIMIT_TRUSTED_PROXIES = int(
+    os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1" if os.getenv("RATE_LIMIT_TRUST_FORWARDED") == "1" else "0")
+)
+# Concurrent requests per route class, and how many more may wait for a slot
+ADMISSION_EXPENSIVE_LIMIT = int(os.getenv("ADMISSION_EXPENSIVE_LIMIT", "8"))
+ADMISSION_EXPENSIVE_QUEUE = int(os.getenv("ADMISSION_EXPENSIVE_QUEUE", "16"))
+ADMISSION_CHEAP_LIMIT = int(os.getenv("ADMISSION_CHEAP_LIMIT", "128"))
+ADMISSION_CHEAP_QUEUE = int(os.getenv("ADMISSION_CHEAP_QUEUE", "256"))
+ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "2"))  # then 503
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from constants import (
+    DB_NAME,
+    EVENT_ARCHIVE_AFTER_DAYS,
+    EVENT_INDEX_ENABLED,
+    EVENT_INDEX_MAX_AGE_S,
+    MAINTENANCE_INTERVAL_S,
+    PARTITION_BY_REGION,
+    SIMILAR_INDEX_PATH,
+    WEB_CONCURRENCY,
+)
+from repos.archive import Archiver
+from repos.maintenance import Maintenance
+from repos.event_index import EventIndex
+from repos.fuzzy_index import EventTextIndex
+from repos.upcoming_cache import UpcomingCache
+from repos.organizer_repo import OrganizerRepo
+from repos.partitioned import PartitionedOrganizerRepo, PartitionedRepo, Partitions, needs_import
+from repos.repo import Repo
+from repos.similar_index import SimilarEventsIndex
+from services.organizer_service import OrganizerService
+from services.service import Service
+
+logger = logging.getLogger(__name__)
+
+
+class Container:
+    """Single set of repos/services shared by the routers and the agent tools."""
+
+    def __init__(self, db_path: str = DB_NAME, partitions: Optional[Partitions] = None):
+        self.db_path = db_path
+        # Region partitions replace the single file (see repos/partitioned.py).
+        if partitions is None and PARTITION_BY_REGION:
+            partitions = Partitions()
+        self.partitions = partitions
+        if partitions is not None:
+            self.repo = PartitionedRepo(partitions)
+            self.organizer_repo = PartitionedOrganizerRepo(partitions)
+        else:
+            self.repo = Repo(db_path)
+            self.organizer_repo = OrganizerRepo(db_path)
+        self.event_index = None
+        if EVENT_INDEX_ENABLED:
+            self.event_index = EventIndex(max_age=EVENT_INDEX_MAX_AGE_S)
+            self.repo.add_listener(self.event_index.apply)
+        self.text_index = EventTextIndex(max_age=EVENT_INDEX_MAX_AGE_S)
+        self.repo.add_listener(self.text_index.apply)
+        self.upcoming_cache = UpcomingCache(max_age=EVENT_INDEX_MAX_AGE_S)
+        self.repo.add_listener(self.upcoming_cache.apply)
+        self.similar_index = SimilarEventsIndex(
+            max_age=EVENT_INDEX_MAX_AGE_S, path=SIMILAR_INDEX_PATH or self._default_similar_index_path()
+        )
+        self.repo.add_listener(self.similar_index.apply)
+        self.service = Service(
+            self.repo,
+            self.event_index,
+            self.text_index,
+            self.upcoming_cache,
+            similar_index=self.similar_index,
+        )
+        self.organizer_service = OrganizerService(self.organizer_repo)
+        self.archiver = Archiver(self.repo)
+        # Maintenance works on one file at a time: one per partition.
+        file_repos = self.repo.repos if partitions is not None else [self.repo]
+        self.maintenance: List[Maintenance] = [Maintenance(repo) for repo in file_repos]
+
+    def _default_similar_index_path(self) -> str:
+        if self.partitions is not None:
+            return os.path.join(self.partitions.directory, "similar.index")
+        return os.path.splitext(self.db_path)[0] + ".similar.index"
+
+    @property
+    def db_paths(self) -> List[str]:
+        """Every database file in use: DB_NAME, or each region partition."""
+        if self.partitions is not None:
+            return [self.partitions.path(name) for name in self.partitions.names]
+        return [self.db_path]
+
+    async def startup(self):
+        """Create/migrate the schema once instead of on the first request."""
+        await self.repo.init_db()
+        await self.organizer_repo.init_db()
+        if self.partitions is not None and await asyncio.to_thread(needs_import, self.partitions, self.db_path):
+            logger.warning(
+                "%s has data that PARTITION_BY_REGION=1 doesn't read; import it with "
+                "`python -m repos.partitioned --import %s`", self.db_path, self.db_path,
+            )
+        if EVENT_ARCHIVE_AFTER_DAYS > 0:
+            self.archiver.start()
+        if MAINTENANCE_INTERVAL_S > 0:
+            for maintenance in self.maintenance:
+                maintenance.start()
+
+    async def shutdown(self):
+        await self.archiver.stop()
+        for maintenance in self.maintenance:
+            await maintenance.stop()
+        # Restarts load it instead of rebuilding. Workers each hold their own
+        # copy, missing the others' writes: with several, none is saved.
+        if WEB_CONCURRENCY <= 1:
+            try:
+                await self.similar_index.save(self.repo)
+            except OSError as exc:
+                logger.warning("Could not save the similar-events index: %s", exc)
+        if self.partitions is not None:
+            await self.partitions.close()
+        else:
+            # Both repos share the per-file write queue; closing it once is enough.
+            await self.repo.writes.close()
+
+
+_container: Optional[Container] = None
+
+
+def get_container() -> Container:
+    """Return the process container, creating it on first use.
+
+    The app lifespan normally creates it; agent tools and scripts that run
+    outside the app fall back to building it lazily here.
+    """
+    global _container
+    if _container is None:
+        _container = Container()
+    return _container
+
+
+def set_container(container: Optional[Container]):
+    global _container
+    _container = container
+
+
+# FastAPI dependencies
+
+def get_service() -> Service:
+    return get_container().service
+
+
+def get_organizer_service() -> OrganizerService:
+    return get_container().organizer_service
+
+
+@asynccontextmanager
+async def lifespan(app):
+    container = get_container()
+    await container.startup()
+    try:
+        yield
+    finally:
+        await container.shutdown()
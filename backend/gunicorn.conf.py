@@ -0,0 +1,12 @@
+# gunicorn.conf.py — multi-worker deployment:
+#   pip install gunicorn && gunicorn -c gunicorn.conf.py main:app
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Workers inherit it, so they know they are not alone (see constants.py).
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+# Agent turns stream for a while; don't let gunicorn kill long SSE responses.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
@@ -1,14 +1,9 @@
 import os
-import uvicorn
 from google.adk.cli.fast_api import get_fast_api_app
-from services.service import Service
-from routers import events, organizers
-from repos.repo import Repo
-from constants import DB_NAME
-
-
-repo = Repo(DB_NAME)
-service = Service(repo)
+from dependencies import lifespan
+from routers import admin, events, metrics, organizers
+from middleware import admission
+from middleware.sse import SSEHeadersMiddleware
 
 # Get the directory where main.py is located
 AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -24,20 +19,47 @@ ALLOWED_ORIGINS = [
 # Set web=True if you intend to serve a web interface, False otherwise
 SERVE_WEB_INTERFACE = True
 
-# Call the function to get the FastAPI app instance
-# The agent_dir should point to the directory containing main.py
-# ADK will automatically discover the weather_agent folder within it
-app = get_fast_api_app(
-    agents_dir=AGENT_DIR,  # This points to sample-agent-v2/ directory
-    # session_service_uri=SESSION_SERVICE_URI,
-    allow_origins=ALLOWED_ORIGINS,  # This is the key CORS configuration
-    web=SERVE_WEB_INTERFACE,
-)
 
-app.include_router(events.router, prefix="/events", tags=["Events"])
-app.include_router(organizers.router, prefix="/organizers", tags=["Organizers"])
+def create_app():
+    # Nothing here imports the agent package (google.adk.agents, the genai
+    # client, agent/tools.py); the ADK loader imports it on the first agent run.
+
+    # Call the function to get the FastAPI app instance
+    # The agent_dir should point to the directory containing main.py
+    # ADK will automatically discover the agent folder within it
+    app = get_fast_api_app(
+        agents_dir=AGENT_DIR,  # This points to sample-agent-v2/ directory
+        # session_service_uri=SESSION_SERVICE_URI,
+        allow_origins=ALLOWED_ORIGINS,  # This is the key CORS configuration
+        web=SERVE_WEB_INTERFACE,
+        lifespan=lifespan,  # builds the shared repo/service container once
+    )
+
+    # Flush agent SSE frames (`/run_sse`) to the client as they are produced
+    app.add_middleware(SSEHeadersMiddleware)
+    # Rate limits and per-route-class concurrency, shedding with 429/503
+    # before the routes do any work; inside the CORS middleware so browsers
+    # can read the rejection (see middleware/admission.py)
+    admission.install(app)
+
+    app.include_router(events.router, prefix="/events", tags=["Events"])
+    app.include_router(organizers.router, prefix="/organizers", tags=["Organizers"])
+    app.include_router(metrics.router, tags=["Metrics"])
+    app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     # Use the PORT environment variable provided by Cloud Run, defaulting to 8080
-    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
- 
\ No newline at end of file
+    port = int(os.environ.get("PORT", 8080))
+    # WEB_CONCURRENCY > 1 starts that many worker processes; they share the
+    # SQLite file in WAL mode (see repos/db.py). Workers need an import string.
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,136 @@
+"""In-process metrics, served in the Prometheus text format at GET /metrics.
+
+    HITS = metrics.counter("agent_fast_path_hits_total", "Turns answered without the model", ["intent"])
+    HITS.inc(intent="total_events")
+
+Counters and summaries (count + sum) are kept per label set; gauges read
+their value from a callback when scraped. Each worker process has its own
+registry, so with WEB_CONCURRENCY > 1 a scrape sees one worker.
+"""
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _label_text(self, key: LabelValues) -> str:
+        if not key:
+            return ""
+        pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key))
+        return "{" + pairs + "}"
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Summary(_Metric):
+    """Count and sum of observations, e.g. latencies in seconds."""
+
+    kind = "summary"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, List[float]] = {}  # [count, sum]
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += value
+
+    def mean(self, **labels: str) -> float:
+        count, total = self._values.get(self._key(labels), (0, 0.0))
+        return total / count if count else 0.0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (count, total) in sorted(self._values.items()):
+            labels = self._label_text(key)
+            lines.append(f"{self.name}_count{labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {total:g}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {self.read():g}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None and not isinstance(metric, Gauge):
+            return existing  # module reloads keep their counts
+        self._metrics[metric.name] = metric  # gauges rebind to the newest source
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def summary(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Summary:
+        return self._register(Summary(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, help_text, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+summary = REGISTRY.summary
+gauge = REGISTRY.gauge
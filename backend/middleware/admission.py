@@ -0,0 +1,275 @@
+"""Admission control: per-client rate limits and per-route-class concurrency.
+
+A flood of agent runs or full-table reads used to slow every request down
+together, cheap point lookups included. Each HTTP request now goes through:
+
+1. A token bucket per client (address, or behind RATE_LIMIT_TRUSTED_PROXIES
+   proxies the X-Forwarded-For entry they added): RATE_LIMIT_PER_S requests
+   a second, bursts of RATE_LIMIT_BURST. Over the limit -> 429 with
+   Retry-After.
+2. A concurrency limit for its route class. "expensive" (agent runs, full
+   lists, calendars, analytics, batch operations, admin jobs) and "cheap"
+   (point lookups, single writes, sessions) have separate slots, so a queue
+   of agent runs never holds up `GET /events/{id}`. A request that finds every slot taken
+   waits in a bounded FIFO queue; if the queue is full, or no slot frees up
+   within ADMISSION_QUEUE_TIMEOUT_S, it gets 503 with Retry-After at once
+   rather than timing out slowly.
+
+Preflight requests, /metrics and the dev UI/docs are never limited. A
+streaming response (`/run_sse`) holds its slot until the stream ends.
+`install` puts the middleware inside the app's CORS middleware, so a
+browser on another origin can read a 429/503 and its Retry-After.
+
+Metrics: admitted and shed requests per class (shed by reason), queue wait,
+and gauges of in-flight/queued requests per class.
+"""
+import asyncio
+import json
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, MutableMapping, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+
+import metrics
+from constants import (
+    ADMISSION_CHEAP_LIMIT,
+    ADMISSION_CHEAP_QUEUE,
+    ADMISSION_ENABLED,
+    ADMISSION_EXPENSIVE_LIMIT,
+    ADMISSION_EXPENSIVE_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_S,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MAX_CLIENTS,
+    RATE_LIMIT_PER_S,
+    RATE_LIMIT_TRUSTED_PROXIES,
+)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+EXPENSIVE = "expensive"
+CHEAP = "cheap"
+
+ADMITTED = metrics.counter("admission_admitted_total", "Requests let through", ["route_class"])
+SHED = metrics.counter(
+    "admission_shed_total", "Requests rejected by admission control", ["route_class", "reason"]
+)
+QUEUE_WAIT = metrics.summary("admission_queue_wait_seconds", "Time admitted requests waited for a slot", ["route_class"])
+
+_EXEMPT = re.compile(r"^/(?:metrics|dev-ui|docs|redoc|openapi\.json)(?:/|$)")
+_EXPENSIVE = (
+    ("POST", re.compile(r"(?:^|/)run(?:_sse)?$")),  # agent runs
+    ("GET", re.compile(r"^/(?:events|organizers)/?$")),  # full lists
+    ("GET", re.compile(r"^/events/calendar")),
+    ("GET", re.compile(r"^/(?:events|organizers)/(?:analytics|audit)/")),
+    ("POST", re.compile(r"^/(?:events|organizers)/batch-")),
+    ("POST", re.compile(r"^/admin/")),  # backups
+)
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None if it is never limited."""
+    if method == "OPTIONS" or _EXEMPT.match(path):
+        return None
+    for route_method, pattern in _EXPENSIVE:
+        if method == route_method and pattern.search(path):
+            return EXPENSIVE
+    return CHEAP
+
+
+class Shed(Exception):
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket per client key; the least recently seen clients are
+    forgotten past `max_clients` (they start again with a full bucket)."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, at)
+
+    def check(self, key: str, now: Optional[float] = None):
+        """Take a token for `key` or raise Shed(429)."""
+        now = time.monotonic() if now is None else now
+        tokens, at = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - at) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        if not allowed:
+            raise Shed(429, "rate_limited", (1 - tokens) / self.rate)
+
+
+class ConcurrencyLimiter:
+    """At most `limit` requests at once; up to `queue_size` more wait (FIFO)
+    for at most `timeout_s`. A finishing request hands its slot straight to
+    the oldest waiter."""
+
+    def __init__(self, limit: int, queue_size: int, timeout_s: float = ADMISSION_QUEUE_TIMEOUT_S):
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.timeout_s = timeout_s
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Take a slot, waiting if needed; return the seconds waited or raise Shed(503)."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return 0.0
+        if len(self._waiters) >= self.queue_size:
+            raise Shed(503, "queue_full", self.timeout_s)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.timeout_s)
+        except asyncio.TimeoutError:
+            self._abandon(future)
+            raise Shed(503, "queue_timeout", self.timeout_s)
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        return time.perf_counter() - start
+
+    def _abandon(self, future: asyncio.Future):
+        if future.done() and not future.cancelled():
+            self.release()  # the slot arrived just as we gave up
+            return
+        future.cancel()
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot passes on; `active` is unchanged
+                return
+        self.active -= 1
+
+
+def client_key(scope: Scope, trusted_proxies: int = RATE_LIMIT_TRUSTED_PROXIES) -> str:
+    """The client's address. Behind `trusted_proxies` proxies that each
+    append to X-Forwarded-For, that is the entry the outermost one added,
+    `trusted_proxies` from the right: anything left of it came from the
+    client and can't be trusted (a fresh value per request would dodge the
+    limit)."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if trusted_proxies <= 0:
+        return peer
+    forwarded = [
+        entry.strip()
+        for key, value in scope.get("headers", [])
+        if key == b"x-forwarded-for"
+        for entry in value.decode("latin-1").split(",")
+    ]
+    forwarded = [entry for entry in forwarded if entry]
+    # Fewer entries than proxies: the request didn't come through them all.
+    return forwarded[-trusted_proxies] if len(forwarded) >= trusted_proxies else peer
+
+
+async def _reject(send: Send, shed: Shed):
+    retry_after = max(1, math.ceil(shed.retry_after))
+    if shed.status == 429:
+        detail = f"Too many requests; retry after {retry_after}s"
+    else:
+        detail = "Server busy; retry shortly"
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": shed.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+            # Not a CORS-safelisted header: let cross-origin scripts read it.
+            (b"access-control-expose-headers", b"retry-after"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Rate-limit per client and cap concurrency per route class (see module docstring)."""
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        enabled: bool = ADMISSION_ENABLED,
+        rate_per_s: float = RATE_LIMIT_PER_S,
+        burst: int = RATE_LIMIT_BURST,
+        expensive: Tuple[int, int] = (ADMISSION_EXPENSIVE_LIMIT, ADMISSION_EXPENSIVE_QUEUE),
+        cheap: Tuple[int, int] = (ADMISSION_CHEAP_LIMIT, ADMISSION_CHEAP_QUEUE),
+        queue_timeout_s: float = ADMISSION_QUEUE_TIMEOUT_S,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.rate_limiter = RateLimiter(rate_per_s, burst) if rate_per_s > 0 and burst > 0 else None
+        self.limiters: Dict[str, ConcurrencyLimiter] = {
+            EXPENSIVE: ConcurrencyLimiter(*expensive, timeout_s=queue_timeout_s),
+            CHEAP: ConcurrencyLimiter(*cheap, timeout_s=queue_timeout_s),
+        }
+        for route_class, limiter in self.limiters.items():
+            metrics.gauge(
+                f"admission_{route_class}_in_flight",
+                f"Requests running in the {route_class} class",
+                lambda limiter=limiter: limiter.active,
+            )
+            metrics.gauge(
+                f"admission_{route_class}_queued",
+                f"Requests waiting for a {route_class} slot",
+                lambda limiter=limiter: limiter.queued,
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route_class = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if not self.enabled or route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[route_class]
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.check(client_key(scope))
+            waited = await limiter.acquire()
+        except Shed as shed:
+            SHED.inc(route_class=route_class, reason=shed.reason)
+            await _reject(send, shed)
+            return
+        ADMITTED.inc(route_class=route_class)
+        QUEUE_WAIT.observe(waited, route_class=route_class)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+def install(app: Starlette, **options):
+    """Add AdmissionMiddleware innermost among the app's middleware: the
+    CORS middleware already installed then wraps it and adds its headers to
+    the 429/503 responses too. (`add_middleware` would put it outermost.)"""
+    app.user_middleware.append(Middleware(AdmissionMiddleware, **options))
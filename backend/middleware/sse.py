@@ -0,0 +1,43 @@
+from typing import Any, Awaitable, Callable, List, MutableMapping, Tuple
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class SSEHeadersMiddleware:
+    """Keep proxies from buffering `text/event-stream` responses.
+
+    Cloud Run, nginx and most CDNs buffer response bodies by default, which
+    turns a token-by-token agent stream back into one late blob. Streaming
+    responses get `Cache-Control: no-cache` and `X-Accel-Buffering: no` so
+    every `data:` frame is flushed to the browser as soon as it is written.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers: List[Tuple[bytes, bytes]] = list(message.get("headers", []))
+                content_type = next(
+                    (value for key, value in headers if key.lower() == b"content-type"), b""
+                )
+                if content_type.startswith(b"text/event-stream"):
+                    headers = [
+                        (key, value)
+                        for key, value in headers
+                        if key.lower() not in (b"cache-control", b"x-accel-buffering")
+                    ]
+                    headers.append((b"cache-control", b"no-cache"))
+                    headers.append((b"x-accel-buffering", b"no"))
+                    message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
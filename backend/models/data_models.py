@@ -1,5 +1,5 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 class Event(BaseModel):
     id: Optional[str] = Field(default=None)
@@ -10,6 +10,9 @@ class Event(BaseModel):
     description: Optional[str] = None
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+    organizer_id: Optional[str] = None  # organizers.organizer_id
+    category: Optional[str] = None  # e.g. "cultural", "music"; stored lowercase
+    version: Optional[int] = None  # bumped on every update; also sent as ETag
 
 
 class Organizer(BaseModel):
@@ -18,6 +21,77 @@ class Organizer(BaseModel):
     company: str
     region: str
     experience: int = 0  # years of experience
+    # Derived from linked events on read; values sent by clients are ignored.
     managed_events: int = 0
     cultural_events: int = 0
     events_2025: int = 0
+    version: Optional[int] = None  # bumped on every update; also sent as ETag
+
+
+class EventPatch(BaseModel):
+    """Partial event update: only the fields present in the body are written."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    title: Optional[str] = None
+    date: Optional[str] = None
+    location: Optional[str] = None
+    performers: Optional[List[str]] = None
+    description: Optional[str] = None
+    organizer_id: Optional[str] = None
+    category: Optional[str] = None
+
+
+class OrganizerPatch(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    name: Optional[str] = None
+    company: Optional[str] = None
+    region: Optional[str] = None
+    experience: Optional[int] = None
+
+
+MAX_BATCH_SIZE = 1000
+
+
+class BatchIds(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+MAX_FUZZY_MATCHES = 50
+MAX_SIMILAR_EVENTS = 50
+MAX_UPCOMING_EVENTS = 100
+
+CalendarBucket = Literal["day", "week", "month"]
+MAX_CALENDAR_BUCKETS = 1000  # cap when empty buckets are filled in
+
+AnalyticsDimension = Literal["location", "month", "year", "performer", "organizer", "category"]
+MAX_TOP_K = 100
+
+
+class AnalyticsQuery(BaseModel):
+    """Group-by question over events, e.g. "events per location in 2025" or
+    "distinct performers per month in Goa"."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    dimension: AnalyticsDimension
+    metric: Literal["count", "distinct"] = "count"
+    # What metric=distinct counts per group, e.g. dimension=location, distinct=performer
+    distinct: Optional[AnalyticsDimension] = None
+    # Filters (all optional, combined with AND)
+    location: Optional[str] = None
+    category: Optional[str] = None
+    organizer_id: Optional[str] = None
+    performer: Optional[str] = None
+    date_from: Optional[str] = None  # inclusive
+    date_to: Optional[str] = None  # exclusive
+    year: Optional[int] = None
+    top_k: int = Field(default=10, ge=1, le=MAX_TOP_K)
+    sort: Literal["value", "group"] = "value"  # "group" lists months/years in order
+
+    @model_validator(mode="after")
+    def _check_distinct(self):
+        if self.metric == "distinct" and (self.distinct is None or self.distinct == self.dimension):
+            raise ValueError("metric=distinct needs `distinct` set to a field other than the dimension")
+        return self
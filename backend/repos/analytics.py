@@ -0,0 +1,223 @@
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from constants import (
+    EVENT_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_TABLE_NAME,
+    ORGANIZER_TABLE_NAME,
+    TABLE_NAME,
+)
+from models.data_models import AnalyticsQuery, CalendarBucket
+from repos.dates import normalize_starts_at, year_bounds
+
+
+class _Field(NamedTuple):
+    expr: str  # SQL expression grouped/counted on
+    nocase: bool = False  # group case-insensitively ("Goa" == "goa")
+    join: Optional[str] = None  # table it needs besides `events e` ({performers}: see _tables)
+    label: Optional[str] = None  # extra display column, e.g. the organizer name of {grp}
+
+    @property
+    def key(self) -> str:
+        return f"{self.expr} COLLATE NOCASE" if self.nocase else self.expr
+
+
+# Dimensions map onto indexed columns (see Repo.init_db).
+_FIELDS = {
+    "location": _Field("e.location", nocase=True),
+    "month": _Field("substr(e.starts_at, 1, 7)"),
+    "year": _Field("substr(e.starts_at, 1, 4)"),
+    "category": _Field("e.category"),
+    "performer": _Field(
+        "p.performer",
+        nocase=True,
+        join="{performers} p ON p.event_id = e.id",
+    ),
+    "organizer": _Field(
+        "e.organizer_id",
+        label=f"(SELECT o.name FROM {ORGANIZER_TABLE_NAME} o WHERE o.organizer_id = {{grp}})",
+    ),
+}
+
+
+# (events, event_performers) tables each query reads; with archived events
+# it runs once per pair and the per-table groups are merged.
+_LIVE = (TABLE_NAME, EVENT_PERFORMERS_TABLE_NAME)
+_ARCHIVED = (EVENTS_ARCHIVE_TABLE_NAME, EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME)
+
+
+def _tables(archived: bool) -> Tuple[Tuple[str, str], ...]:
+    return (_LIVE, _ARCHIVED) if archived else (_LIVE,)
+
+
+def _join(field: _Field, performers: str) -> str:
+    return field.join.format(performers=performers)
+
+
+def _collate(nocase: bool) -> str:
+    return " COLLATE NOCASE" if nocase else ""
+
+
+def _starts_at_bound(value: str, name: str) -> str:
+    normalized = normalize_starts_at(value)
+    if normalized is None:
+        raise ValueError(f"{name} is not a recognised date: {value!r}")
+    return normalized
+
+
+def dimension_nocase(name: str) -> bool:
+    """Whether groups (or distinct values) of this dimension compare case-insensitively."""
+    return _FIELDS[name].nocase
+
+
+def _filters(query: AnalyticsQuery, dimension: _Field, performers: str) -> Tuple[List[str], List[Any]]:
+    where = [f"{dimension.expr} IS NOT NULL"]
+    params: List[Any] = []
+    if query.location:
+        where.append("e.location = ? COLLATE NOCASE")
+        params.append(query.location.strip())
+    if query.category:
+        where.append("e.category = ?")
+        params.append(query.category.strip().lower())
+    if query.organizer_id:
+        where.append("e.organizer_id = ?")
+        params.append(query.organizer_id)
+    if query.performer:
+        where.append(
+            f"e.id IN (SELECT event_id FROM {performers} WHERE performer = ? COLLATE NOCASE)"
+        )
+        params.append(query.performer.strip())
+    if query.year is not None:
+        where.append("e.starts_at >= ? AND e.starts_at < ?")
+        params.extend(year_bounds(query.year))
+    if query.date_from:
+        where.append("e.starts_at >= ?")
+        params.append(_starts_at_bound(query.date_from, "date_from"))
+    if query.date_to:
+        where.append("e.starts_at < ?")
+        params.append(_starts_at_bound(query.date_to, "date_to"))
+    return where, params
+
+
+def _shown(field: _Field, column: str) -> str:
+    """A group's displayed value: for case-insensitive groups the lowest
+    spelling, so it doesn't depend on which row SQLite reads first."""
+    return f"MIN({column} COLLATE BINARY)" if field.nocase else column
+
+
+def _pairs_sql(query: AnalyticsQuery, events: str, performers: str) -> Tuple[str, List[Any]]:
+    # Every spelling is kept; whoever counts the pairs compares them per `nocase`.
+    dimension = _FIELDS[query.dimension]
+    target = _FIELDS[query.distinct]
+    joins = [f"JOIN {_join(dimension, performers)}"] if dimension.join else []
+    if target.join:
+        # LEFT JOIN keeps groups whose events have nothing to count.
+        joins.append(f"LEFT JOIN {_join(target, performers)}")
+    where, params = _filters(query, dimension, performers)
+    sql = (
+        f"SELECT DISTINCT {dimension.expr} AS branch_grp, {target.expr} AS branch_value "
+        f"FROM {events} e {' '.join(joins)} WHERE {' AND '.join(where)}"
+    )
+    return sql, params
+
+
+def compile_analytics_query(query: AnalyticsQuery, archived: bool = False) -> Tuple[str, List[Any]]:
+    """Build one parameterized GROUP BY statement returning (group, value[, label]) rows.
+
+    With `archived` the archive tables are grouped too, each on its own
+    indexes, and the groups merged. Raises ValueError for dates that can't
+    be parsed.
+    """
+    dimension = _FIELDS[query.dimension]
+    grp = f"grp{_collate(dimension.nocase)}"
+    order = f"value DESC, {grp}" if query.sort == "value" else grp
+    if not archived:
+        joins = [f"JOIN {_join(dimension, EVENT_PERFORMERS_TABLE_NAME)}"] if dimension.join else []
+        if query.metric == "distinct":
+            target = _FIELDS[query.distinct]
+            if target.join:
+                # LEFT JOIN keeps groups whose events have nothing to count.
+                joins.append(f"LEFT JOIN {_join(target, EVENT_PERFORMERS_TABLE_NAME)}")
+            value = f"COUNT(DISTINCT {target.key})"
+        else:
+            # One row per event, or per (event, performer) pair when grouping by performer.
+            value = "COUNT(*)"
+        where, params = _filters(query, dimension, EVENT_PERFORMERS_TABLE_NAME)
+        columns = f"{_shown(dimension, dimension.expr)} AS grp, {value} AS value"
+        if dimension.label:
+            columns += f", {dimension.label.format(grp=dimension.expr)} AS label"
+        sql = (
+            f"SELECT {columns} FROM {TABLE_NAME} e {' '.join(joins)} "
+            f"WHERE {' AND '.join(where)} GROUP BY {dimension.key} ORDER BY {order} LIMIT ?"
+        )
+        params.append(query.top_k)
+        return sql, params
+
+    branches, params = [], []
+    for events, performers in _tables(archived):
+        if query.metric == "distinct":
+            sql, branch_params = _pairs_sql(query, events, performers)
+        else:
+            joins = [f"JOIN {_join(dimension, performers)}"] if dimension.join else []
+            where, branch_params = _filters(query, dimension, performers)
+            sql = (
+                f"SELECT {_shown(dimension, dimension.expr)} AS branch_grp, COUNT(*) AS branch_value "
+                f"FROM {events} e {' '.join(joins)} "
+                f"WHERE {' AND '.join(where)} GROUP BY {dimension.key}"
+            )
+        branches.append(sql)
+        params.extend(branch_params)
+    if query.metric == "distinct":
+        # UNION drops pairs found in both tables before they are counted.
+        value = f"COUNT(DISTINCT branch_value{_collate(_FIELDS[query.distinct].nocase)})"
+        merged = " UNION ".join(branches)
+    else:
+        value = "SUM(branch_value)"
+        merged = " UNION ALL ".join(branches)
+    columns = f"{_shown(dimension, 'branch_grp')} AS grp, {value} AS value"
+    if dimension.label:
+        columns += f", {dimension.label.format(grp='branch_grp')} AS label"
+    sql = (
+        f"SELECT {columns} FROM ({merged}) "
+        f"GROUP BY branch_grp{_collate(dimension.nocase)} ORDER BY {order} LIMIT ?"
+    )
+    params.append(query.top_k)
+    return sql, params
+
+
+def compile_analytics_pairs(query: AnalyticsQuery, archived: bool = False) -> Tuple[str, List[Any]]:
+    """The distinct (group, value) pairs a "distinct" query counts; value is
+    NULL for groups with nothing to count. Ignores sort and top_k."""
+    branches, params = [], []
+    for events, performers in _tables(archived):
+        sql, branch_params = _pairs_sql(query, events, performers)
+        branches.append(sql)
+        params.extend(branch_params)
+    return " UNION ".join(branches), params
+
+
+# Bucket key per event: the day, the Monday starting its week, or the month.
+CALENDAR_BUCKETS = {
+    "day": "substr(starts_at, 1, 10)",
+    "week": "date(starts_at, 'weekday 0', '-6 days')",
+    "month": "substr(starts_at, 1, 7)",
+}
+
+
+def compile_calendar_query(
+    start: str, end: str, bucket: CalendarBucket, include_ids: bool, archived: bool = False
+) -> Tuple[str, List[Any]]:
+    """Per-bucket counts (and optionally a JSON array of event ids, in date
+    order) for events with start <= starts_at < end, as one range scan (one
+    per table with `archived`)."""
+    ids = ", json_group_array(id)" if include_ids else ""
+    tables = (TABLE_NAME, EVENTS_ARCHIVE_TABLE_NAME) if archived else (TABLE_NAME,)
+    ranges = " UNION ALL ".join(
+        f"SELECT id, starts_at FROM {table} WHERE starts_at >= ? AND starts_at < ?" for table in tables
+    )
+    sql = (
+        f"SELECT {CALENDAR_BUCKETS[bucket]} AS bucket, COUNT(*){ids} "
+        f"FROM ({ranges} ORDER BY starts_at) "
+        "GROUP BY bucket ORDER BY bucket"
+    )
+    return sql, [start, end] * len(tables)
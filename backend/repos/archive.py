@@ -0,0 +1,237 @@
+"""Cold storage for past events.
+
+Events that started more than `EVENT_ARCHIVE_AFTER_DAYS` ago are moved from
+`events` into `events_archive` (same columns plus `archived_at`), so list
+endpoints, the in-memory indexes and full scans only see the hot rows. The
+analytics that count history (total events, top city/performer, location
+with the most past events) add the per-location/per-performer counts kept in
+`event_history`, which are updated in the same transaction as the move.
+Grouped analytics, the calendar and organizer statistics also read the
+archive (and `events_archive_performers`, its copy of `event_performers`),
+so archiving never changes their answers.
+
+The helpers below run inside write-queue jobs (see `Repo.archive_before`);
+`Archiver` runs the move on a schedule from the app lifespan.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from constants import (
+    EVENT_ARCHIVE_AFTER_DAYS,
+    EVENT_ARCHIVE_BATCH_SIZE,
+    EVENT_ARCHIVE_INTERVAL_S,
+    EVENT_HISTORY_TABLE_NAME,
+    EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_TABLE_NAME,
+)
+from repos.dates import STARTS_AT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# event_history dimensions: one "total" row, one row per location / performer
+HISTORY_TOTAL = "total"
+HISTORY_LOCATION = "location"
+HISTORY_PERFORMER = "performer"
+
+
+async def ensure_tables(db):
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {EVENTS_ARCHIVE_TABLE_NAME} (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            location TEXT NOT NULL,
+            performers TEXT,
+            description TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            organizer_id TEXT,
+            category TEXT,
+            starts_at TEXT,
+            version INTEGER NOT NULL DEFAULT 1,
+            archived_at TEXT NOT NULL
+        )
+    """
+    )
+    await db.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{EVENTS_ARCHIVE_TABLE_NAME}_starts_at "
+        f"ON {EVENTS_ARCHIVE_TABLE_NAME}(starts_at)"
+    )
+    await db.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{EVENTS_ARCHIVE_TABLE_NAME}_organizer "
+        f"ON {EVENTS_ARCHIVE_TABLE_NAME}(organizer_id, starts_at)"
+    )
+    await db.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{EVENTS_ARCHIVE_TABLE_NAME}_category "
+        f"ON {EVENTS_ARCHIVE_TABLE_NAME}(category, organizer_id)"
+    )
+    await db.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{EVENTS_ARCHIVE_TABLE_NAME}_location "
+        f"ON {EVENTS_ARCHIVE_TABLE_NAME}(location COLLATE NOCASE, starts_at)"
+    )
+    cursor = await db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME,),
+    )
+    existed = await cursor.fetchone() is not None
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME} (
+            event_id TEXT NOT NULL,
+            performer TEXT NOT NULL,
+            PRIMARY KEY (event_id, performer)
+        ) WITHOUT ROWID
+    """
+    )
+    await db.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME}_performer "
+        f"ON {EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME}(performer COLLATE NOCASE, event_id)"
+    )
+    if not existed:
+        # Archives written before this table existed
+        cursor = await db.execute(
+            f"SELECT id, performers FROM {EVENTS_ARCHIVE_TABLE_NAME} "
+            "WHERE performers IS NOT NULL AND performers != ''"
+        )
+        await db.executemany(
+            f"INSERT OR IGNORE INTO {EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME} (event_id, performer) VALUES (?, ?)",
+            [
+                (event_id, name.strip())
+                for event_id, performers in await cursor.fetchall()
+                for name in performers.split(",")
+                if name.strip()
+            ],
+        )
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {EVENT_HISTORY_TABLE_NAME} (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            events INTEGER NOT NULL,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+    """
+    )
+
+
+async def has_archived(db) -> bool:
+    """Whether any event has been archived in this file."""
+    cursor = await db.execute(f"SELECT EXISTS (SELECT 1 FROM {EVENTS_ARCHIVE_TABLE_NAME})")
+    return bool((await cursor.fetchone())[0])
+
+
+def _history_counts(rows: Iterable[Tuple[Optional[str], Optional[str]]]) -> Dict[Tuple[str, str], int]:
+    """event_history deltas for events given as (location, comma-separated performers)."""
+    counts: Dict[Tuple[str, str], int] = {}
+    for location, performers in rows:
+        keys = [(HISTORY_TOTAL, "")]
+        if location:
+            keys.append((HISTORY_LOCATION, location))
+        for performer in dict.fromkeys(p.strip() for p in (performers or "").split(",")):
+            if performer:
+                keys.append((HISTORY_PERFORMER, performer))
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+async def add_to_history(db, rows: Iterable[Tuple[Optional[str], Optional[str]]]):
+    """Count archived events given as (location, comma-separated performers)."""
+    await db.executemany(
+        f"""
+        INSERT INTO {EVENT_HISTORY_TABLE_NAME} (dimension, value, events) VALUES (?, ?, ?)
+        ON CONFLICT (dimension, value) DO UPDATE SET events = events + excluded.events
+    """,
+        [(dimension, value, count) for (dimension, value), count in _history_counts(rows).items()],
+    )
+
+
+async def reconcile_history(db) -> int:
+    """Recount event_history from the archive table; return how many rows were wrong.
+
+    The counts only drift if an archived id is archived again (a new event
+    reusing it) or the archive is edited by hand.
+    """
+    cursor = await db.execute(f"SELECT location, performers FROM {EVENTS_ARCHIVE_TABLE_NAME}")
+    expected = _history_counts(await cursor.fetchall())
+    cursor = await db.execute(f"SELECT dimension, value, events FROM {EVENT_HISTORY_TABLE_NAME}")
+    stored = {(dimension, value): events for dimension, value, events in await cursor.fetchall()}
+    wrong = [key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key)]
+    if wrong:
+        await db.executemany(
+            f"DELETE FROM {EVENT_HISTORY_TABLE_NAME} WHERE dimension = ? AND value = ?", wrong
+        )
+        await db.executemany(
+            f"INSERT INTO {EVENT_HISTORY_TABLE_NAME} (dimension, value, events) VALUES (?, ?, ?)",
+            [(*key, expected[key]) for key in wrong if key in expected],
+        )
+    return len(wrong)
+
+
+def archive_cutoff(after_days: int) -> str:
+    """`starts_at` before which events are archived."""
+    return (datetime.now() - timedelta(days=after_days)).strftime(STARTS_AT_FORMAT)
+
+
+class Archiver:
+    """Moves events older than `after_days` into the archive every `interval_s`.
+
+    Each batch of `batch_size` events is its own write-queue job, so regular
+    writes interleave with a large first run instead of waiting for it.
+    """
+
+    def __init__(
+        self,
+        repo,
+        after_days: int = EVENT_ARCHIVE_AFTER_DAYS,
+        interval_s: float = EVENT_ARCHIVE_INTERVAL_S,
+        batch_size: int = EVENT_ARCHIVE_BATCH_SIZE,
+    ):
+        self.repo = repo
+        self.after_days = after_days
+        self.interval_s = interval_s
+        self.batch_size = max(1, batch_size)
+        self.archived = 0  # events moved since startup
+        self.last_run_s: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Archive everything currently past the horizon; return how many moved."""
+        start = time.perf_counter()
+        cutoff = archive_cutoff(self.after_days)
+        moved = 0
+        while True:
+            batch = await self.repo.archive_before(cutoff, self.batch_size)
+            moved += len(batch)
+            if len(batch) < self.batch_size:
+                break
+        self.archived += moved
+        self.last_run_s = time.perf_counter() - start
+        if moved:
+            logger.info("Archived %d events older than %s in %.2fs", moved, cutoff, self.last_run_s)
+        return moved
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Event archival failed")
+            await asyncio.sleep(self.interval_s)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
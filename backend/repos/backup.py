@@ -0,0 +1,239 @@
+"""Online backups of the events database as gzip snapshots.
+
+`create_backup` copies the live file with SQLite's backup API,
+BACKUP_PAGES_PER_STEP pages per step with a short pause in between. In WAL
+mode each step is a read transaction, so writers are never blocked. A write
+from another connection can make SQLite restart the copy. If that happens
+more than MAX_RESTARTS times, the rest is copied in one step (still a single
+read transaction, which writers don't wait on). The copy is checked with
+`PRAGMA quick_check` and gzipped into BACKUP_DIR as
+`<db name>-YYYYmmdd-HHMMSS.db.gz`, then older snapshots are pruned
+(BACKUP_KEEP newest, none older than BACKUP_MAX_AGE_DAYS; the newest is
+always kept).
+
+From `backend/`:
+
+    python -m repos.backup                # take a snapshot, print timings
+    python -m repos.backup --list
+    python -m repos.backup --restore backups/festiveconnect-20250101-020000.db.gz --to restored.db
+
+or `POST /admin/backups` (routers/admin.py).
+"""
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from constants import (
+    BACKUP_DIR,
+    BACKUP_KEEP,
+    BACKUP_MAX_AGE_DAYS,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_PAUSE_MS,
+    DB_NAME,
+    SQLITE_BUSY_TIMEOUT_MS,
+)
+
+SUFFIX = ".db.gz"
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+MAX_RESTARTS = 3  # page-by-page copies restarted by writers before copying in one step
+_CHUNK = 1024 * 1024
+
+_running = threading.Lock()  # one backup at a time per process
+
+
+class BackupInProgress(Exception):
+    """Another backup of this process is still running."""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def backup_dir(db_path: str = DB_NAME) -> str:
+    return BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(db_path)), "backups")
+
+
+def _snapshot_name(db_path: str, when: datetime) -> str:
+    base = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{base}-{when.strftime(_STAMP_FORMAT)}{SUFFIX}"
+
+
+def _copy(db_path: str, target: str, pages: int, pause_s: float) -> Dict[str, Any]:
+    progress = {"steps": 0, "restarts": 0, "remaining": None, "pages": 0}
+
+    def on_step(status, remaining, total):
+        progress["steps"] += 1
+        progress["pages"] = total
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            progress["restarts"] += 1  # a writer changed pages already copied
+            if progress["restarts"] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        progress["remaining"] = remaining
+        if pause_s and remaining:
+            time.sleep(pause_s)  # let writers in between steps
+
+    source = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    destination = sqlite3.connect(target)
+    try:
+        try:
+            source.backup(destination, pages=max(1, pages), progress=on_step)
+            progress["one_step"] = False
+        except _TooManyRestarts:
+            source.backup(destination)  # pages=-1: the rest in one read transaction
+            progress["one_step"] = True
+        ok = destination.execute("PRAGMA quick_check").fetchone()[0]
+        if ok != "ok":
+            raise sqlite3.DatabaseError(f"Backup copy failed quick_check: {ok}")
+        progress["page_size"] = destination.execute("PRAGMA page_size").fetchone()[0]
+        progress["pages"] = destination.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        destination.close()
+        source.close()
+    del progress["remaining"]
+    return progress
+
+
+def _compress(source: str, target: str):
+    partial = target + ".part"
+    with open(source, "rb") as raw, gzip.open(partial, "wb", compresslevel=6) as packed:
+        shutil.copyfileobj(raw, packed, _CHUNK)
+    os.replace(partial, target)  # never leave a truncated snapshot under the final name
+
+
+def list_backups(directory: str) -> List[Dict[str, Any]]:
+    """Snapshots in `directory`, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        if not name.endswith(SUFFIX):
+            continue
+        try:
+            taken = datetime.strptime(name[: -len(SUFFIX)][-15:], _STAMP_FORMAT)  # YYYYmmdd-HHMMSS
+        except ValueError:
+            continue  # not one of ours
+        path = os.path.join(directory, name)
+        backups.append({"name": name, "path": path, "taken_at": taken.isoformat(), "bytes": os.path.getsize(path)})
+    backups.sort(key=lambda backup: backup["taken_at"], reverse=True)
+    return backups
+
+
+def prune(directory: str, keep: int = BACKUP_KEEP, max_age_days: float = BACKUP_MAX_AGE_DAYS) -> List[str]:
+    """Per database, delete snapshots beyond the newest `keep` or older than
+    `max_age_days` (0 disables either rule); the newest is always kept."""
+    by_database: Dict[str, List[Dict[str, Any]]] = {}
+    for backup in list_backups(directory):
+        # Region partitions share a directory; each database keeps its own.
+        by_database.setdefault(backup["name"][: -len(SUFFIX) - 16], []).append(backup)
+    cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days > 0 else None
+    removed = []
+    for backups in by_database.values():
+        for position, backup in enumerate(backups[1:], 1):
+            too_many = keep > 0 and position >= keep
+            too_old = cutoff is not None and datetime.fromisoformat(backup["taken_at"]) < cutoff
+            if too_many or too_old:
+                os.remove(backup["path"])
+                removed.append(backup["name"])
+    return removed
+
+
+def create_backup(
+    db_path: str = DB_NAME,
+    directory: Optional[str] = None,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    pause_ms: float = BACKUP_STEP_PAUSE_MS,
+    keep: int = BACKUP_KEEP,
+    max_age_days: float = BACKUP_MAX_AGE_DAYS,
+) -> Dict[str, Any]:
+    """Take a snapshot of `db_path`; return where it went and how long it took.
+
+    Blocking; call it from a thread (`asyncio.to_thread`) inside the app.
+    """
+    if not _running.acquire(blocking=False):
+        raise BackupInProgress()
+    try:
+        directory = directory or backup_dir(db_path)
+        os.makedirs(directory, exist_ok=True)
+        started = datetime.now()
+        target = os.path.join(directory, _snapshot_name(db_path, started))
+        with tempfile.TemporaryDirectory(dir=directory) as scratch:
+            copy_path = os.path.join(scratch, "copy.db")
+            start = time.perf_counter()
+            report = _copy(db_path, copy_path, pages, pause_ms / 1000)
+            copy_s = time.perf_counter() - start
+            size = os.path.getsize(copy_path)
+            start = time.perf_counter()
+            _compress(copy_path, target)
+            compress_s = time.perf_counter() - start
+        compressed = os.path.getsize(target)
+        report.update({
+            "path": target,
+            "taken_at": started.isoformat(),
+            "bytes": size,
+            "compressed_bytes": compressed,
+            "ratio": round(size / compressed, 2) if compressed else None,
+            "copy_seconds": round(copy_s, 4),
+            "compress_seconds": round(compress_s, 4),
+            "copy_mb_per_s": round(size / 1e6 / copy_s, 1) if copy_s else None,
+            "pruned": prune(directory, keep, max_age_days),
+        })
+        return report
+    finally:
+        _running.release()
+
+
+def restore(snapshot: str, target: str) -> int:
+    """Unpack `snapshot` to `target` (which must not exist); return its size.
+    Stop the app before putting the result in place of the live file."""
+    if os.path.exists(target):
+        raise FileExistsError(target)
+    partial = target + ".part"
+    with gzip.open(snapshot, "rb") as packed, open(partial, "wb") as raw:
+        shutil.copyfileobj(packed, raw, _CHUNK)
+    os.replace(partial, target)
+    return os.path.getsize(target)
+
+
+def main(args):
+    directory = args.dir or backup_dir(args.db)
+    if args.list:
+        for backup in list_backups(directory):
+            print(f"{backup['taken_at']}  {backup['bytes'] / 1e6:8.2f} MB  {backup['path']}")
+        return
+    if args.restore:
+        size = restore(args.restore, args.to)
+        print(f"restored {args.restore} -> {args.to} ({size / 1e6:.2f} MB)")
+        return
+    report = create_backup(args.db, directory, args.pages, args.pause_ms, args.keep, args.max_age_days)
+    print(f"{report['path']}")
+    print(f"  {report['pages']} pages ({report['bytes'] / 1e6:.2f} MB) in {report['steps']} steps, "
+          f"{report['restarts']} restarts{' (finished in one step)' if report['one_step'] else ''}")
+    print(f"  copy     {report['copy_seconds'] * 1000:8.1f}ms  {report['copy_mb_per_s']} MB/s")
+    print(f"  compress {report['compress_seconds'] * 1000:8.1f}ms  -> {report['compressed_bytes'] / 1e6:.2f} MB "
+          f"(x{report['ratio']})")
+    if report["pruned"]:
+        print(f"  pruned {', '.join(report['pruned'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Take, list or restore database snapshots.")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--dir", help="snapshot directory (default: BACKUP_DIR or backups/ next to the db)")
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="pages copied per step")
+    parser.add_argument("--pause-ms", type=float, default=BACKUP_STEP_PAUSE_MS)
+    parser.add_argument("--keep", type=int, default=BACKUP_KEEP)
+    parser.add_argument("--max-age-days", type=float, default=BACKUP_MAX_AGE_DAYS)
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--restore", metavar="SNAPSHOT")
+    parser.add_argument("--to", help="where --restore writes the database")
+    parsed = parser.parse_args()
+    if parsed.restore and not parsed.to:
+        parser.error("--restore needs --to")
+    main(parsed)
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Formats seen in user/agent input besides ISO 8601 (handled by fromisoformat).
+_DATE_FORMATS = (
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%B %d %Y",
+    "%b %d %Y",
+)
+
+# Sortable text form stored in the indexed `starts_at` column.
+STARTS_AT_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_event_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse the free-form `date` strings stored on events (naive, local)."""
+    if not value:
+        return None
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def normalize_starts_at(value: Optional[str]) -> Optional[str]:
+    """Return `value` as `YYYY-MM-DDTHH:MM:SS`, or None if it can't be parsed."""
+    parsed = parse_event_datetime(value)
+    return parsed.strftime(STARTS_AT_FORMAT) if parsed else None
+
+
+def year_bounds(year: int) -> Tuple[str, str]:
+    """Half-open `starts_at` range covering one calendar year."""
+    return f"{year:04d}-01-01T00:00:00", f"{year + 1:04d}-01-01T00:00:00"
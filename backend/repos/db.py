@@ -0,0 +1,257 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import aiosqlite
+
+from constants import (
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_JOURNAL_SIZE_LIMIT,
+    SQLITE_READ_POOL_SIZE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_WAL_AUTOCHECKPOINT,
+    WRITE_BATCH_MAX_DELAY_MS,
+    WRITE_BATCH_MAX_SIZE,
+)
+
+T = TypeVar("T")
+WriteJob = Callable[[aiosqlite.Connection], Awaitable[T]]
+
+
+async def _apply_pragmas(db: aiosqlite.Connection):
+    await db.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    await db.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    await db.execute(f"PRAGMA wal_autocheckpoint = {SQLITE_WAL_AUTOCHECKPOINT}")
+    # events.organizer_id references organizers (ON DELETE SET NULL)
+    await db.execute("PRAGMA foreign_keys = ON")
+
+
+@asynccontextmanager
+async def connect(db_path: str) -> AsyncIterator[aiosqlite.Connection]:
+    """Open a connection with the shared busy-timeout/synchronous/FK settings."""
+    async with aiosqlite.connect(db_path) as db:
+        await _apply_pragmas(db)
+        yield db
+
+
+class ReadPool:
+    """Reusable read connections to one database file.
+
+    Opening an aiosqlite connection starts a thread and re-applies the
+    pragmas; reads borrow an open one instead. Each connection has its own
+    thread, so up to `size` queries (e.g. agent tools called together) run
+    in parallel; in WAL mode they never wait for the writer.
+    """
+
+    def __init__(self, db_path: str, size: int = SQLITE_READ_POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._idle: List[aiosqlite.Connection] = []
+        self._slots = asyncio.Semaphore(self.size)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with self._slots:
+            if self._idle:
+                db = self._idle.pop()
+            else:
+                db = await aiosqlite.connect(self.db_path)
+                await _apply_pragmas(db)
+            try:
+                yield db
+            except BaseException:
+                # The connection may be mid-statement; don't hand it out again.
+                await db.close()
+                raise
+            if db.in_transaction:
+                await db.rollback()  # reads must not hold a WAL snapshot open
+            self._idle.append(db)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for db in idle:
+            await db.close()
+
+
+_read_pools: Dict[Tuple[str, asyncio.AbstractEventLoop], ReadPool] = {}
+
+
+@asynccontextmanager
+async def read_connection(db_path: str) -> AsyncIterator[aiosqlite.Connection]:
+    """Borrow a pooled connection for reads (see ReadPool); writes go through
+    the WriteQueue."""
+    key = (db_path, asyncio.get_running_loop())
+    pool = _read_pools.get(key)
+    if pool is None:
+        pool = _read_pools[key] = ReadPool(db_path)
+    async with pool.connection() as db:
+        yield db
+
+
+async def close_read_pools(db_path: str):
+    for key in [key for key in _read_pools if key[0] == db_path]:
+        await _read_pools.pop(key).close()
+
+
+async def configure_database(db_path: str):
+    """Put the database file in WAL mode.
+
+    WAL is persistent, so this only has to succeed once per file; readers then
+    never block the writer and other worker processes can read concurrently.
+    """
+    async with connect(db_path) as db:
+        # Only takes effect on a new file (or after a VACUUM); lets the
+        # maintenance task hand free pages back with incremental_vacuum.
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute(f"PRAGMA journal_size_limit = {SQLITE_JOURNAL_SIZE_LIMIT}")
+
+
+class WriteQueue:
+    """Serialize and group-commit this process's writes to one database file.
+
+    Jobs are coroutines taking the writer connection. A single long-lived
+    connection runs them in submission order, so coroutines in one process
+    never race each other for the SQLite write lock.
+
+    Jobs that arrive together are committed in one `BEGIN IMMEDIATE`
+    transaction (one fsync): after the first job is dequeued the worker keeps
+    collecting for up to `max_batch_delay_ms`, or until `max_batch_size` jobs
+    are pending. Each job runs inside its own SAVEPOINT, so a failing job is
+    rolled back alone and only its caller sees the exception; the others get
+    their results once the shared commit succeeds.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_batch_size: int = WRITE_BATCH_MAX_SIZE,
+        max_batch_delay_ms: float = WRITE_BATCH_MAX_DELAY_MS,
+    ):
+        self.db_path = db_path
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_delay = max(0.0, max_batch_delay_ms) / 1000
+        self.batches = 0
+        self.jobs = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch: List[Tuple[WriteJob, asyncio.Future]] = []
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batch = []
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, job: WriteJob[T]) -> T:
+        """Run `job(db)` in a write transaction and return its result."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[WriteJob, asyncio.Future]]:
+        # Kept on the queue object so `_fail_pending` reaches jobs dequeued
+        # before the worker died.
+        batch = self._batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_batch_delay
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return [(job, future) for job, future in batch if not future.cancelled()]
+
+    async def _run(self):
+        try:
+            async with connect(self.db_path) as db:
+                while True:
+                    batch = await self._next_batch()
+                    if batch:
+                        await self._commit(db, batch)
+                    self._batch = []
+        except asyncio.CancelledError:
+            self._fail_pending(None)
+            raise
+        except Exception as exc:
+            # Opening the connection (or a rollback) failed: no job queued
+            # here will ever run, so fail them all. The next submit() starts
+            # a new worker with a fresh connection.
+            self._fail_pending(exc)
+
+    async def _commit(self, db: aiosqlite.Connection, batch: List[Tuple[WriteJob, asyncio.Future]]):
+        done: List[Tuple[asyncio.Future, object]] = []
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                await db.execute("SAVEPOINT write_job")
+                try:
+                    result = await job(db)
+                except Exception as exc:
+                    await db.execute("ROLLBACK TO write_job")
+                    await db.execute("RELEASE write_job")
+                    if not future.done():
+                        future.set_exception(exc)
+                else:
+                    await db.execute("RELEASE write_job")
+                    done.append((future, result))
+            await db.commit()
+        except Exception as exc:
+            # BEGIN or COMMIT failed: nothing in this batch was written. Roll
+            # back before waking the callers; if that fails too, _run gives up
+            # on the connection and fails the batch with everything queued.
+            await db.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.jobs += len(batch)
+        for future, result in done:
+            if not future.done():
+                future.set_result(result)
+
+    def _fail_pending(self, exc: Optional[BaseException]):
+        """Fail (or, on close, cancel) the current batch and every queued job."""
+        pending = list(self._batch)
+        self._batch = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if future.done():
+                continue
+            if exc is None:
+                future.cancel()
+            else:
+                future.set_exception(exc)
+
+    async def close(self):
+        """Stop the writer and close the file's pooled read connections
+        (aiosqlite's threads would otherwise keep the process alive)."""
+        await close_read_pools(self.db_path)
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+
+_write_queues: Dict[str, WriteQueue] = {}
+
+
+def get_write_queue(db_path: str) -> WriteQueue:
+    """One queue per database file, shared by every repo in the process."""
+    if db_path not in _write_queues:
+        _write_queues[db_path] = WriteQueue(db_path)
+    return _write_queues[db_path]
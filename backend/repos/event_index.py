@@ -0,0 +1,324 @@
+"""In-process columnar snapshot of the events table for analytics.
+
+Columns are `array.array`s so writes can append to them cheaply; when NumPy is
+installed the queries run over zero-copy NumPy views of those arrays, otherwise
+they fall back to plain loops (still without building pydantic objects or
+going back to SQLite).
+
+- dates are stored as integer seconds since the epoch (`NO_TIME` if unparsable)
+- locations and performers are dictionary-encoded to integer codes
+- performers are multi-valued, so they live in parallel (row, code) arrays
+
+The index is loaded from `Repo.list()` on first use and then kept current by
+the repo's write listeners: an updated event is tombstoned and re-appended,
+and the arrays are compacted once tombstones dominate. Writes made by other
+processes are only picked up by a reload (see `max_age`).
+"""
+import asyncio
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from repos.dates import parse_event_datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional: queries fall back to loops over the arrays
+    np = None
+
+NO_TIME = -(2 ** 62)  # sorts before every real timestamp
+_EPOCH = datetime(1970, 1, 1)
+
+# Compact once at least this many rows are dead and they outnumber live rows.
+_COMPACT_MIN_DEAD = 1024
+
+
+def to_timestamp(value: Optional[str]) -> int:
+    parsed = parse_event_datetime(value)
+    if parsed is None:
+        return NO_TIME
+    return int((parsed - _EPOCH).total_seconds())
+
+
+def event_field(event: Any, name: str) -> Any:
+    """Read a field from an Event or an event dict (listeners get both)."""
+    if isinstance(event, dict):
+        return event.get(name)
+    return getattr(event, name, None)
+
+
+class _Dictionary:
+    """Maps strings to dense integer codes and back."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def most_common(counts: Mapping[str, int]) -> Optional[Tuple[str, int]]:
+    """The value with the highest count; ties go to the lowest value, so the
+    answer doesn't depend on insertion order (which archiving changes)."""
+    if not counts:
+        return None
+    return min(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+class RepoSnapshot:
+    """In-memory structure built from `Repo.list()` and kept current by the
+    repo's write listener (`apply`). Subclasses implement `_clear`, `_append`
+    and `_remove`, and may load a subset of events by overriding `_load`."""
+
+    def __init__(self, max_age: float = 0):
+        # max_age > 0 reloads a snapshot older than that many seconds, for
+        # deployments where other workers write to the same database.
+        self.max_age = max_age
+        self._lock = asyncio.Lock()
+        self._loading = False
+        self._pending: List[Tuple[Sequence[Any], Sequence[str]]] = []
+        self.loaded_at: Optional[float] = None
+        self._clear()
+
+    async def ensure_loaded(self, repo):
+        if self.loaded_at is not None and not self._expired():
+            return
+        async with self._lock:
+            if self.loaded_at is not None and not self._expired():
+                return
+            # Writes committed while list() runs may or may not be in the
+            # snapshot; replaying them afterwards is harmless (upsert/delete by id).
+            self._loading = True
+            try:
+                events = await self._load(repo)
+            finally:
+                self._loading = False
+                pending, self._pending = self._pending, []
+            self._clear()
+            for event in events:
+                self._append(event)
+            self.loaded_at = time.monotonic()
+            for upserts, deletes in pending:
+                self.apply(upserts, deletes)
+
+    async def _load(self, repo) -> List[Any]:
+        """Events to build the snapshot from (all of them by default)."""
+        return await repo.list()
+
+    def _expired(self) -> bool:
+        return self.max_age > 0 and time.monotonic() - self.loaded_at > self.max_age
+
+    def apply(self, upserts: Sequence[Any] = (), deletes: Sequence[str] = ()):
+        """Repo write listener: `upserts` are written events, `deletes` removed ids."""
+        if self._loading:
+            self._pending.append((list(upserts), list(deletes)))
+            return
+        if self.loaded_at is None:
+            return  # nothing built yet; the first query loads a fresh snapshot
+        for event_id in deletes:
+            self._remove(event_id)
+        for event in upserts:
+            self._remove(event_field(event, "id"))
+            self._append(event)
+        self._applied()
+
+    def _applied(self):
+        """Hook run after each batch of writes."""
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _append(self, event: Any):
+        raise NotImplementedError
+
+    def _remove(self, event_id: Optional[str]):
+        raise NotImplementedError
+
+
+class EventIndex(RepoSnapshot):
+    def _clear(self):
+        self.ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self.alive = array("b")
+        self.date_ts = array("q")
+        self.created_ts = array("q")
+        self.location = array("i")
+        self.perf_row = array("i")
+        self.perf_code = array("i")
+        self.locations = _Dictionary()
+        self.performers = _Dictionary()
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # -----------------------------------------------------
+    # Incremental maintenance
+    # -----------------------------------------------------
+
+    def _applied(self):
+        if self.dead >= _COMPACT_MIN_DEAD and self.dead > len(self._row_of):
+            self._compact()
+
+    def _append(self, event: Any):
+        row = len(self.ids)
+        self.ids.append(event_field(event, "id"))
+        self._row_of[self.ids[row]] = row
+        self.alive.append(1)
+        self.date_ts.append(to_timestamp(event_field(event, "date")))
+        self.created_ts.append(to_timestamp(event_field(event, "created_at")))
+        self.location.append(self.locations.encode(event_field(event, "location") or ""))
+        performers = event_field(event, "performers") or []
+        if isinstance(performers, str):
+            performers = performers.split(",")
+        for performer in performers:
+            if performer and performer.strip():
+                self.perf_row.append(row)
+                self.perf_code.append(self.performers.encode(performer.strip()))
+
+    def _remove(self, event_id: Optional[str]):
+        row = self._row_of.pop(event_id, None)
+        if row is not None:
+            self.alive[row] = 0
+            self.dead += 1
+
+    def _compact(self):
+        keep = [row for row in range(len(self.ids)) if self.alive[row]]
+        new_row = {old: new for new, old in enumerate(keep)}
+        self.ids = [self.ids[row] for row in keep]
+        self._row_of = {event_id: row for row, event_id in enumerate(self.ids)}
+        self.alive = array("b", [1] * len(keep))
+        self.date_ts = array("q", (self.date_ts[row] for row in keep))
+        self.created_ts = array("q", (self.created_ts[row] for row in keep))
+        self.location = array("i", (self.location[row] for row in keep))
+        pairs = [
+            (new_row[row], code)
+            for row, code in zip(self.perf_row, self.perf_code)
+            if row in new_row
+        ]
+        self.perf_row = array("i", (row for row, _ in pairs))
+        self.perf_code = array("i", (code for _, code in pairs))
+        self.dead = 0
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+
+    def ids_with_date_between(self, start: int, end: int) -> List[str]:
+        """Events whose `date` falls in [start, end)."""
+        if np is not None:
+            date_ts = np.frombuffer(self.date_ts, dtype=np.int64)
+            alive = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+            rows = np.flatnonzero(alive & (date_ts >= start) & (date_ts < end))
+            return [self.ids[row] for row in rows]
+        return [
+            self.ids[row]
+            for row, ts in enumerate(self.date_ts)
+            if self.alive[row] and start <= ts < end
+        ]
+
+    def ids_since(self, cutoff: int) -> List[str]:
+        """Events whose `created_at` or `date` is at or after `cutoff`."""
+        if np is not None:
+            latest = np.maximum(
+                np.frombuffer(self.date_ts, dtype=np.int64),
+                np.frombuffer(self.created_ts, dtype=np.int64),
+            )
+            alive = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+            return [self.ids[row] for row in np.flatnonzero(alive & (latest >= cutoff))]
+        return [
+            self.ids[row]
+            for row in range(len(self.ids))
+            if self.alive[row] and max(self.date_ts[row], self.created_ts[row]) >= cutoff
+        ]
+
+    def latest_id(self) -> Optional[str]:
+        """Most recently added event: by `created_at`, else by `date`."""
+        if not self._row_of:
+            return None
+        if np is not None:
+            created = np.frombuffer(self.created_ts, dtype=np.int64)
+            recency = np.where(
+                created != NO_TIME, created, np.frombuffer(self.date_ts, dtype=np.int64)
+            )
+            alive = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+            recency = np.where(alive, recency, NO_TIME)
+            return self.ids[int(np.argmax(recency))]
+        best_row, best = None, None
+        for row in range(len(self.ids)):
+            if not self.alive[row]:
+                continue
+            created = self.created_ts[row]
+            recency = created if created != NO_TIME else self.date_ts[row]
+            if best is None or recency > best:
+                best_row, best = row, recency
+        return self.ids[best_row]
+
+    def top_location(
+        self, date_before: Optional[int] = None, extra: Optional[Dict[str, int]] = None
+    ) -> Optional[Tuple[str, int]]:
+        """Most common non-empty location, optionally among events dated before a
+        time; `extra` adds counts from outside the index (archived events)."""
+        if np is not None:
+            mask = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+            if date_before is not None:
+                date_ts = np.frombuffer(self.date_ts, dtype=np.int64)
+                mask &= (date_ts != NO_TIME) & (date_ts < date_before)
+            codes = np.frombuffer(self.location, dtype=np.int32)[mask]
+            return self._top_code(codes, self.locations, skip_empty=True, extra=extra)
+        rows = (
+            row for row in range(len(self.ids))
+            if self.alive[row]
+            and (
+                date_before is None
+                or (self.date_ts[row] != NO_TIME and self.date_ts[row] < date_before)
+            )
+        )
+        return self._top_counter(
+            (self.location[row] for row in rows), self.locations, skip_empty=True, extra=extra
+        )
+
+    def top_performer(self, extra: Optional[Dict[str, int]] = None) -> Optional[Tuple[str, int]]:
+        if np is not None:
+            rows = np.frombuffer(self.perf_row, dtype=np.int32)
+            alive = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+            codes = np.frombuffer(self.perf_code, dtype=np.int32)[alive[rows]]
+            return self._top_code(codes, self.performers, extra=extra)
+        codes = (code for row, code in zip(self.perf_row, self.perf_code) if self.alive[row])
+        return self._top_counter(codes, self.performers, extra=extra)
+
+    @staticmethod
+    def _top_code(codes, dictionary: _Dictionary, skip_empty: bool = False, extra=None):
+        counts = np.bincount(codes, minlength=len(dictionary.values))
+        if skip_empty and "" in dictionary._codes:
+            counts[dictionary._codes[""]] = 0
+        if extra:
+            return EventIndex._top_merged(
+                ((code, int(count)) for code, count in enumerate(counts) if count), dictionary, extra
+            )
+        if not len(counts) or counts.max() == 0:
+            return None
+        best = np.flatnonzero(counts == counts.max())
+        return most_common({dictionary.values[code]: int(counts[code]) for code in best})
+
+    @staticmethod
+    def _top_counter(codes: Iterable[int], dictionary: _Dictionary, skip_empty: bool = False, extra=None):
+        counts = Counter(codes)
+        if skip_empty:
+            counts.pop(dictionary._codes.get(""), None)
+        if extra:
+            return EventIndex._top_merged(counts.items(), dictionary, extra)
+        return most_common({dictionary.values[code]: count for code, count in counts.items()})
+
+    @staticmethod
+    def _top_merged(code_counts: Iterable[Tuple[int, int]], dictionary: _Dictionary, extra: Dict[str, int]):
+        merged = Counter({dictionary.values[code]: count for code, count in code_counts})
+        merged.update(extra)
+        return most_common(+merged)
@@ -0,0 +1,236 @@
+"""Fuzzy matching for event titles and locations.
+
+Strings are normalized (lowercase, punctuation folded to spaces) and split
+into words. Each query word is matched against the vocabulary of indexed
+words by the Dice coefficient of their pg_trgm-style trigrams (each word
+padded as "  word "), plus a bonus for prefixes, so "nite" finds "night"
+and "fest" finds "festival". A title then scores
+2 * (sum of its matched words' similarities) / (query words + title words),
+so "diwali nite" ranks "Diwali Night" above "Diwali Night Market".
+
+Searching intersects the title sets of the matched words, best word
+combination first, and walks titles from shortest to longest, stopping as
+soon as nothing left can beat the current top `limit`. Those are C-level set
+operations, so a query costs about the same on 100k events as on 1k even
+when every title shares the same few words.
+
+Each distinct normalized string is indexed once and maps to the events that
+carry it. The index lives in memory, is built from `Repo.list()` on first
+use and is kept in sync by the repo's write listener (see `RepoSnapshot`).
+"""
+import math
+import re
+from heapq import heappush, heapreplace, nlargest
+from itertools import product
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from constants import FUZZY_MIN_SCORE
+from repos.event_index import RepoSnapshot, event_field
+
+# Other names for the same place; a query matching one also searches the others.
+LOCATION_ALIASES = (
+    ("bangalore", "bengaluru"),
+    ("mumbai", "bombay"),
+    ("chennai", "madras"),
+    ("kolkata", "calcutta"),
+    ("gurugram", "gurgaon"),
+    ("puducherry", "pondicherry"),
+    ("thiruvananthapuram", "trivandrum"),
+    ("kochi", "cochin"),
+    ("mysuru", "mysore"),
+    ("varanasi", "benares", "banaras"),
+    ("vadodara", "baroda"),
+    ("delhi", "new delhi"),
+)
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    return _NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+_MIN_WORD_SIMILARITY = 0.3
+_WORDS_PER_TERM = 3  # vocabulary words tried per query word
+_MAX_QUERY_TERMS = 5
+
+
+class FuzzyIndex:
+    """Fuzzy lookup from strings to the ids of the documents carrying them."""
+
+    def __init__(self):
+        self._sid_of: Dict[str, int] = {}  # normalized text -> string id
+        self._text: List[Optional[str]] = []  # display form (first seen), None once unused
+        self._words: List[Tuple[str, ...]] = []  # distinct words of each string
+        self._docs: List[Set[str]] = []
+        self._sid_of_doc: Dict[str, int] = {}
+        self._sids_of_word: Dict[str, Set[int]] = {}
+        self._sids_by_length: Dict[int, Set[int]] = {}  # word count -> strings
+        self._word_grams: Dict[str, FrozenSet[str]] = {}
+        self._words_of_gram: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sid_of_doc)
+
+    def add(self, doc_id: str, text: Optional[str]):
+        key = normalize(text)
+        if not key:
+            return
+        sid = self._sid_of.get(key)
+        if sid is None:
+            sid = self._sid_of[key] = len(self._text)
+            words = tuple(dict.fromkeys(key.split()))
+            self._text.append(text.strip())
+            self._words.append(words)
+            self._docs.append(set())
+            self._sids_by_length.setdefault(len(words), set()).add(sid)
+            for word in words:
+                if word not in self._sids_of_word:
+                    self._sids_of_word[word] = set()
+                    self._word_grams[word] = trigrams(word)
+                    for gram in self._word_grams[word]:
+                        self._words_of_gram.setdefault(gram, set()).add(word)
+                self._sids_of_word[word].add(sid)
+        self._docs[sid].add(doc_id)
+        self._sid_of_doc[doc_id] = sid
+
+    def remove(self, doc_id: str):
+        sid = self._sid_of_doc.pop(doc_id, None)
+        if sid is None:
+            return
+        docs = self._docs[sid]
+        docs.discard(doc_id)
+        if docs:
+            return
+        words = self._words[sid]
+        self._sids_by_length[len(words)].discard(sid)
+        for word in words:
+            sids = self._sids_of_word[word]
+            sids.discard(sid)
+            if not sids:
+                del self._sids_of_word[word]
+                for gram in self._word_grams.pop(word):
+                    self._words_of_gram[gram].discard(word)
+                    if not self._words_of_gram[gram]:
+                        del self._words_of_gram[gram]
+        del self._sid_of[normalize(self._text[sid])]
+        self._text[sid] = None
+        self._words[sid] = ()
+
+    def _similar_words(self, term: str) -> List[Tuple[float, str]]:
+        """Up to _WORDS_PER_TERM (similarity, vocabulary word), best first."""
+        grams = trigrams(term)
+        size = len(grams)
+        # A word with Dice >= _MIN_WORD_SIMILARITY shares at least `required`
+        # trigrams, so it appears in one of the (size - required + 1) rarest postings.
+        required = max(1, math.ceil(_MIN_WORD_SIMILARITY * size / (2 - _MIN_WORD_SIMILARITY)))
+        postings = sorted((self._words_of_gram.get(gram, ()) for gram in grams), key=len)
+        scored = []
+        for word in set().union(*postings[:size - required + 1]):
+            word_grams = self._word_grams[word]
+            similarity = 2 * len(grams & word_grams) / (size + len(word_grams))
+            if len(term) >= 3 and word.startswith(term):
+                similarity = max(similarity, 0.5 + 0.5 * len(term) / len(word))
+            if similarity >= _MIN_WORD_SIMILARITY:
+                scored.append((similarity, word))
+        return nlargest(_WORDS_PER_TERM, scored)
+
+    def search(
+        self, query: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE
+    ) -> List[Tuple[str, float, Set[str]]]:
+        """Return up to `limit` (text, score, doc ids), best first.
+
+        The doc id sets are the index's own; callers must not modify them.
+        """
+        terms = list(dict.fromkeys(normalize(query).split()))[:_MAX_QUERY_TERMS]
+        if not terms or not self._sids_by_length:
+            return []
+        # Every way of matching each query word to a similar word (or to
+        # nothing), best total similarity first.
+        options = [self._similar_words(term) + [(0.0, None)] for term in terms]
+        combos = sorted(
+            (
+                (sum(similarity for similarity, _ in combo), [word for _, word in combo if word])
+                for combo in product(*options)
+            ),
+            key=lambda combo: -combo[0],
+        )
+        lengths = sorted(length for length, sids in self._sids_by_length.items() if sids)
+        best: List[Tuple[float, int]] = []  # min-heap of the top `limit`
+        seen: Set[int] = set()
+
+        def floor() -> float:
+            return best[0][0] if len(best) >= limit else min_score
+
+        for total, words in combos:
+            if not words or 2 * total / (len(terms) + lengths[0]) < floor():
+                break  # later combinations score lower still
+            word_sets = sorted((self._sids_of_word[word] for word in words), key=len)
+            candidates = word_sets[0].intersection(*word_sets[1:])
+            for length in lengths:
+                score = 2 * total / (len(terms) + length)
+                if score < floor() or (len(best) >= limit and score <= best[0][0]):
+                    break
+                # A string seen under an earlier combination already got its best score.
+                for sid in candidates & self._sids_by_length[length]:
+                    if sid in seen:
+                        continue
+                    seen.add(sid)
+                    if len(best) < limit:
+                        heappush(best, (score, sid))
+                    elif score > best[0][0]:
+                        heapreplace(best, (score, sid))
+                    else:
+                        break
+        return [
+            (self._text[sid], round(min(score, 1.0), 3), self._docs[sid])
+            for score, sid in sorted(best, reverse=True)
+        ]
+
+
+class EventTextIndex(RepoSnapshot):
+    """Fuzzy indexes over event titles and locations."""
+
+    def _clear(self):
+        self.titles = FuzzyIndex()
+        self.locations = FuzzyIndex()
+
+    def _append(self, event: Any):
+        event_id = event_field(event, "id")
+        self.titles.add(event_id, event_field(event, "title"))
+        self.locations.add(event_id, event_field(event, "location"))
+
+    def _remove(self, event_id: Optional[str]):
+        self.titles.remove(event_id)
+        self.locations.remove(event_id)
+
+    def search_locations(
+        self, query: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE
+    ) -> List[Tuple[str, float, Set[str]]]:
+        """Like FuzzyIndex.search, also trying known aliases of the query."""
+        key = normalize(query)
+        queries = [query]
+        for group in LOCATION_ALIASES:
+            if key in group:
+                queries.extend(name for name in group if name != key)
+        best: Dict[str, Tuple[str, float, Set[str]]] = {}
+        for candidate in queries:
+            for text, score, docs in self.locations.search(candidate, limit, min_score):
+                if text not in best or score > best[text][1]:
+                    best[text] = (text, score, docs)
+        return sorted(best.values(), key=lambda hit: -hit[1])[:limit]
+
+
+class ArchivedTextIndex(EventTextIndex):
+    """EventTextIndex over the archive table; fed by `Repo.add_archive_listener`."""
+
+    async def _load(self, repo) -> List[Any]:
+        return await repo.list_archived()
@@ -0,0 +1,73 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from constants import IDEMPOTENCY_KEY_TTL_HOURS, IDEMPOTENCY_TABLE_NAME
+
+# Helpers used *inside* write-queue jobs, so the key check, the insert it
+# guards and the stored response commit (or roll back) together.
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request payload."""
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+async def ensure_table(db):
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {IDEMPOTENCY_TABLE_NAME} (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (scope, key)
+        )
+    """
+    )
+
+
+def _cutoff() -> str:
+    return (datetime.now() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)).isoformat()
+
+
+async def replay(db, scope: str, key: str, request_fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Return the stored response for a live key, or None if the key is new."""
+    cursor = await db.execute(
+        f"""
+        SELECT fingerprint, response FROM {IDEMPOTENCY_TABLE_NAME}
+        WHERE scope = ? AND key = ? AND created_at >= ?
+    """,
+        (scope, key, _cutoff()),
+    )
+    row = await cursor.fetchone()
+    if not row:
+        return None
+    if row[0] != request_fingerprint:
+        raise IdempotencyKeyReused(key)
+    return json.loads(row[1])
+
+
+async def remember(db, scope: str, key: str, request_fingerprint: str, response: Dict[str, Any]):
+    await db.execute(
+        f"""
+        INSERT OR REPLACE INTO {IDEMPOTENCY_TABLE_NAME} (scope, key, fingerprint, response, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        (scope, key, request_fingerprint, json.dumps(response, default=str), datetime.now().isoformat()),
+    )
+
+
+async def purge_expired(db) -> int:
+    before = db.total_changes
+    await db.execute(
+        f"DELETE FROM {IDEMPOTENCY_TABLE_NAME} WHERE created_at < ?", (_cutoff(),)
+    )
+    return db.total_changes - before
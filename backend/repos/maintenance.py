@@ -0,0 +1,231 @@
+"""Periodic SQLite housekeeping for the events database.
+
+Each run does, in order:
+
+- reconcile: repair event_performers / event_history rows that disagree
+  with the tables they are derived from (`Repo.reconcile_aggregates`)
+- purge_idempotency: drop expired Idempotency-Key records
+- optimize: refresh the planner statistics (`PRAGMA optimize`, or a
+  size-limited `ANALYZE` on SQLite < 3.46, whose optimize only considers
+  tables the same connection has queried)
+- incremental_vacuum: hand up to MAINTENANCE_VACUUM_PAGES free pages back to
+  the filesystem (files created before auto_vacuum was enabled need one
+  `--full-vacuum` first)
+- checkpoint: copy the WAL back into the database (PASSIVE, never waits on
+  readers or the writer)
+
+`Maintenance` runs this from the app lifespan every MAINTENANCE_INTERVAL_S,
+inside MAINTENANCE_WINDOW when one is set, and keeps per-task timings and
+pages-reclaimed counts. To run it by hand (from `backend/`):
+
+    python -m repos.maintenance [--task optimize --task checkpoint] [--full-vacuum]
+"""
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from datetime import time as clock
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from constants import DB_NAME, MAINTENANCE_INTERVAL_S, MAINTENANCE_VACUUM_PAGES, MAINTENANCE_WINDOW
+from repos import idempotency
+from repos.db import connect
+from repos.repo import Repo
+
+logger = logging.getLogger(__name__)
+
+TASKS = ("reconcile", "purge_idempotency", "optimize", "incremental_vacuum", "checkpoint")
+
+# Rows ANALYZE samples per index; keeps a statistics refresh to milliseconds.
+_ANALYSIS_LIMIT = 400
+
+
+def parse_window(text: str) -> Optional[Tuple[clock, clock]]:
+    """Parse "HH:MM-HH:MM"; an empty string means no window (always allowed)."""
+    if not text.strip():
+        return None
+    try:
+        start, end = (clock.fromisoformat(part.strip()) for part in text.split("-"))
+    except ValueError as exc:
+        raise ValueError(f"MAINTENANCE_WINDOW must look like 02:00-05:00, got {text!r}") from exc
+    return start, end
+
+
+def in_window(window: Optional[Tuple[clock, clock]], now: Optional[datetime] = None) -> bool:
+    if window is None:
+        return True
+    current = (now or datetime.now()).time()
+    start, end = window
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end  # wraps past midnight
+
+
+async def _pragma(db, name: str) -> int:
+    cursor = await db.execute(f"PRAGMA {name}")
+    return (await cursor.fetchone())[0]
+
+
+async def optimize(db_path: str) -> Dict[str, Any]:
+    async with connect(db_path) as db:
+        if sqlite3.sqlite_version_info >= (3, 46):
+            statement = "PRAGMA optimize = 0x10002"  # every table that needs it
+        else:
+            statement = "ANALYZE"
+        await db.executescript(f"PRAGMA analysis_limit = {_ANALYSIS_LIMIT}; {statement};")
+    return {"statement": statement}
+
+
+async def incremental_vacuum(db_path: str, pages: int = MAINTENANCE_VACUUM_PAGES) -> Dict[str, Any]:
+    async with connect(db_path) as db:
+        if await _pragma(db, "auto_vacuum") != 2:  # 2 = INCREMENTAL
+            return {
+                "pages_reclaimed": 0,
+                "free_pages": await _pragma(db, "freelist_count"),
+                "skipped": "auto_vacuum is off (run --full-vacuum once)",
+            }
+        before = await _pragma(db, "freelist_count")
+        # executescript steps the pragma to completion; execute() would free one page.
+        await db.executescript(f"PRAGMA incremental_vacuum({pages if pages > 0 else ''});")
+        after = await _pragma(db, "freelist_count")
+        page_size = await _pragma(db, "page_size")
+    return {
+        "pages_reclaimed": before - after,
+        "bytes_reclaimed": (before - after) * page_size,
+        "free_pages": after,
+    }
+
+
+async def checkpoint(db_path: str, mode: str = "PASSIVE") -> Dict[str, Any]:
+    async with connect(db_path) as db:
+        cursor = await db.execute(f"PRAGMA wal_checkpoint({mode})")
+        busy, wal_pages, checkpointed = await cursor.fetchone()
+    return {"mode": mode, "busy": bool(busy), "wal_pages": wal_pages, "checkpointed_pages": checkpointed}
+
+
+async def full_vacuum(db_path: str) -> Dict[str, Any]:
+    """Rewrite the whole file, turning on incremental auto_vacuum for older
+    databases. Blocks writers while it runs; meant for the CLI."""
+    async with connect(db_path) as db:
+        before = await _pragma(db, "page_count")
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.executescript("VACUUM;")
+        after = await _pragma(db, "page_count")
+    return {"pages_reclaimed": before - after, "page_count": after}
+
+
+class Maintenance:
+    """Runs the maintenance tasks for one repo's database on a schedule."""
+
+    def __init__(
+        self,
+        repo: Repo,
+        interval_s: float = MAINTENANCE_INTERVAL_S,
+        window: str = MAINTENANCE_WINDOW,
+        vacuum_pages: int = MAINTENANCE_VACUUM_PAGES,
+        checkpoint_mode: str = "PASSIVE",
+    ):
+        self.repo = repo
+        self.interval_s = interval_s
+        self.window = parse_window(window)
+        self.vacuum_pages = vacuum_pages
+        self.checkpoint_mode = checkpoint_mode
+        self.runs = 0
+        self.skipped = 0  # scheduled runs that fell outside the window
+        self.seconds = 0.0  # total time spent in maintenance
+        self.pages_reclaimed = 0
+        self.last_run_at: Optional[str] = None
+        self.last_report: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_task(self, name: str) -> Dict[str, Any]:
+        db_path = self.repo.db_path
+        if name == "reconcile":
+            return {"rewritten": await self.repo.reconcile_aggregates()}
+        if name == "purge_idempotency":
+            return {"purged": await self.repo.writes.submit(idempotency.purge_expired)}
+        if name == "optimize":
+            return await optimize(db_path)
+        if name == "incremental_vacuum":
+            return await incremental_vacuum(db_path, self.vacuum_pages)
+        if name == "checkpoint":
+            return await checkpoint(db_path, self.checkpoint_mode)
+        raise ValueError(f"Unknown maintenance task {name!r}")
+
+    async def run(self, tasks: Sequence[str] = TASKS) -> Dict[str, Dict[str, Any]]:
+        """Run `tasks` now and return {task: result with "seconds"}.
+
+        A failing task is reported with its error and doesn't stop the rest.
+        """
+        await self.repo.init_db()
+        report: Dict[str, Dict[str, Any]] = {}
+        for name in tasks:
+            start = time.perf_counter()
+            try:
+                result = await self._run_task(name)
+            except (sqlite3.Error, ValueError) as exc:
+                result = {"error": str(exc)}
+            result["seconds"] = round(time.perf_counter() - start, 4)
+            self.seconds += result["seconds"]
+            self.pages_reclaimed += result.get("pages_reclaimed", 0)
+            report[name] = result
+        self.runs += 1
+        self.last_run_at = datetime.now().isoformat()
+        self.last_report = report
+        logger.info("Database maintenance: %s", report)
+        return report
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_s)
+            if not in_window(self.window):
+                self.skipped += 1
+                continue
+            try:
+                await self.run()
+            except Exception:
+                logger.exception("Database maintenance failed")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+async def main(args):
+    repo = Repo(args.db)
+    try:
+        report = {}
+        if args.full_vacuum:
+            start = time.perf_counter()
+            report["full_vacuum"] = await full_vacuum(args.db)
+            report["full_vacuum"]["seconds"] = round(time.perf_counter() - start, 4)
+        maintenance = Maintenance(
+            repo, vacuum_pages=args.vacuum_pages, checkpoint_mode=args.checkpoint_mode
+        )
+        report.update(await maintenance.run(args.task or TASKS))
+    finally:
+        await repo.writes.close()
+    for name, result in report.items():
+        print(f"{name:<18} {result}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run database maintenance now.")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--task", action="append", choices=TASKS, help="repeatable; default: all")
+    parser.add_argument("--vacuum-pages", type=int, default=MAINTENANCE_VACUUM_PAGES)
+    parser.add_argument("--checkpoint-mode", default="PASSIVE", choices=("PASSIVE", "FULL", "RESTART", "TRUNCATE"))
+    parser.add_argument("--full-vacuum", action="store_true", help="rewrite the file (blocks writers)")
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
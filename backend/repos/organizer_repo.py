@@ -1,16 +1,108 @@
-import aiosqlite
-from typing import List, Optional
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from constants import DB_NAME, ORGANIZER_TABLE_NAME
+from constants import CULTURAL_CATEGORY, DB_NAME, EVENTS_ARCHIVE_TABLE_NAME, ORGANIZER_TABLE_NAME, TABLE_NAME
 from models.data_models import Organizer
+from repos.dates import year_bounds
+from repos import archive, idempotency
+from repos.db import configure_database, connect, get_write_queue, read_connection
+from repos.repo import Repo, chunked, placeholders
+
+# Organizer statistics are aggregated from the events linked through
+# events.organizer_id (indexed on (organizer_id, starts_at) and
+# (category, organizer_id)) instead of the hand-entered counter columns.
+# Archived events count too: each table is aggregated on its own indexes
+# and the counts added up (see repos/archive.py).
+STATS_YEAR = 2025  # backs the `events_2025` field kept for API compatibility
+
+_ORGANIZER_SELECT = f"""
+    SELECT o.organizer_id, o.name, o.company, o.region, o.experience, o.version,
+           COUNT(e.id) AS managed_events,
+           COUNT(CASE WHEN e.category = ? THEN 1 END) AS cultural_events,
+           COUNT(CASE WHEN e.starts_at >= ? AND e.starts_at < ? THEN 1 END) AS events_in_year
+    FROM {ORGANIZER_TABLE_NAME} o
+    LEFT JOIN {TABLE_NAME} e ON e.organizer_id = o.organizer_id
+"""
+
+
+def _stats_params() -> Tuple[str, str, str]:
+    return (CULTURAL_CATEGORY, *year_bounds(STATS_YEAR))
+
+
+_EVENT_STATS_SELECT = """
+    SELECT organizer_id, COUNT(*),
+           COUNT(CASE WHEN category = ? THEN 1 END),
+           COUNT(CASE WHEN starts_at >= ? AND starts_at < ? THEN 1 END)
+    FROM {table}
+    WHERE organizer_id IS NOT NULL
+"""
+
+
+async def _event_tables(db) -> Tuple[str, ...]:
+    """The tables holding events to count: `events`, plus the archive once used."""
+    if await archive.has_archived(db):
+        return TABLE_NAME, EVENTS_ARCHIVE_TABLE_NAME
+    return (TABLE_NAME,)
+
+
+async def _table_stats(
+    db, table: str, organizer_ids: Optional[Sequence[str]], year: int
+) -> Dict[str, Tuple[int, int, int]]:
+    sql = _EVENT_STATS_SELECT.format(table=table)
+    params = (CULTURAL_CATEGORY, *year_bounds(year))
+    if organizer_ids is None:
+        cursor = await db.execute(f"{sql} GROUP BY organizer_id", params)
+        rows = await cursor.fetchall()
+    else:
+        rows = []
+        for chunk in chunked(list(dict.fromkeys(organizer_ids))):
+            cursor = await db.execute(
+                f"{sql} AND organizer_id IN ({placeholders(len(chunk))}) GROUP BY organizer_id",
+                (*params, *chunk),
+            )
+            rows.extend(await cursor.fetchall())
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+async def _archived_stats(db, organizer_ids: Optional[Sequence[str]]) -> Dict[str, Tuple[int, int, int]]:
+    """(managed, cultural, in STATS_YEAR) over archived events, to add to _ORGANIZER_SELECT's."""
+    if not await archive.has_archived(db):
+        return {}
+    return await _table_stats(db, EVENTS_ARCHIVE_TABLE_NAME, organizer_ids, STATS_YEAR)
+
+
+def _row_to_organizer(row, archived: Tuple[int, int, int] = (0, 0, 0)) -> Organizer:
+    return Organizer(
+        organizer_id=row[0],
+        name=row[1],
+        company=row[2],
+        region=row[3],
+        experience=row[4],
+        version=row[5],
+        managed_events=row[6] + archived[0],
+        cultural_events=row[7] + archived[1],
+        events_2025=row[8] + archived[2],
+    )
+
+# Columns a PATCH may touch
+PATCHABLE_FIELDS = ("name", "company", "region", "experience")
 
 
 class OrganizerRepo:
     def __init__(self, db_path: str = DB_NAME):
         self.db_path = db_path
+        self.writes = get_write_queue(db_path)
+        self._initialized = False
 
     async def init_db(self):
-        async with aiosqlite.connect(self.db_path) as db:
+        if self._initialized:
+            return
+        # Statistics join against events, so make sure that table exists too.
+        await Repo(self.db_path).init_db()
+        await configure_database(self.db_path)
+        async with connect(self.db_path) as db:
+            # managed_events/cultural_events/events_2025 are legacy columns;
+            # the values are now derived from linked events on read.
             await db.execute(
                 f"""
                 CREATE TABLE IF NOT EXISTS {ORGANIZER_TABLE_NAME} (
@@ -21,19 +113,47 @@ class OrganizerRepo:
                     experience INTEGER DEFAULT 0,
                     managed_events INTEGER DEFAULT 0,
                     cultural_events INTEGER DEFAULT 0,
-                    events_2025 INTEGER DEFAULT 0
+                    events_2025 INTEGER DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 1
                 )
             """
             )
+            cursor = await db.execute(f"PRAGMA table_info({ORGANIZER_TABLE_NAME})")
+            if "version" not in [row[1] for row in await cursor.fetchall()]:
+                await db.execute(
+                    f"ALTER TABLE {ORGANIZER_TABLE_NAME} "
+                    "ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+                )
+            await db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{ORGANIZER_TABLE_NAME}_company "
+                f"ON {ORGANIZER_TABLE_NAME}(company COLLATE NOCASE)"
+            )
             await db.commit()
+        self._initialized = True
+
+    async def insert(
+        self,
+        organizer: Organizer,
+        idempotency_key: Optional[str] = None,
+        request_fingerprint: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Single INSERT (duplicate ids raise IntegrityError); see Repo.insert."""
+        # Stats are derived from linked events; a new organizer has none yet.
+        result = organizer.model_dump()
+        result.update(managed_events=0, cultural_events=0, events_2025=0, version=1)
 
-    async def insert(self, organizer: Organizer):
-        async with aiosqlite.connect(self.db_path) as db:
+        async def _insert(db):
+            if idempotency_key:
+                previous = await idempotency.replay(
+                    db, ORGANIZER_TABLE_NAME, idempotency_key, request_fingerprint or ""
+                )
+                if previous is not None:
+                    return previous
             await db.execute(
                 f"""
                 INSERT INTO {ORGANIZER_TABLE_NAME}
-                    (organizer_id, name, company, region, experience, managed_events, cultural_events, events_2025)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    (organizer_id, name, company, region, experience)
+                VALUES (?, ?, ?, ?, ?)
             """,
                 (
                     organizer.organizer_id,
@@ -41,143 +161,290 @@ class OrganizerRepo:
                     organizer.company,
                     organizer.region,
                     organizer.experience,
-                    organizer.managed_events,
-                    organizer.cultural_events,
-                    organizer.events_2025,
                 ),
             )
-            await db.commit()
+            if idempotency_key:
+                await idempotency.remember(
+                    db, ORGANIZER_TABLE_NAME, idempotency_key, request_fingerprint or "", result
+                )
+            return result
+
+        return await self.writes.submit(_insert)
 
     async def list(self) -> List[Organizer]:
-        async with aiosqlite.connect(self.db_path) as db:
+        async with read_connection(self.db_path) as db:
             cursor = await db.execute(
-                f"""
-                SELECT organizer_id, name, company, region, experience, managed_events, cultural_events, events_2025
-                FROM {ORGANIZER_TABLE_NAME}
-            """
+                f"{_ORGANIZER_SELECT} GROUP BY o.organizer_id", _stats_params()
             )
             rows = await cursor.fetchall()
-            return [
-                Organizer(
-                    organizer_id=row[0],
-                    name=row[1],
-                    company=row[2],
-                    region=row[3],
-                    experience=row[4],
-                    managed_events=row[5],
-                    cultural_events=row[6],
-                    events_2025=row[7],
-                )
-                for row in rows
-            ]
+            archived = await _archived_stats(db, None)
+            return [_row_to_organizer(row, archived.get(row[0], (0, 0, 0))) for row in rows]
 
     async def get(self, organizer_id: str) -> Optional[Organizer]:
-        async with aiosqlite.connect(self.db_path) as db:
+        async with read_connection(self.db_path) as db:
             cursor = await db.execute(
-                f"""
-                SELECT organizer_id, name, company, region, experience, managed_events, cultural_events, events_2025
-                FROM {ORGANIZER_TABLE_NAME}
-                WHERE organizer_id = ?
-            """,
-                (organizer_id,),
+                f"{_ORGANIZER_SELECT} WHERE o.organizer_id = ? GROUP BY o.organizer_id",
+                (*_stats_params(), organizer_id),
             )
             row = await cursor.fetchone()
             if row:
-                return Organizer(
-                    organizer_id=row[0],
-                    name=row[1],
-                    company=row[2],
-                    region=row[3],
-                    experience=row[4],
-                    managed_events=row[5],
-                    cultural_events=row[6],
-                    events_2025=row[7],
-                )
+                archived = await _archived_stats(db, [organizer_id])
+                return _row_to_organizer(row, archived.get(organizer_id, (0, 0, 0)))
             return None
 
-    async def update(self, organizer: Organizer) -> bool:
-        async with aiosqlite.connect(self.db_path) as db:
-            before = db.total_changes
-            await db.execute(
-                f"""
-                UPDATE {ORGANIZER_TABLE_NAME}
-                SET name = ?, company = ?, region = ?, experience = ?, managed_events = ?, cultural_events = ?, events_2025 = ?
-                WHERE organizer_id = ?
-            """,
-                (
-                    organizer.name,
-                    organizer.company,
-                    organizer.region,
-                    organizer.experience,
-                    organizer.managed_events,
-                    organizer.cultural_events,
-                    organizer.events_2025,
-                    organizer.organizer_id,
-                ),
-            )
-            await db.commit()
-            return (db.total_changes - before) > 0
+    # See Repo._UPDATE_SQL: optional compare-and-swap on `version`.
+    _UPDATE_SQL = f"""
+        UPDATE {ORGANIZER_TABLE_NAME}
+        SET name = ?, company = ?, region = ?, experience = ?, version = version + 1
+        WHERE organizer_id = ? AND (? IS NULL OR version = ?)
+        RETURNING version
+    """
 
-    async def delete(self, organizer_id: str) -> int:
-        async with aiosqlite.connect(self.db_path) as db:
-            before = db.total_changes
-            await db.execute(
-                f"DELETE FROM {ORGANIZER_TABLE_NAME} WHERE organizer_id = ?",
-                (organizer_id,),
+    @staticmethod
+    def _update_params(organizer: Organizer, expected_version: Optional[int]) -> tuple:
+        return (
+            organizer.name,
+            organizer.company,
+            organizer.region,
+            organizer.experience,
+            organizer.organizer_id,
+            expected_version,
+            expected_version,
+        )
+
+    async def update(
+        self, organizer: Organizer, expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        """Return the new version, or None if no row matched (unknown id or stale version)."""
+        async def _update(db):
+            cursor = await db.execute(
+                self._UPDATE_SQL, self._update_params(organizer, expected_version)
             )
-            await db.commit()
-            return db.total_changes - before
+            row = await cursor.fetchone()
+            return row[0] if row else None
 
-    async def events_managed_by_company(self, company: str) -> int:
-        async with aiosqlite.connect(self.db_path) as db:
+        return await self.writes.submit(_update)
+
+    async def patch(
+        self, organizer_id: str, fields: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        """Update only the given columns; return the new version or None if no row matched."""
+        changes = {k: v for k, v in fields.items() if k in PATCHABLE_FIELDS}
+        assignments = "".join(f"{column} = ?, " for column in changes)
+
+        async def _patch(db):
             cursor = await db.execute(
                 f"""
-                SELECT COALESCE(SUM(managed_events), 0)
-                FROM {ORGANIZER_TABLE_NAME}
-                WHERE LOWER(company) = LOWER(?)
+                UPDATE {ORGANIZER_TABLE_NAME}
+                SET {assignments}version = version + 1
+                WHERE organizer_id = ? AND (? IS NULL OR version = ?)
+                RETURNING version
             """,
-                (company,),
+                (*changes.values(), organizer_id, expected_version, expected_version),
             )
             row = await cursor.fetchone()
-            return row[0] if row else 0
+            return row[0] if row else None
 
-    async def region_with_max_cultural_events(self) -> dict:
-        async with aiosqlite.connect(self.db_path) as db:
+        return await self.writes.submit(_patch)
+
+    async def delete(
+        self, organizer_id: str, expected_version: Optional[int] = None, detach: bool = True
+    ) -> int:
+        """Delete one organizer; with `expected_version`, only while it still
+        has that version (0 otherwise). `detach=False` keeps archived events
+        pointing at it (it is moving to another partition)."""
+        sql, params = f"DELETE FROM {ORGANIZER_TABLE_NAME} WHERE organizer_id = ?", [organizer_id]
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params.append(expected_version)
+
+        async def _delete(db):
+            before = db.total_changes
+            await db.execute(sql, params)
+            deleted = db.total_changes - before
+            if deleted and detach:
+                # events get ON DELETE SET NULL; the archive has no foreign key
+                await db.execute(
+                    f"UPDATE {EVENTS_ARCHIVE_TABLE_NAME} SET organizer_id = NULL WHERE organizer_id = ?",
+                    (organizer_id,),
+                )
+            return deleted
+
+        return await self.writes.submit(_delete)
+
+    # Batch operations: one connection / one transaction each
+
+    async def _existing_ids(self, db, organizer_ids: Sequence[str]) -> List[str]:
+        found = []
+        for chunk in chunked(organizer_ids):
             cursor = await db.execute(
+                f"SELECT organizer_id FROM {ORGANIZER_TABLE_NAME} "
+                f"WHERE organizer_id IN ({placeholders(len(chunk))})",
+                tuple(chunk),
+            )
+            found.extend(row[0] for row in await cursor.fetchall())
+        return found
+
+    async def known_ids(self, organizer_ids: Sequence[str]) -> List[str]:
+        """The given IDs that exist in the organizers table."""
+        async with read_connection(self.db_path) as db:
+            return await self._existing_ids(db, list(dict.fromkeys(organizer_ids)))
+
+    async def get_many(self, organizer_ids: Sequence[str]) -> List[Organizer]:
+        organizers: List[Organizer] = []
+        async with read_connection(self.db_path) as db:
+            for chunk in chunked(list(dict.fromkeys(organizer_ids))):
+                cursor = await db.execute(
+                    f"{_ORGANIZER_SELECT} WHERE o.organizer_id IN ({placeholders(len(chunk))}) "
+                    "GROUP BY o.organizer_id",
+                    (*_stats_params(), *chunk),
+                )
+                rows = await cursor.fetchall()
+                archived = await _archived_stats(db, chunk)
+                organizers.extend(_row_to_organizer(row, archived.get(row[0], (0, 0, 0))) for row in rows)
+        return organizers
+
+    async def update_many(self, organizers: Sequence[Organizer]) -> Dict[str, Any]:
+        """See Repo.update_many: {"updated": {id: new_version}, "conflicts": [ids]}."""
+        async def _update_many(db):
+            existing = set(await self._existing_ids(db, [o.organizer_id for o in organizers]))
+            updated: Dict[str, int] = {}
+            conflicts: List[str] = []
+            for organizer in organizers:
+                if organizer.organizer_id not in existing:
+                    continue
+                cursor = await db.execute(
+                    self._UPDATE_SQL, self._update_params(organizer, organizer.version)
+                )
+                row = await cursor.fetchone()
+                if row:
+                    updated[organizer.organizer_id] = row[0]
+                else:
+                    conflicts.append(organizer.organizer_id)
+            return {"updated": updated, "conflicts": conflicts}
+
+        return await self.writes.submit(_update_many)
+
+    async def delete_many(self, organizer_ids: Sequence[str]) -> List[str]:
+        ids = list(dict.fromkeys(organizer_ids))
+
+        async def _delete_many(db):
+            existing = await self._existing_ids(db, ids)
+            for chunk in chunked(existing):
+                await db.execute(
+                    f"DELETE FROM {ORGANIZER_TABLE_NAME} "
+                    f"WHERE organizer_id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+                await db.execute(
+                    f"UPDATE {EVENTS_ARCHIVE_TABLE_NAME} SET organizer_id = NULL "
+                    f"WHERE organizer_id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+            return existing
+
+        return await self.writes.submit(_delete_many)
+
+    async def import_organizers(self, organizers: Sequence[Organizer]) -> int:
+        """Write organizers exactly as given, `version` included, replacing rows
+        with the same id (see Repo.import_events)."""
+        async def _import(db):
+            await db.executemany(
                 f"""
-                SELECT region, SUM(cultural_events) as total_cultural
-                FROM {ORGANIZER_TABLE_NAME}
-                GROUP BY region
-                ORDER BY total_cultural DESC
-                LIMIT 1
-            """
+                INSERT INTO {ORGANIZER_TABLE_NAME}
+                    (organizer_id, name, company, region, experience, version)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(organizer_id) DO UPDATE SET
+                    name = excluded.name, company = excluded.company, region = excluded.region,
+                    experience = excluded.experience, version = excluded.version
+            """,
+                [
+                    (o.organizer_id, o.name, o.company, o.region, o.experience, o.version or 1)
+                    for o in organizers
+                ],
             )
-            row = await cursor.fetchone()
-            if not row:
-                return {"region": None, "cultural_events": 0}
-            return {"region": row[0], "cultural_events": row[1]}
+            return len(organizers)
+
+        return await self.writes.submit(_import)
 
-    async def top_organizer_2025(self) -> Optional[Organizer]:
-        async with aiosqlite.connect(self.db_path) as db:
+    async def directory(self) -> Dict[str, Tuple[str, str, str]]:
+        """organizer_id -> (name, company, region) for every organizer."""
+        async with read_connection(self.db_path) as db:
             cursor = await db.execute(
-                f"""
-                SELECT organizer_id, name, company, region, experience, managed_events, cultural_events, events_2025
-                FROM {ORGANIZER_TABLE_NAME}
-                ORDER BY events_2025 DESC
-                LIMIT 1
-            """
+                f"SELECT organizer_id, name, company, region FROM {ORGANIZER_TABLE_NAME}"
             )
-            row = await cursor.fetchone()
-            if row:
-                return Organizer(
-                    organizer_id=row[0],
-                    name=row[1],
-                    company=row[2],
-                    region=row[3],
-                    experience=row[4],
-                    managed_events=row[5],
-                    cultural_events=row[6],
-                    events_2025=row[7],
+            return {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+
+    async def event_stats(
+        self, organizer_ids: Optional[Sequence[str]] = None, year: int = STATS_YEAR
+    ) -> Dict[str, Tuple[int, int, int]]:
+        """organizer_id -> (managed, cultural, in `year`) counted over the events
+        in this file (archived ones included), whether or not the organizer row
+        is here too."""
+        stats: Dict[str, Tuple[int, int, int]] = {}
+        async with read_connection(self.db_path) as db:
+            for table in await _event_tables(db):
+                for organizer_id, counts in (await _table_stats(db, table, organizer_ids, year)).items():
+                    stats[organizer_id] = tuple(a + b for a, b in zip(stats.get(organizer_id, (0, 0, 0)), counts))
+        return stats
+
+    async def events_managed_by_company(self, company: str) -> int:
+        total = 0
+        async with read_connection(self.db_path) as db:
+            for table in await _event_tables(db):
+                cursor = await db.execute(
+                    f"""
+                    SELECT COUNT(e.id)
+                    FROM {ORGANIZER_TABLE_NAME} o
+                    JOIN {table} e ON e.organizer_id = o.organizer_id
+                    WHERE o.company = ? COLLATE NOCASE
+                """,
+                    (company,),
                 )
-            return None
+                row = await cursor.fetchone()
+                total += row[0] if row else 0
+        return total
 
+    async def region_with_max_cultural_events(self) -> dict:
+        by_region: Counter = Counter()
+        async with read_connection(self.db_path) as db:
+            for table in await _event_tables(db):
+                cursor = await db.execute(
+                    f"""
+                    SELECT o.region, COUNT(*)
+                    FROM {table} e
+                    JOIN {ORGANIZER_TABLE_NAME} o ON o.organizer_id = e.organizer_id
+                    WHERE e.category = ?
+                    GROUP BY o.region
+                """,
+                    (CULTURAL_CATEGORY,),
+                )
+                by_region.update(dict(await cursor.fetchall()))
+        if not by_region:
+            return {"region": None, "cultural_events": 0}
+        region, count = by_region.most_common(1)[0]
+        return {"region": region, "cultural_events": count}
+
+    async def top_organizer_for_year(self, year: int) -> Optional[Tuple[Organizer, int]]:
+        """Return the organizer with the most events dated in `year` and that count."""
+        start, end = year_bounds(year)
+        counts: Counter = Counter()
+        async with read_connection(self.db_path) as db:
+            for table in await _event_tables(db):
+                cursor = await db.execute(
+                    f"""
+                    SELECT organizer_id, COUNT(*)
+                    FROM {table}
+                    WHERE starts_at >= ? AND starts_at < ? AND organizer_id IS NOT NULL
+                    GROUP BY organizer_id
+                """,
+                    (start, end),
+                )
+                counts.update(dict(await cursor.fetchall()))
+        if not counts:
+            return None
+        organizer_id = min(counts, key=lambda oid: (-counts[oid], oid))  # ties: lowest id
+        organizer = await self.get(organizer_id)
+        if not organizer:
+            return None
+        return organizer, counts[organizer_id]
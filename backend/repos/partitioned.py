@@ -0,0 +1,975 @@
+"""Events and organizers split into one SQLite database per region.
+
+With PARTITION_BY_REGION=1 the Container builds a `PartitionedRepo` and a
+`PartitionedOrganizerRepo` instead of `Repo`/`OrganizerRepo`. They have the
+same methods, so the services, indexes and archiver don't know the
+difference. Each region gets `PARTITION_DIR/<region>.db` with the usual
+schema, its own write queue and read pool:
+
+- an event goes to the region its `location` maps to in PARTITION_REGIONS,
+  an organizer to its own `region`; anything unmapped goes to
+  PARTITION_DEFAULT.
+- Reads that name a location (upcoming events, analytics filtered by
+  location, a location's calendar feed) open that region's file only, plus
+  any file still holding that location's rows from an older
+  PARTITION_REGIONS (see `Partitions.strays`).
+- Everything else runs on every partition at once (`asyncio.gather` over
+  the per-file read pools) and the results are merged: lists are
+  concatenated, ordered reads k-way merged, counts added up, and distinct
+  counts recomputed from each partition's distinct (group, value) pairs.
+- Changing an event's location (or an organizer's region) to another
+  region moves the row: it is written to the new file with the next
+  version and then deleted from the old one, provided its version there is
+  still the one that was read (else the new copy is dropped and the write
+  reports a conflict). The two files commit separately; a crash in between
+  leaves the row in both, never in neither.
+
+Events and their organizer may live in different files, so the
+events -> organizers foreign key can't be declared there. It is checked
+here instead (an unknown organizer_id still raises IntegrityError, which the
+services turn into 422), deleting an organizer clears organizer_id on its
+events in every partition, and organizer statistics add up the events
+linked to each organizer across partitions.
+
+An existing single-file database is copied in with (from `backend/`, the
+backend stopped):
+
+    python -m repos.partitioned --import festiveconnect.db
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import re
+import sqlite3
+from collections import OrderedDict, defaultdict, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from constants import (
+    DATABASE_META_TABLE_NAME,
+    DB_NAME,
+    EVENT_HISTORY_TABLE_NAME,
+    EVENT_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_TABLE_NAME,
+    ORGANIZER_TABLE_NAME,
+    PARTITION_DEFAULT,
+    PARTITION_DIR,
+    PARTITION_REGIONS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    TABLE_NAME,
+)
+from models.data_models import AnalyticsQuery, CalendarBucket, Event, Organizer
+from repos.analytics import dimension_nocase
+from repos.dates import normalize_starts_at
+from repos.db import get_write_queue
+from repos.organizer_repo import STATS_YEAR, OrganizerRepo
+from repos.repo import MAX_IN_PARAMS, PATCHABLE_FIELDS, Repo, WriteListener
+
+_HOME_HINTS = 100_000  # id -> partition guesses kept per repo
+_MOVE_ATTEMPTS = 3  # tries for a move without an expected version that keeps losing races
+
+
+def partition_name(region: str) -> str:
+    """File-safe partition name for a region ("Tamil Nadu" -> "tamil-nadu")."""
+    return re.sub(r"[^a-z0-9]+", "-", (region or "").strip().lower()).strip("-")
+
+
+def parse_regions(spec: str) -> Dict[str, str]:
+    """Location (lowercased) -> partition, from "south=Bangalore,Chennai;west=Mumbai"."""
+    regions = {}
+    for entry in spec.split(";"):
+        region, _, locations = entry.partition("=")
+        name = partition_name(region)
+        if not name:
+            continue
+        for location in locations.split(","):
+            if location.strip():
+                regions[location.strip().lower()] = name
+    return regions
+
+
+class Partitions:
+    """The partition files: every region in `regions`, the default one and
+    any `*.db` already in `directory` (so data routed under an older map
+    stays visible).
+
+    `init_db` also notes locations whose rows sit outside the file they map
+    to now (`strays`), so reads naming such a location open those files
+    too. New writes always go to the mapped file, so the set only shrinks;
+    a location that has since moved costs an extra, empty read.
+    """
+
+    def __init__(
+        self,
+        directory: str = PARTITION_DIR,
+        regions: Union[str, Dict[str, str]] = PARTITION_REGIONS,
+        default: str = PARTITION_DEFAULT,
+    ):
+        self.directory = directory
+        self.by_location = parse_regions(regions) if isinstance(regions, str) else dict(regions)
+        self.default = partition_name(default) or "other"
+        names = {self.default, *self.by_location.values()}
+        if os.path.isdir(directory):
+            names.update(f[:-3] for f in os.listdir(directory) if f.endswith(".db"))
+        self.names = sorted(names)
+        self.events = {name: Repo(self.path(name), organizer_fk=False) for name in self.names}
+        self.organizers = {name: OrganizerRepo(self.path(name)) for name in self.names}
+        self.strays: Dict[str, List[str]] = {}  # location (lowercased) -> other files holding it
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.db")
+
+    def for_location(self, location: Optional[str]) -> str:
+        return self.by_location.get((location or "").strip().lower(), self.default)
+
+    def holding(self, location: str) -> List[str]:
+        """Partitions to read for `location`: its own, then any holding strays."""
+        return [self.for_location(location), *self.strays.get(location.strip().lower(), ())]
+
+    def for_region(self, region: Optional[str]) -> str:
+        name = partition_name(region or "")
+        return name if name in self.events else self.default
+
+    async def init_db(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+        async def init(name: str):
+            # Events first: OrganizerRepo.init_db would otherwise create the
+            # events table with the organizer foreign key.
+            await self.events[name].init_db()
+            await self.organizers[name].init_db()
+
+        await asyncio.gather(*(init(name) for name in self.names))
+        strays: Dict[str, List[str]] = defaultdict(list)
+        for name, locations in zip(self.names, await _gather(self.events[name].locations() for name in self.names)):
+            for location in locations:
+                if self.for_location(location) != name:
+                    strays[location.strip().lower()].append(name)
+        self.strays = dict(strays)
+
+    async def close(self):
+        await asyncio.gather(*(get_write_queue(self.path(name)).close() for name in self.names))
+
+
+async def _gather(calls: Iterable) -> List[Any]:
+    return list(await asyncio.gather(*calls))
+
+
+class _HomeHints:
+    """Bounded id -> partition map so single-row writes usually check one
+    partition before falling back to all of them."""
+
+    def __init__(self, size: int = _HOME_HINTS):
+        self.size = size
+        self._homes: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        return self._homes.get(key)
+
+    def put(self, key: str, name: str):
+        self._homes[key] = name
+        self._homes.move_to_end(key)
+        if len(self._homes) > self.size:
+            self._homes.popitem(last=False)
+
+    def drop(self, key: str):
+        self._homes.pop(key, None)
+
+
+def _foreign_key_error() -> sqlite3.IntegrityError:
+    return sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+
+
+def _event_order(event: Event) -> Tuple[str, str]:
+    return normalize_starts_at(event.date) or "", event.id
+
+
+async def _merge_feeds(
+    streams: List[AsyncIterator[List[Tuple[Event, str]]]], batch_size: int
+) -> AsyncIterator[List[Tuple[Event, str]]]:
+    """K-way merge of per-partition feed batches by (starts_at, id)."""
+    buffers = [deque() for _ in streams]
+    heap: List[tuple] = []
+
+    async def push_next(i: int):
+        if not buffers[i]:
+            batch = await anext(streams[i], None)
+            if batch:
+                buffers[i].extend(batch)
+        if buffers[i]:
+            event, starts_at = buffers[i].popleft()
+            heapq.heappush(heap, (starts_at, event.id, i, event))
+
+    for i in range(len(streams)):
+        await push_next(i)
+    batch: List[Tuple[Event, str]] = []
+    while heap:
+        starts_at, _, i, event = heapq.heappop(heap)
+        batch.append((event, starts_at))
+        await push_next(i)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PartitionedRepo:
+    """Repo over region partitions (see the module docstring)."""
+
+    def __init__(self, partitions: Partitions):
+        self.partitions = partitions
+        self.db_path = partitions.directory
+        self._listeners: List[WriteListener] = []
+        self._homes = _HomeHints()
+
+    @property
+    def repos(self) -> List[Repo]:
+        return [self.partitions.events[name] for name in self.partitions.names]
+
+    def _repo(self, name: str) -> Repo:
+        return self.partitions.events[name]
+
+    def _holding(self, location: str) -> List[Repo]:
+        return [self._repo(name) for name in self.partitions.holding(location)]
+
+    def add_listener(self, listener: WriteListener):
+        self._listeners.append(listener)
+        for repo in self.repos:
+            repo.add_listener(listener)
+
+    def add_archive_listener(self, listener: WriteListener):
+        for repo in self.repos:
+            repo.add_archive_listener(listener)
+
+    async def init_db(self):
+        await self.partitions.init_db()
+
+    # -----------------------------------------------------
+    # Routing
+    # -----------------------------------------------------
+
+    async def _home(self, event_id: str) -> Optional[str]:
+        """The partition holding `event_id` (live table), or None."""
+        hint = self._homes.get(event_id)
+        if hint is not None and await self._repo(hint).known_ids([event_id]):
+            return hint
+        self._homes.drop(event_id)
+        names = [name for name in self.partitions.names if name != hint]
+        found = await _gather(self._repo(name).known_ids([event_id]) for name in names)
+        for name, ids in zip(names, found):
+            if ids:
+                self._homes.put(event_id, name)
+                return name
+        return None
+
+    async def _homes_of(self, event_ids: Sequence[str]) -> Dict[str, str]:
+        names = self.partitions.names
+        found = await _gather(self._repo(name).known_ids(event_ids) for name in names)
+        return {event_id: name for name, ids in zip(names, found) for event_id in ids}
+
+    async def _check_organizers(self, organizer_ids: Iterable[Optional[str]]):
+        wanted = {i for i in organizer_ids if i}
+        if not wanted:
+            return
+        organizers = self.partitions.organizers
+        found = await _gather(organizers[name].known_ids(list(wanted)) for name in self.partitions.names)
+        if wanted - {i for ids in found for i in ids}:
+            raise _foreign_key_error()
+
+    async def _move(
+        self, source: str, target: str, data: Dict[str, Any], expected_version: Optional[int]
+    ) -> Optional[int]:
+        """Rewrite an event into another partition with the next version.
+
+        The old copy is deleted only while it still has the version that was
+        read; if a write got in first, the new copy is dropped again and the
+        move reports a conflict (None), or is retried without
+        `expected_version`."""
+        for _ in range(_MOVE_ATTEMPTS):
+            current = await self._repo(source).get(data["id"])
+            if current is None or (expected_version is not None and current.version != expected_version):
+                return None
+            moved = dict(data, created_at=current.created_at, version=current.version + 1)
+            # New copy first: a failure in between leaves a duplicate, not a loss.
+            await self._repo(target).import_events([moved], notify=False)
+            if await self._repo(source).delete(data["id"], expected_version=current.version):
+                break
+            await self._repo(target).delete(data["id"], expected_version=moved["version"], notify=False)
+            if expected_version is not None:
+                return None
+        else:
+            return None
+        # Listeners saw the delete; now the row in its new place.
+        self._homes.put(data["id"], target)
+        for listener in self._listeners:
+            listener([moved], ())
+        return moved["version"]
+
+    # -----------------------------------------------------
+    # Writes
+    # -----------------------------------------------------
+
+    async def insert(
+        self,
+        event: Union[Event, Dict[str, Any]],
+        idempotency_key: Optional[str] = None,
+        request_fingerprint: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """See Repo.insert; the id must also be unused in the other partitions."""
+        data = event.model_dump() if isinstance(event, Event) else dict(event)
+        target = self.partitions.for_location(data.get("location"))
+        await self._check_organizers([data.get("organizer_id")])
+        # The target's own primary key (and idempotency replay) covers its file.
+        home = await self._home(data.get("id"))
+        if home is not None and home != target:
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: events.id")
+        stored = await self._repo(target).insert(data, idempotency_key, request_fingerprint)
+        self._homes.put(stored["id"], target)
+        return stored
+
+    async def update(
+        self, event: Union[Event, Dict[str, Any]], expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        data = event.model_dump() if isinstance(event, Event) else dict(event)
+        home = await self._home(data["id"])
+        if home is None:
+            return None
+        await self._check_organizers([data.get("organizer_id")])
+        target = self.partitions.for_location(data.get("location"))
+        if target != home:
+            return await self._move(home, target, data, expected_version)
+        return await self._repo(home).update(data, expected_version)
+
+    async def patch(
+        self, event_id: str, fields: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> Optional[Event]:
+        home = await self._home(event_id)
+        if home is None:
+            return None
+        if "organizer_id" in fields:
+            await self._check_organizers([fields["organizer_id"]])
+        target = self.partitions.for_location(fields["location"]) if "location" in fields else home
+        if target == home:
+            return await self._repo(home).patch(event_id, fields, expected_version)
+        current = await self._repo(home).get(event_id)
+        if current is None:
+            return None
+        data = current.model_dump()
+        data.update({k: v for k, v in fields.items() if k in PATCHABLE_FIELDS or k == "updated_at"})
+        if await self._move(home, target, data, expected_version) is None:
+            return None
+        return await self._repo(target).get(event_id)
+
+    async def delete(self, event_id: str) -> int:
+        home = await self._home(event_id)
+        if home is None:
+            return 0
+        self._homes.drop(event_id)
+        return await self._repo(home).delete(event_id)
+
+    async def update_many(self, events: Sequence[Union[Event, Dict[str, Any]]]) -> Dict[str, Any]:
+        """See Repo.update_many. Each partition updates its share in one
+        transaction; events changing region are moved one by one."""
+        rows = [e.model_dump() if isinstance(e, Event) else dict(e) for e in events]
+        homes = await self._homes_of([r["id"] for r in rows])
+        await self._check_organizers(r.get("organizer_id") for r in rows if r["id"] in homes)
+        in_place: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        moves = []
+        for row in rows:
+            home = homes.get(row["id"])
+            if home is None:
+                continue
+            if self.partitions.for_location(row.get("location")) == home:
+                in_place[home].append(row)
+            else:
+                moves.append((home, row))
+        updated: Dict[str, int] = {}
+        conflicts: List[str] = []
+        results = await _gather(self._repo(name).update_many(group) for name, group in in_place.items())
+        for result in results:
+            updated.update(result["updated"])
+            conflicts.extend(result["conflicts"])
+        for home, row in moves:
+            target = self.partitions.for_location(row.get("location"))
+            version = await self._move(home, target, row, row.get("version"))
+            if version is None:
+                conflicts.append(row["id"])
+            else:
+                updated[row["id"]] = version
+        return {"updated": updated, "conflicts": conflicts}
+
+    async def delete_many(self, event_ids: Sequence[str]) -> List[str]:
+        ids = list(dict.fromkeys(event_ids))
+        deleted = await _gather(repo.delete_many(ids) for repo in self.repos)
+        for event_id in ids:
+            self._homes.drop(event_id)
+        return [event_id for part in deleted for event_id in part]
+
+    async def import_events(self, events: Sequence[Union[Event, Dict[str, Any]]], notify: bool = True) -> int:
+        """Bulk-load events into their partitions (see Repo.import_events).
+        Doesn't check organizers or ids in other partitions."""
+        groups: Dict[str, List[Any]] = defaultdict(list)
+        for event in events:
+            location = event.location if isinstance(event, Event) else event.get("location")
+            groups[self.partitions.for_location(location)].append(event)
+        counts = await _gather(self._repo(name).import_events(group, notify) for name, group in groups.items())
+        return sum(counts)
+
+    async def archive_before(self, cutoff: str, limit: int) -> List[Event]:
+        """Up to `limit` events per partition (see Repo.archive_before)."""
+        moved = await _gather(repo.archive_before(cutoff, limit) for repo in self.repos)
+        return [event for part in moved for event in part]
+
+    async def reconcile_aggregates(self) -> Dict[str, int]:
+        totals: Dict[str, int] = defaultdict(int)
+        for fixed in await _gather(repo.reconcile_aggregates() for repo in self.repos):
+            for table, count in fixed.items():
+                totals[table] += count
+        return dict(totals)
+
+    # -----------------------------------------------------
+    # Reads
+    # -----------------------------------------------------
+
+    async def list(self, include_archived: bool = False) -> List[Event]:
+        parts = await _gather(repo.list(include_archived) for repo in self.repos)
+        return [event for part in parts for event in part]
+
+    async def list_archived(self) -> List[Event]:
+        parts = await _gather(repo.list_archived() for repo in self.repos)
+        return [event for part in parts for event in part]
+
+    async def get(self, event_id: str, include_archived: bool = False) -> Optional[Event]:
+        hint = self._homes.get(event_id)
+        if hint is not None:
+            event = await self._repo(hint).get(event_id, include_archived)
+            if event is not None:
+                return event
+        found = await _gather(repo.get(event_id, include_archived) for repo in self.repos)
+        return next((event for event in found if event is not None), None)
+
+    async def get_many(self, event_ids: Sequence[str], include_archived: bool = False) -> List[Event]:
+        parts = await _gather(repo.get_many(event_ids, include_archived) for repo in self.repos)
+        return [event for part in parts for event in part]
+
+    async def find_by_titles(self, titles: Sequence[str]) -> List[Event]:
+        parts = await _gather(repo.find_by_titles(titles) for repo in self.repos)
+        return [event for part in parts for event in part]
+
+    async def upcoming(self, since: str, limit: int, location: Optional[str] = None) -> List[Event]:
+        repos = self._holding(location) if location else self.repos
+        if len(repos) == 1:
+            return await repos[0].upcoming(since, limit, location)
+        parts = await _gather(repo.upcoming(since, limit, location) for repo in repos)
+        return list(islice(heapq.merge(*parts, key=_event_order), limit))
+
+    async def starting_between(self, start: str, end: str) -> List[Event]:
+        parts = await _gather(repo.starting_between(start, end) for repo in self.repos)
+        return list(heapq.merge(*parts, key=_event_order))
+
+    async def history_counts(self, dimension: str) -> Dict[str, int]:
+        totals: Dict[str, int] = defaultdict(int)
+        for counts in await _gather(repo.history_counts(dimension) for repo in self.repos):
+            for value, events in counts.items():
+                totals[value] += events
+        return dict(totals)
+
+    async def table_version(self) -> int:
+        """Sum of the partitions' counters: changes whenever any of them does."""
+        return sum(await _gather(repo.table_version() for repo in self.repos))
+
+    async def database_id(self) -> str:
+        """The partitions' ids: changes when any file is recreated, added or dropped."""
+        return ",".join(await _gather(repo.database_id() for repo in self.repos))
+
+    @asynccontextmanager
+    async def feed_snapshot(
+        self,
+        location: Optional[str] = None,
+        performer: Optional[str] = None,
+        organizer_id: Optional[str] = None,
+        batch_size: int = MAX_IN_PARAMS,
+    ) -> AsyncIterator[Tuple[int, AsyncIterator[List[Tuple[Event, str]]]]]:
+        """See Repo.feed_snapshot. One snapshot per partition read (all of
+        them, or those holding `location`) merged by date; the version is
+        their sum."""
+        repos = self._holding(location) if location else self.repos
+        if len(repos) == 1:
+            async with repos[0].feed_snapshot(location, performer, organizer_id, batch_size) as snapshot:
+                yield snapshot
+            return
+        async with AsyncExitStack() as stack:
+            snapshots = [
+                await stack.enter_async_context(
+                    repo.feed_snapshot(location, performer, organizer_id, batch_size)
+                )
+                for repo in repos
+            ]
+            version = sum(v for v, _ in snapshots)
+            yield version, _merge_feeds([batches for _, batches in snapshots], batch_size)
+
+    # -----------------------------------------------------
+    # Analytics
+    # -----------------------------------------------------
+
+    async def analytics_query(self, query: AnalyticsQuery) -> List[tuple]:
+        """See Repo.analytics_query. A location filter reads the partitions
+        holding it, usually one; otherwise every partition is grouped in full
+        and the groups merged before sorting and `top_k`."""
+        repos = self._holding(query.location) if query.location else self.repos
+        if len(repos) == 1:
+            return await repos[0].analytics_query(query)
+        nocase = dimension_nocase(query.dimension)
+
+        def group_key(group):
+            return group.lower() if nocase and isinstance(group, str) else group
+
+        def show(key, group):
+            # Like the SQL, a case-insensitive group shows its lowest spelling.
+            shown[key] = min(shown[key], group) if key in shown and isinstance(group, str) else group
+
+        shown: Dict[Any, Any] = {}
+        labels: Dict[Any, Any] = {}
+        values: Dict[Any, int] = defaultdict(int)
+        # A location normally lives in one partition, so its distinct counts
+        # can simply be added up; other groups (and strays) may span partitions.
+        if query.metric == "distinct" and (query.dimension != "location" or self.partitions.strays):
+            distinct_nocase = dimension_nocase(query.distinct)
+            seen: Dict[Any, set] = defaultdict(set)
+            for rows in await _gather(repo.analytics_pairs(query) for repo in repos):
+                for group, value in rows:
+                    key = group_key(group)
+                    show(key, group)
+                    if value is not None:
+                        seen[key].add(value.lower() if distinct_nocase and isinstance(value, str) else value)
+            for key in shown:
+                values[key] = len(seen[key])
+        else:
+            unlimited = query.model_copy(update={"top_k": -1})  # LIMIT -1: every group
+            for rows in await _gather(repo.analytics_query(unlimited) for repo in repos):
+                for row in rows:
+                    key = group_key(row[0])
+                    show(key, row[0])
+                    values[key] += row[1]
+                    if len(row) > 2 and row[2] is not None:
+                        labels.setdefault(key, row[2])
+
+        if query.sort == "value":
+            order = sorted(values, key=lambda key: (-values[key], key))
+        else:
+            order = sorted(values)
+        order = order[: query.top_k]
+        if query.dimension != "organizer":
+            return [(shown[key], values[key]) for key in order]
+        missing = [key for key in order if key not in labels]
+        if missing:
+            # The organizer may live in another partition than its events.
+            directories = await _gather(
+                self.partitions.organizers[name].directory() for name in self.partitions.names
+            )
+            for directory in directories:
+                for key in missing:
+                    if key in directory:
+                        labels.setdefault(key, directory[key][0])
+        return [(shown[key], values[key], labels.get(key)) for key in order]
+
+    async def calendar(
+        self, start: str, end: str, bucket: CalendarBucket, include_ids: bool = False
+    ) -> List[tuple]:
+        """See Repo.calendar; a bucket's ids are in date order per partition,
+        partitions one after another."""
+        counts: Dict[str, int] = defaultdict(int)
+        ids: Dict[str, List[str]] = defaultdict(list)
+        for rows in await _gather(repo.calendar(start, end, bucket, include_ids) for repo in self.repos):
+            for row in rows:
+                counts[row[0]] += row[1]
+                if include_ids:
+                    ids[row[0]].extend(json.loads(row[2]))
+        if include_ids:
+            return [(key, counts[key], json.dumps(ids[key])) for key in sorted(counts)]
+        return [(key, counts[key]) for key in sorted(counts)]
+
+
+class PartitionedOrganizerRepo:
+    """OrganizerRepo over region partitions (see the module docstring)."""
+
+    def __init__(self, partitions: Partitions):
+        self.partitions = partitions
+        self.db_path = partitions.directory
+        self._homes = _HomeHints()
+
+    def _repo(self, name: str) -> OrganizerRepo:
+        return self.partitions.organizers[name]
+
+    async def init_db(self):
+        await self.partitions.init_db()
+
+    async def _home(self, organizer_id: str) -> Optional[str]:
+        hint = self._homes.get(organizer_id)
+        if hint is not None and await self._repo(hint).known_ids([organizer_id]):
+            return hint
+        self._homes.drop(organizer_id)
+        names = self.partitions.names
+        found = await _gather(self._repo(name).known_ids([organizer_id]) for name in names)
+        for name, ids in zip(names, found):
+            if ids:
+                self._homes.put(organizer_id, name)
+                return name
+        return None
+
+    async def _stats(
+        self, organizer_ids: Optional[Sequence[str]] = None, year: int = STATS_YEAR
+    ) -> Dict[str, List[int]]:
+        """(managed, cultural, in `year`) per organizer over every partition's events."""
+        totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        names = self.partitions.names
+        for stats in await _gather(self._repo(name).event_stats(organizer_ids, year) for name in names):
+            for organizer_id, counts in stats.items():
+                total = totals[organizer_id]
+                for i, count in enumerate(counts):
+                    total[i] += count
+        return totals
+
+    async def _with_stats(self, organizers: List[Organizer], all_ids: bool = False) -> List[Organizer]:
+        # Each partition's own rows only count its local events.
+        if not organizers:
+            return organizers
+        totals = await self._stats(None if all_ids else [o.organizer_id for o in organizers])
+        result = []
+        for organizer in organizers:
+            managed, cultural, in_year = totals.get(organizer.organizer_id, (0, 0, 0))
+            result.append(organizer.model_copy(update={
+                "managed_events": managed, "cultural_events": cultural, "events_2025": in_year,
+            }))
+        return result
+
+    async def _detach(self, organizer_ids: Sequence[str]):
+        if organizer_ids:
+            await _gather(repo.detach_organizers(organizer_ids) for repo in self.partitions.events.values())
+
+    async def _move(
+        self, source: str, target: str, organizer: Organizer, expected_version: Optional[int]
+    ) -> Optional[int]:
+        """See PartitionedRepo._move."""
+        source_repo, target_repo = self._repo(source), self._repo(target)
+        for _ in range(_MOVE_ATTEMPTS):
+            current = await source_repo.get(organizer.organizer_id)
+            if current is None or (expected_version is not None and current.version != expected_version):
+                return None
+            version = current.version + 1
+            await target_repo.import_organizers([organizer.model_copy(update={"version": version})])
+            # No cascade: events have no foreign key here, and archived ones keep theirs.
+            if await source_repo.delete(organizer.organizer_id, expected_version=current.version, detach=False):
+                self._homes.put(organizer.organizer_id, target)
+                return version
+            await target_repo.delete(organizer.organizer_id, expected_version=version, detach=False)
+            if expected_version is not None:
+                return None
+        return None
+
+    async def insert(
+        self,
+        organizer: Organizer,
+        idempotency_key: Optional[str] = None,
+        request_fingerprint: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        target = self.partitions.for_region(organizer.region)
+        home = await self._home(organizer.organizer_id)
+        if home is not None and home != target:
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: organizers.organizer_id")
+        stored = await self._repo(target).insert(organizer, idempotency_key, request_fingerprint)
+        self._homes.put(organizer.organizer_id, target)
+        return stored
+
+    async def list(self) -> List[Organizer]:
+        parts = await _gather(self._repo(name).list() for name in self.partitions.names)
+        return await self._with_stats([o for part in parts for o in part], all_ids=True)
+
+    async def get(self, organizer_id: str) -> Optional[Organizer]:
+        home = await self._home(organizer_id)
+        if home is None:
+            return None
+        organizer = await self._repo(home).get(organizer_id)
+        return (await self._with_stats([organizer]))[0] if organizer else None
+
+    async def get_many(self, organizer_ids: Sequence[str]) -> List[Organizer]:
+        parts = await _gather(self._repo(name).get_many(organizer_ids) for name in self.partitions.names)
+        return await self._with_stats([o for part in parts for o in part])
+
+    async def update(self, organizer: Organizer, expected_version: Optional[int] = None) -> Optional[int]:
+        home = await self._home(organizer.organizer_id)
+        if home is None:
+            return None
+        target = self.partitions.for_region(organizer.region)
+        if target != home:
+            return await self._move(home, target, organizer, expected_version)
+        return await self._repo(home).update(organizer, expected_version)
+
+    async def patch(
+        self, organizer_id: str, fields: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        home = await self._home(organizer_id)
+        if home is None:
+            return None
+        target = self.partitions.for_region(fields["region"]) if "region" in fields else home
+        if target == home:
+            return await self._repo(home).patch(organizer_id, fields, expected_version)
+        current = await self._repo(home).get(organizer_id)
+        if current is None:
+            return None
+        changes = {k: v for k, v in fields.items() if k in ("name", "company", "region", "experience")}
+        return await self._move(home, target, current.model_copy(update=changes), expected_version)
+
+    async def delete(self, organizer_id: str) -> int:
+        home = await self._home(organizer_id)
+        if home is None:
+            return 0
+        deleted = await self._repo(home).delete(organizer_id)
+        self._homes.drop(organizer_id)
+        if deleted:
+            await self._detach([organizer_id])
+        return deleted
+
+    async def update_many(self, organizers: Sequence[Organizer]) -> Dict[str, Any]:
+        """See OrganizerRepo.update_many; organizers changing region move one by one."""
+        names = self.partitions.names
+        found = await _gather(self._repo(name).known_ids([o.organizer_id for o in organizers]) for name in names)
+        homes = {organizer_id: name for name, ids in zip(names, found) for organizer_id in ids}
+        in_place: Dict[str, List[Organizer]] = defaultdict(list)
+        moves = []
+        for organizer in organizers:
+            home = homes.get(organizer.organizer_id)
+            if home is None:
+                continue
+            if self.partitions.for_region(organizer.region) == home:
+                in_place[home].append(organizer)
+            else:
+                moves.append((home, organizer))
+        updated: Dict[str, int] = {}
+        conflicts: List[str] = []
+        for result in await _gather(self._repo(name).update_many(group) for name, group in in_place.items()):
+            updated.update(result["updated"])
+            conflicts.extend(result["conflicts"])
+        for home, organizer in moves:
+            target = self.partitions.for_region(organizer.region)
+            version = await self._move(home, target, organizer, organizer.version)
+            if version is None:
+                conflicts.append(organizer.organizer_id)
+            else:
+                updated[organizer.organizer_id] = version
+        return {"updated": updated, "conflicts": conflicts}
+
+    async def delete_many(self, organizer_ids: Sequence[str]) -> List[str]:
+        ids = list(dict.fromkeys(organizer_ids))
+        parts = await _gather(self._repo(name).delete_many(ids) for name in self.partitions.names)
+        deleted = [organizer_id for part in parts for organizer_id in part]
+        for organizer_id in ids:
+            self._homes.drop(organizer_id)
+        await self._detach(deleted)
+        return deleted
+
+    async def _directory(self) -> Dict[str, Tuple[str, str, str]]:
+        merged: Dict[str, Tuple[str, str, str]] = {}
+        for part in await _gather(self._repo(name).directory() for name in self.partitions.names):
+            merged.update(part)
+        return merged
+
+    async def events_managed_by_company(self, company: str) -> int:
+        wanted = company.lower()
+        ids = [i for i, (_, owner, _) in (await self._directory()).items() if owner.lower() == wanted]
+        if not ids:
+            return 0
+        return sum(counts[0] for counts in (await self._stats(ids)).values())
+
+    async def region_with_max_cultural_events(self) -> dict:
+        directory = await self._directory()
+        by_region: Dict[str, int] = defaultdict(int)
+        for organizer_id, (_, cultural, _) in (await self._stats()).items():
+            if cultural and organizer_id in directory:
+                by_region[directory[organizer_id][2]] += cultural
+        if not by_region:
+            return {"region": None, "cultural_events": 0}
+        region = max(by_region, key=by_region.get)
+        return {"region": region, "cultural_events": by_region[region]}
+
+    async def top_organizer_for_year(self, year: int) -> Optional[Tuple[Organizer, int]]:
+        totals = await self._stats(year=year)
+        counts = {organizer_id: stats[2] for organizer_id, stats in totals.items() if stats[2]}
+        if not counts:
+            return None
+        organizer_id = min(counts, key=lambda oid: (-counts[oid], oid))  # ties: lowest id
+        organizer = await self.get(organizer_id)
+        if not organizer:
+            return None
+        return organizer, counts[organizer_id]
+
+
+# -----------------------------------------------------
+# Importing a single-file database
+# -----------------------------------------------------
+
+def _import_marker(source_id: str) -> str:
+    return f"imported:{source_id}"
+
+
+def _copy_rows(db: sqlite3.Connection, table: str, where: str) -> int:
+    """INSERT OR IGNORE the rows of src.`table` matching `where`, by the
+    columns both files have (migrations may have added them in another order)."""
+    source = {row[1] for row in db.execute(f"PRAGMA src.table_info({table})")}
+    columns = ", ".join(row[1] for row in db.execute(f"PRAGMA main.table_info({table})") if row[1] in source)
+    cursor = db.execute(
+        f"INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM src.{table} WHERE {where}"
+    )
+    return cursor.rowcount
+
+
+def _import_partition(
+    partitions: Partitions, name: str, source: str, source_id: str,
+    locations: List[str], organizer_ids: List[str],
+) -> Dict[str, int]:
+    db = sqlite3.connect(partitions.path(name), timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        db.execute("ATTACH DATABASE ? AS src", (source,))
+        db.execute("CREATE TEMP TABLE route_locations (location TEXT PRIMARY KEY)")
+        db.executemany("INSERT INTO temp.route_locations VALUES (?)", [(location,) for location in locations])
+        db.execute("CREATE TEMP TABLE route_organizers (organizer_id TEXT PRIMARY KEY)")
+        db.executemany("INSERT INTO temp.route_organizers VALUES (?)", [(i,) for i in organizer_ids])
+        routed = "location IN (SELECT location FROM temp.route_locations)"
+        if name == partitions.default:
+            routed = f"({routed} OR location IS NULL)"
+        copied = {}
+        with db:  # one transaction per partition
+            for events, performers in (
+                (TABLE_NAME, EVENT_PERFORMERS_TABLE_NAME),
+                (EVENTS_ARCHIVE_TABLE_NAME, EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME),
+            ):
+                copied[events] = _copy_rows(db, events, routed)
+                copied[performers] = _copy_rows(
+                    db, performers, f"event_id IN (SELECT id FROM src.{events} WHERE {routed})"
+                )
+            copied[ORGANIZER_TABLE_NAME] = _copy_rows(
+                db, ORGANIZER_TABLE_NAME, "organizer_id IN (SELECT organizer_id FROM temp.route_organizers)"
+            )
+            if name == partitions.default:
+                # Aggregates can't be split by location; PartitionedRepo adds
+                # up every partition's history, so one copy is enough.
+                copied[EVENT_HISTORY_TABLE_NAME] = db.execute(
+                    f"INSERT INTO main.{EVENT_HISTORY_TABLE_NAME} (dimension, value, events) "
+                    f"SELECT dimension, value, events FROM src.{EVENT_HISTORY_TABLE_NAME} WHERE true "
+                    "ON CONFLICT (dimension, value) DO UPDATE SET events = events + excluded.events"
+                ).rowcount
+                db.execute(
+                    f"INSERT INTO {DATABASE_META_TABLE_NAME} (name, value) VALUES (?, ?)",
+                    (_import_marker(source_id), source),
+                )
+        return copied
+    finally:
+        db.close()
+
+
+def _source_state(partitions: Partitions, source: str) -> Tuple[str, bool, bool]:
+    """(database id, has rows, already imported) of a single-file database."""
+    db = sqlite3.connect(source, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        has_rows = any(
+            db.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+            for table in (TABLE_NAME, EVENTS_ARCHIVE_TABLE_NAME, ORGANIZER_TABLE_NAME)
+            if table in tables
+        )
+        source_id = ""
+        if DATABASE_META_TABLE_NAME in tables:
+            row = db.execute(
+                f"SELECT value FROM {DATABASE_META_TABLE_NAME} WHERE name = 'database_id'"
+            ).fetchone()
+            source_id = row[0] if row else ""
+    finally:
+        db.close()
+    imported = False
+    if source_id and os.path.exists(partitions.path(partitions.default)):
+        db = sqlite3.connect(partitions.path(partitions.default), timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+        try:
+            imported = db.execute(
+                f"SELECT 1 FROM {DATABASE_META_TABLE_NAME} WHERE name = ?", (_import_marker(source_id),)
+            ).fetchone() is not None
+        except sqlite3.OperationalError:  # no database_meta yet
+            pass
+        finally:
+            db.close()
+    return source_id, has_rows, imported
+
+
+def needs_import(partitions: Partitions, source: str = DB_NAME) -> bool:
+    """True if `source` (a single-file database) holds rows that were never
+    imported into `partitions`: they are invisible with PARTITION_BY_REGION=1."""
+    if not os.path.exists(source):
+        return False
+    _, has_rows, imported = _source_state(partitions, source)
+    return has_rows and not imported
+
+
+async def import_database(partitions: Partitions, source: str = DB_NAME) -> Dict[str, int]:
+    """Copy a single-file database into the partitions, routing every row
+    like a write: events and archived events by location, organizers by
+    region, the archive's history aggregates into the default partition.
+
+    Rows whose id a partition already has are left alone, and a source
+    imported before is skipped, so running it twice is harmless. Run it
+    with the backend stopped. Returns rows copied per table.
+    """
+    # Bring the source to the current schema first (what starting the app
+    # on it would do), so every table and column below exists.
+    await Repo(source).init_db()
+    await OrganizerRepo(source).init_db()
+    await get_write_queue(source).close()
+    await partitions.init_db()
+    await partitions.close()
+
+    source_id, _, imported = _source_state(partitions, source)
+    if imported:
+        return {}
+    db = sqlite3.connect(source, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        locations = [
+            row[0] for row in db.execute(
+                f"SELECT location FROM {TABLE_NAME} WHERE location IS NOT NULL "
+                f"UNION SELECT location FROM {EVENTS_ARCHIVE_TABLE_NAME} WHERE location IS NOT NULL"
+            )
+        ]
+        organizers = db.execute(f"SELECT organizer_id, region FROM {ORGANIZER_TABLE_NAME}").fetchall()
+    finally:
+        db.close()
+    routes: Dict[str, Tuple[List[str], List[str]]] = {name: ([], []) for name in partitions.names}
+    for location in locations:
+        routes[partitions.for_location(location)][0].append(location)
+    for organizer_id, region in organizers:
+        routes[partitions.for_region(region)][1].append(organizer_id)
+
+    totals: Dict[str, int] = defaultdict(int)
+    # The default partition last: its import marker means "all done".
+    for name in sorted(routes, key=lambda name: name == partitions.default):
+        copied = await asyncio.to_thread(
+            _import_partition, partitions, name, source, source_id, *routes[name]
+        )
+        for table, count in copied.items():
+            totals[table] += count
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy a single-file database into the region partitions.")
+    parser.add_argument("--import", dest="source", metavar="DB", default=DB_NAME,
+                        help="the database to import (default: DB_NAME)")
+    parsed = parser.parse_args()
+    if not os.path.exists(parsed.source):
+        parser.error(f"{parsed.source} not found")
+    copied = asyncio.run(import_database(Partitions(), parsed.source))
+    if not copied:
+        print(f"{parsed.source} was already imported into {PARTITION_DIR}")
+    for table, count in copied.items():
+        print(f"{table}: {count} rows")
@@ -1,16 +1,106 @@
-import aiosqlite
-from typing import Any, Dict, List, Optional, Union
-from models.data_models import Event
-from constants import DB_NAME, TABLE_NAME
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from models.data_models import AnalyticsQuery, CalendarBucket, Event
+from datetime import datetime
+from constants import (
+    DB_NAME,
+    EVENT_HISTORY_TABLE_NAME,
+    EVENT_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME,
+    EVENTS_ARCHIVE_TABLE_NAME,
+    ORGANIZER_TABLE_NAME,
+    TABLE_NAME,
+)
+from repos.dates import normalize_starts_at
+from repos import archive, idempotency, table_versions
+from repos.analytics import compile_analytics_pairs, compile_analytics_query, compile_calendar_query
+from repos.db import configure_database, connect, get_write_queue, read_connection
+
+EVENT_COLUMNS = (
+    "id, title, date, location, performers, description, created_at, updated_at, "
+    "organizer_id, category, version"
+)
+
+# Columns a PATCH may touch (API field -> column; performers/date get extra handling)
+PATCHABLE_FIELDS = (
+    "title", "date", "location", "performers", "description", "organizer_id", "category",
+)
+
+
+# Stay well below SQLite's host-parameter limit for `IN (...)` lists.
+MAX_IN_PARAMS = 500
+
+
+def chunked(values: Sequence[Any], size: int = MAX_IN_PARAMS) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+# Called after a committed write with (upserted events, deleted ids); events
+# may be Event objects or dicts with the Event fields.
+WriteListener = Callable[[Sequence[Any], Sequence[str]], None]
+
+
+def row_to_event(row) -> Event:
+    """Build an Event from a row selected with EVENT_COLUMNS."""
+    return Event(
+        id=row[0],
+        title=row[1],
+        date=row[2],
+        location=row[3],
+        performers=row[4].split(",") if row[4] else [],
+        description=row[5],
+        created_at=row[6],
+        updated_at=row[7],
+        organizer_id=row[8],
+        category=row[9],
+        version=row[10],
+    )
 
 
 class Repo:
-    def __init__(self, db_path: str = DB_NAME):
+    def __init__(self, db_path: str = DB_NAME, organizer_fk: bool = True):
         self.db_path = db_path
+        # Region partitions (repos/partitioned.py) keep organizers in other
+        # files, so their events table can't reference them.
+        self.organizer_fk = organizer_fk
+        self.writes = get_write_queue(db_path)
+        self._initialized = False
+        self._listeners: List[WriteListener] = []
+        self._archive_listeners: List[WriteListener] = []
+
+    def add_listener(self, listener: WriteListener):
+        """Get told about every event this repo writes (e.g. the EventIndex).
+
+        Archived events are reported as deletes."""
+        self._listeners.append(listener)
+
+    def add_archive_listener(self, listener: WriteListener):
+        """Get told about events moved into the archive (as upserts)."""
+        self._archive_listeners.append(listener)
+
+    def _notify(self, upserts: Sequence[Any] = (), deletes: Sequence[str] = ()):
+        if upserts or deletes:
+            for listener in self._listeners:
+                listener(upserts, deletes)
 
     async def init_db(self):
-        """Initialize the events table and ensure auditing columns exist."""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Initialize the events table and ensure auditing columns exist.
+
+        Services call this before every operation, so the schema work only
+        runs once per repo instance.
+        """
+        if self._initialized:
+            return
+        organizer_column = "TEXT"
+        if self.organizer_fk:
+            organizer_column += f" REFERENCES {ORGANIZER_TABLE_NAME}(organizer_id) ON DELETE SET NULL"
+        await configure_database(self.db_path)
+        async with connect(self.db_path) as db:
             await db.execute(
                 f"""
                 CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
@@ -21,7 +111,11 @@ class Repo:
                     performers TEXT,
                     description TEXT,
                     created_at TEXT,
-                    updated_at TEXT
+                    updated_at TEXT,
+                    organizer_id {organizer_column},
+                    category TEXT,
+                    starts_at TEXT,
+                    version INTEGER NOT NULL DEFAULT 1
                 )
             """
             )
@@ -30,6 +124,97 @@ class Repo:
             # Ensure the table has the newly added columns if it pre-existed
             await self._ensure_column(db, "created_at", "TEXT")
             await self._ensure_column(db, "updated_at", "TEXT")
+            await self._ensure_column(db, "organizer_id", organizer_column)
+            await self._ensure_column(db, "category", "TEXT")
+            # Normalized, sortable copy of `date` used by date-range queries
+            await self._ensure_column(db, "starts_at", "TEXT")
+            # Optimistic concurrency: bumped by every update
+            await self._ensure_column(db, "version", "INTEGER NOT NULL DEFAULT 1")
+            await self._backfill_starts_at(db)
+
+            await db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_organizer "
+                f"ON {TABLE_NAME}(organizer_id, starts_at)"
+            )
+            await db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_category "
+                f"ON {TABLE_NAME}(category, organizer_id)"
+            )
+            await db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_starts_at ON {TABLE_NAME}(starts_at)"
+            )
+            await db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_title "
+                f"ON {TABLE_NAME}(LOWER(TRIM(title)))"
+            )
+            await db.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_location "
+                f"ON {TABLE_NAME}(location COLLATE NOCASE, starts_at)"
+            )
+            await self._ensure_performers_table(db)
+            await archive.ensure_tables(db)
+            await idempotency.ensure_table(db)
+            await table_versions.ensure_tracked(db, TABLE_NAME)
+            await table_versions.ensure_database_id(db)
+            await db.commit()
+        self._initialized = True
+
+    async def _backfill_starts_at(self, db):
+        cursor = await db.execute(
+            f"SELECT id, date FROM {TABLE_NAME} WHERE starts_at IS NULL AND date IS NOT NULL"
+        )
+        updates = [
+            (starts_at, row[0])
+            for row in await cursor.fetchall()
+            if (starts_at := normalize_starts_at(row[1]))
+        ]
+        if updates:
+            await db.executemany(
+                f"UPDATE {TABLE_NAME} SET starts_at = ? WHERE id = ?", updates
+            )
+            await db.commit()
+
+    async def _ensure_performers_table(self, db):
+        """Normalized copy of the comma-separated `performers` column, so
+        analytics can filter and group by performer with an index."""
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (EVENT_PERFORMERS_TABLE_NAME,),
+        )
+        existed = await cursor.fetchone() is not None
+        await db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {EVENT_PERFORMERS_TABLE_NAME} (
+                event_id TEXT NOT NULL REFERENCES {TABLE_NAME}(id) ON DELETE CASCADE,
+                performer TEXT NOT NULL,
+                PRIMARY KEY (event_id, performer)
+            )
+        """
+        )
+        await db.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{EVENT_PERFORMERS_TABLE_NAME}_performer "
+            f"ON {EVENT_PERFORMERS_TABLE_NAME}(performer COLLATE NOCASE, event_id)"
+        )
+        if not existed:
+            cursor = await db.execute(
+                f"SELECT id, performers FROM {TABLE_NAME} WHERE performers IS NOT NULL AND performers != ''"
+            )
+            for event_id, performers in await cursor.fetchall():
+                await self._write_performers(db, event_id, performers.split(","), replace=False)
+        await db.commit()
+
+    async def _write_performers(self, db, event_id: str, performers: List[str], replace: bool = True):
+        # Runs inside the caller's write job / transaction.
+        if replace:
+            await db.execute(
+                f"DELETE FROM {EVENT_PERFORMERS_TABLE_NAME} WHERE event_id = ?", (event_id,)
+            )
+        names = [p.strip() for p in performers if p and p.strip()]
+        if names:
+            await db.executemany(
+                f"INSERT OR IGNORE INTO {EVENT_PERFORMERS_TABLE_NAME} (event_id, performer) VALUES (?, ?)",
+                [(event_id, name) for name in names],
+            )
 
     async def _ensure_column(self, db, column_name: str, column_type: str):
         cursor = await db.execute(f"PRAGMA table_info({TABLE_NAME})")
@@ -50,18 +235,45 @@ class Repo:
         if isinstance(performers, str):
             performers = [p.strip() for p in performers.split(",") if p.strip()]
         data["performers"] = performers
+        category = (data.get("category") or "").strip().lower()
+        data["category"] = category or None
+        data["starts_at"] = normalize_starts_at(data.get("date"))
         return data
 
     def _performers_str(self, performers: List[str]) -> str:
         return ",".join([p.strip() for p in performers if p])
 
-    async def insert(self, event: Event):
+    async def insert(
+        self,
+        event: Union[Event, Dict[str, Any]],
+        idempotency_key: Optional[str] = None,
+        request_fingerprint: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Insert one event with a single INSERT and return the stored data.
+
+        A duplicate id raises sqlite3.IntegrityError from the primary key.
+        With an `idempotency_key`, a retry of an earlier request returns that
+        request's stored result instead of inserting again; the check, the
+        insert and the stored result share one transaction.
+        """
         data = self._normalize_event(event)
-        async with aiosqlite.connect(self.db_path) as db:
+        result = {k: v for k, v in data.items() if k != "starts_at"}
+        result["version"] = 1
+
+        async def _insert(db):
+            if idempotency_key:
+                previous = await idempotency.replay(
+                    db, TABLE_NAME, idempotency_key, request_fingerprint or ""
+                )
+                if previous is not None:
+                    return previous
             await db.execute(
                 f"""
-                INSERT INTO {TABLE_NAME} (id, title, date, location, performers, description, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO {TABLE_NAME} (
+                    id, title, date, location, performers, description, created_at, updated_at,
+                    organizer_id, category, starts_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
                 (
                     data.get("id"),
@@ -72,82 +284,563 @@ class Repo:
                     data.get("description"),
                     data.get("created_at"),
                     data.get("updated_at"),
+                    data.get("organizer_id"),
+                    data.get("category"),
+                    data.get("starts_at"),
                 ),
             )
-            await db.commit()
+            await self._write_performers(db, data.get("id"), data["performers"], replace=False)
+            if idempotency_key:
+                await idempotency.remember(
+                    db, TABLE_NAME, idempotency_key, request_fingerprint or "", result
+                )
+            return result
+
+        stored = await self.writes.submit(_insert)
+        self._notify(upserts=[stored])
+        return stored
+
+    async def list(self, include_archived: bool = False) -> List[Event]:
+        sql = f"SELECT {EVENT_COLUMNS} FROM {TABLE_NAME}"
+        if include_archived:
+            sql += f" UNION ALL SELECT {EVENT_COLUMNS} FROM {EVENTS_ARCHIVE_TABLE_NAME}"
+        async with read_connection(self.db_path) as db:
+            cursor = await db.execute(sql)
+            rows = await cursor.fetchall()
+            return [row_to_event(row) for row in rows]
 
-    async def list(self) -> List[Event]:
-        async with aiosqlite.connect(self.db_path) as db:
+    async def list_archived(self) -> List[Event]:
+        async with read_connection(self.db_path) as db:
+            cursor = await db.execute(f"SELECT {EVENT_COLUMNS} FROM {EVENTS_ARCHIVE_TABLE_NAME}")
+            return [row_to_event(row) for row in await cursor.fetchall()]
+
+    async def upcoming(self, since: str, limit: int, location: Optional[str] = None) -> List[Event]:
+        """The next `limit` events with starts_at >= `since`, soonest first.
+
+        A range scan of idx_events_starts_at, or of idx_events_location
+        (location, starts_at) when filtered by location.
+        """
+        sql = f"SELECT {EVENT_COLUMNS} FROM {TABLE_NAME} WHERE starts_at >= ?"
+        params: List[Any] = [since]
+        if location:
+            sql += " AND location = ? COLLATE NOCASE"
+            params.append(location.strip())
+        sql += " ORDER BY starts_at, id LIMIT ?"  # id breaks ties, as in UpcomingCache
+        params.append(limit)
+        async with read_connection(self.db_path) as db:
+            cursor = await db.execute(sql, params)
+            return [row_to_event(row) for row in await cursor.fetchall()]
+
+    async def starting_between(self, start: str, end: str) -> List[Event]:
+        """Events with start <= starts_at < end, soonest first."""
+        async with read_connection(self.db_path) as db:
             cursor = await db.execute(
-                f"SELECT id, title, date, location, performers, description, created_at, updated_at FROM {TABLE_NAME}"
+                f"SELECT {EVENT_COLUMNS} FROM {TABLE_NAME} "
+                "WHERE starts_at >= ? AND starts_at < ? ORDER BY starts_at, id",
+                (start, end),
             )
-            rows = await cursor.fetchall()
-            return [
-                Event(
-                    id=row[0],
-                    title=row[1],
-                    date=row[2],
-                    location=row[3],
-                    performers=row[4].split(",") if row[4] else [],
-                    description=row[5],
-                    created_at=row[6],
-                    updated_at=row[7],
+            return [row_to_event(row) for row in await cursor.fetchall()]
+
+    async def get(self, event_id: str, include_archived: bool = False) -> Optional[Event]:
+        tables = (TABLE_NAME, EVENTS_ARCHIVE_TABLE_NAME) if include_archived else (TABLE_NAME,)
+        async with read_connection(self.db_path) as db:
+            for table in tables:
+                cursor = await db.execute(
+                    f"SELECT {EVENT_COLUMNS} FROM {table} WHERE id = ?",
+                    (event_id,),
                 )
-                for row in rows
-            ]
+                row = await cursor.fetchone()
+                if row:
+                    return row_to_event(row)
+            return None
+
+    # `version` is compared only when an expected version is given (CAS);
+    # either way a successful update bumps it and RETURNs the new value.
+    _UPDATE_SQL = f"""
+        UPDATE {TABLE_NAME}
+        SET title = ?, date = ?, location = ?, performers = ?, description = ?, updated_at = ?,
+            organizer_id = ?, category = ?, starts_at = ?, version = version + 1
+        WHERE id = ? AND (? IS NULL OR version = ?)
+        RETURNING version
+    """
 
-    async def get(self, event_id: str) -> Optional[Event]:
-        async with aiosqlite.connect(self.db_path) as db:
+    def _update_params(self, data: Dict[str, Any], expected_version: Optional[int]) -> tuple:
+        return (
+            data.get("title"),
+            data.get("date"),
+            data.get("location"),
+            self._performers_str(data.get("performers", [])),
+            data.get("description"),
+            data.get("updated_at"),
+            data.get("organizer_id"),
+            data.get("category"),
+            data.get("starts_at"),
+            data.get("id"),
+            expected_version,
+            expected_version,
+        )
+
+    async def update(
+        self, event: Union[Event, Dict[str, Any]], expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        """Overwrite an event; return its new version, or None if no row matched
+        (unknown id, or `expected_version` is stale)."""
+        data = self._normalize_event(event)
+
+        async def _update(db):
+            cursor = await db.execute(self._UPDATE_SQL, self._update_params(data, expected_version))
+            row = await cursor.fetchone()
+            if not row:
+                return None
+            await self._write_performers(db, data.get("id"), data["performers"])
+            return row[0]
+
+        new_version = await self.writes.submit(_update)
+        if new_version is not None:
+            self._notify(upserts=[dict(data, version=new_version)])
+        return new_version
+
+    async def patch(
+        self, event_id: str, fields: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> Optional[Event]:
+        """Update only the given columns; return the updated event or None if no
+        row matched (unknown id, or `expected_version` is stale)."""
+        changes = {k: v for k, v in fields.items() if k in PATCHABLE_FIELDS}
+        performers = None
+        if "performers" in changes:
+            performers = self._normalize_event({"performers": changes["performers"]})["performers"]
+            changes["performers"] = self._performers_str(performers)
+        if "category" in changes:
+            changes["category"] = self._normalize_event({"category": changes["category"]})["category"]
+        if "date" in changes:
+            changes["starts_at"] = normalize_starts_at(changes["date"])
+        if "updated_at" in fields:
+            changes["updated_at"] = fields["updated_at"]
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        if assignments:
+            assignments += ", "
+
+        async def _patch(db):
             cursor = await db.execute(
                 f"""
-                SELECT id, title, date, location, performers, description, created_at, updated_at
-                FROM {TABLE_NAME}
-                WHERE id = ?
+                UPDATE {TABLE_NAME}
+                SET {assignments}version = version + 1
+                WHERE id = ? AND (? IS NULL OR version = ?)
+                RETURNING {EVENT_COLUMNS}
             """,
-                (event_id,),
+                (*changes.values(), event_id, expected_version, expected_version),
             )
             row = await cursor.fetchone()
-            if row:
-                return Event(
-                    id=row[0],
-                    title=row[1],
-                    date=row[2],
-                    location=row[3],
-                    performers=row[4].split(",") if row[4] else [],
-                    description=row[5],
-                    created_at=row[6],
-                    updated_at=row[7],
-                )
-            return None
+            if row and performers is not None:
+                await self._write_performers(db, event_id, performers)
+            return row_to_event(row) if row else None
 
-    async def update(self, event: Event) -> bool:
-        data = self._normalize_event(event)
-        async with aiosqlite.connect(self.db_path) as db:
+        patched = await self.writes.submit(_patch)
+        if patched is not None:
+            self._notify(upserts=[patched])
+        return patched
+
+    async def delete(
+        self, event_id: str, expected_version: Optional[int] = None, notify: bool = True
+    ) -> int:
+        """Delete one event; with `expected_version`, only while it still has
+        that version (0 otherwise)."""
+        sql, params = f"DELETE FROM {TABLE_NAME} WHERE id = ?", [event_id]
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params.append(expected_version)
+
+        async def _delete(db):
             before = db.total_changes
-            await db.execute(
+            await db.execute(sql, params)
+            return db.total_changes - before
+
+        deleted = await self.writes.submit(_delete)
+        if deleted and notify:
+            self._notify(deletes=[event_id])
+        return deleted
+
+    # -----------------------------------------------------
+    # Batch operations: one connection / one transaction each
+    # -----------------------------------------------------
+
+    async def _existing_ids(self, db, ids: Sequence[str]) -> List[str]:
+        found = []
+        for chunk in chunked(ids):
+            cursor = await db.execute(
+                f"SELECT id FROM {TABLE_NAME} WHERE id IN ({placeholders(len(chunk))})",
+                tuple(chunk),
+            )
+            found.extend(row[0] for row in await cursor.fetchall())
+        return found
+
+    async def known_ids(self, event_ids: Sequence[str]) -> List[str]:
+        """The given IDs that exist in the events table."""
+        async with read_connection(self.db_path) as db:
+            return await self._existing_ids(db, list(dict.fromkeys(event_ids)))
+
+    async def get_many(self, event_ids: Sequence[str], include_archived: bool = False) -> List[Event]:
+        """Fetch several events by ID (missing IDs are skipped)."""
+        events: List[Event] = []
+        wanted = list(dict.fromkeys(event_ids))
+        tables = (TABLE_NAME, EVENTS_ARCHIVE_TABLE_NAME) if include_archived else (TABLE_NAME,)
+        async with read_connection(self.db_path) as db:
+            for table in tables:
+                for chunk in chunked(wanted):
+                    cursor = await db.execute(
+                        f"SELECT {EVENT_COLUMNS} FROM {table} "
+                        f"WHERE id IN ({placeholders(len(chunk))})",
+                        tuple(chunk),
+                    )
+                    events.extend(row_to_event(row) for row in await cursor.fetchall())
+                found = {e.id for e in events}
+                wanted = [i for i in wanted if i not in found]
+        return events
+
+    async def find_by_titles(self, titles: Sequence[str]) -> List[Event]:
+        """Case/whitespace-insensitive exact title lookup (uses the title index)."""
+        keys = list(dict.fromkeys(t.strip().lower() for t in titles if t and t.strip()))
+        events: List[Event] = []
+        async with read_connection(self.db_path) as db:
+            for chunk in chunked(keys):
+                cursor = await db.execute(
+                    f"SELECT {EVENT_COLUMNS} FROM {TABLE_NAME} "
+                    f"WHERE LOWER(TRIM(title)) IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+                events.extend(row_to_event(row) for row in await cursor.fetchall())
+        return events
+
+    async def update_many(
+        self, events: Sequence[Union[Event, Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Update several events in one transaction.
+
+        An event carrying a `version` is only written if that version is still
+        current. Returns {"updated": {id: new_version}, "conflicts": [ids]};
+        IDs in neither don't exist.
+        """
+        rows = [self._normalize_event(e) for e in events]
+
+        async def _update_many(db):
+            existing = set(await self._existing_ids(db, [r["id"] for r in rows]))
+            updated: Dict[str, int] = {}
+            conflicts: List[str] = []
+            for r in rows:
+                if r["id"] not in existing:
+                    continue
+                cursor = await db.execute(
+                    self._UPDATE_SQL, self._update_params(r, r.get("version"))
+                )
+                row = await cursor.fetchone()
+                if row:
+                    updated[r["id"]] = row[0]
+                    await self._write_performers(db, r["id"], r["performers"])
+                else:
+                    conflicts.append(r["id"])
+            return {"updated": updated, "conflicts": conflicts}
+
+        result = await self.writes.submit(_update_many)
+        versions = result["updated"]
+        self._notify(upserts=[dict(r, version=versions[r["id"]]) for r in rows if r["id"] in versions])
+        return result
+
+    async def delete_many(self, event_ids: Sequence[str]) -> List[str]:
+        """Delete several events in one transaction; return the IDs deleted."""
+        ids = list(dict.fromkeys(event_ids))
+
+        async def _delete_many(db):
+            existing = await self._existing_ids(db, ids)
+            for chunk in chunked(existing):
+                await db.execute(
+                    f"DELETE FROM {TABLE_NAME} WHERE id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+            return existing
+
+        deleted = await self.writes.submit(_delete_many)
+        self._notify(deletes=deleted)
+        return deleted
+
+    async def import_events(
+        self, events: Sequence[Union[Event, Dict[str, Any]]], notify: bool = True
+    ) -> int:
+        """Write events exactly as given, `version` and timestamps included,
+        replacing rows with the same id; one transaction for the lot.
+
+        For moving rows between databases and bulk loads, not API writes.
+        """
+        rows = [self._normalize_event(e) for e in events]
+        params = [
+            (
+                r.get("id"),
+                r.get("title"),
+                r.get("date"),
+                r.get("location"),
+                self._performers_str(r["performers"]),
+                r.get("description"),
+                r.get("created_at"),
+                r.get("updated_at"),
+                r.get("organizer_id"),
+                r.get("category"),
+                r.get("version") or 1,
+                r.get("starts_at"),
+            )
+            for r in rows
+        ]
+
+        async def _import(db):
+            # An upsert rather than INSERT OR REPLACE, whose delete would
+            # bypass the performers cascade.
+            await db.executemany(
                 f"""
-                UPDATE {TABLE_NAME}
-                SET title = ?, date = ?, location = ?, performers = ?, description = ?, updated_at = ?
-                WHERE id = ?
+                INSERT INTO {TABLE_NAME} ({EVENT_COLUMNS}, starts_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title, date = excluded.date, location = excluded.location,
+                    performers = excluded.performers, description = excluded.description,
+                    created_at = excluded.created_at, updated_at = excluded.updated_at,
+                    organizer_id = excluded.organizer_id, category = excluded.category,
+                    version = excluded.version, starts_at = excluded.starts_at
             """,
-                (
-                    data.get("title"),
-                    data.get("date"),
-                    data.get("location"),
-                    self._performers_str(data.get("performers", [])),
-                    data.get("description"),
-                    data.get("updated_at"),
-                    data.get("id"),
-                ),
+                params,
             )
-            await db.commit()
-            return (db.total_changes - before) > 0
+            for chunk in chunked([r["id"] for r in rows]):
+                await db.execute(
+                    f"DELETE FROM {EVENT_PERFORMERS_TABLE_NAME} "
+                    f"WHERE event_id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+            await db.executemany(
+                f"INSERT OR IGNORE INTO {EVENT_PERFORMERS_TABLE_NAME} (event_id, performer) VALUES (?, ?)",
+                [(r["id"], name.strip()) for r in rows for name in r["performers"] if name and name.strip()],
+            )
+            return len(rows)
 
-    async def delete(self, event_id: str) -> int:
-        async with aiosqlite.connect(self.db_path) as db:
-            before = db.total_changes
-            await db.execute(
-                f"DELETE FROM {TABLE_NAME} WHERE id = ?", (event_id,)
+        imported = await self.writes.submit(_import)
+        if notify:
+            self._notify(upserts=[dict(r, version=p[10]) for r, p in zip(rows, params)])
+        return imported
+
+    async def detach_organizers(self, organizer_ids: Sequence[str]) -> int:
+        """Clear organizer_id on events of deleted organizers (what ON DELETE
+        SET NULL does when the organizers live in the same file), archived
+        ones included. Returns how many live events changed."""
+        ids = list(dict.fromkeys(organizer_ids))
+
+        async def _detach(db):
+            detached = 0
+            for chunk in chunked(ids):
+                before = db.total_changes
+                await db.execute(
+                    f"UPDATE {TABLE_NAME} SET organizer_id = NULL "
+                    f"WHERE organizer_id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+                detached += db.total_changes - before
+                await db.execute(
+                    f"UPDATE {EVENTS_ARCHIVE_TABLE_NAME} SET organizer_id = NULL "
+                    f"WHERE organizer_id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+            return detached
+
+        return await self.writes.submit(_detach) if ids else 0
+
+    # -----------------------------------------------------
+    # Analytics
+    # -----------------------------------------------------
+
+    # Analytics and the calendar count archived events too. While the archive
+    # is empty they read `events` alone, which keeps the index-only plans.
+
+    async def analytics_query(self, query: AnalyticsQuery) -> List[tuple]:
+        """Run an AnalyticsQuery as one SQL statement; rows are (group, value[, label])."""
+        async with read_connection(self.db_path) as db:
+            sql, params = compile_analytics_query(query, archived=await archive.has_archived(db))
+            cursor = await db.execute(sql, params)
+            return await cursor.fetchall()
+
+    async def analytics_pairs(self, query: AnalyticsQuery) -> List[tuple]:
+        """The distinct (group, value) pairs behind a "distinct" AnalyticsQuery,
+        for merging counts across databases."""
+        async with read_connection(self.db_path) as db:
+            sql, params = compile_analytics_pairs(query, archived=await archive.has_archived(db))
+            cursor = await db.execute(sql, params)
+            return await cursor.fetchall()
+
+    async def calendar(
+        self, start: str, end: str, bucket: CalendarBucket, include_ids: bool = False
+    ) -> List[tuple]:
+        """Rows of (bucket, count[, ids JSON]) for events in [start, end) by `starts_at`."""
+        async with read_connection(self.db_path) as db:
+            sql, params = compile_calendar_query(
+                start, end, bucket, include_ids, archived=await archive.has_archived(db)
             )
-            await db.commit()
-            return db.total_changes - before
+            cursor = await db.execute(sql, params)
+            return await cursor.fetchall()
+
+    async def table_version(self) -> int:
+        """Change counter of the events table (see repos/table_versions.py)."""
+        async with read_connection(self.db_path) as db:
+            return await table_versions.get_version(db, TABLE_NAME)
+
+    async def database_id(self) -> str:
+        """Random id of the database file: a recreated file gets a new one."""
+        async with read_connection(self.db_path) as db:
+            return await table_versions.get_database_id(db)
+
+    @asynccontextmanager
+    async def feed_snapshot(
+        self,
+        location: Optional[str] = None,
+        performer: Optional[str] = None,
+        organizer_id: Optional[str] = None,
+        batch_size: int = MAX_IN_PARAMS,
+    ) -> AsyncIterator[Tuple[int, AsyncIterator[List[Tuple[Event, str]]]]]:
+        """Dated events matching the filters, soonest first, read from one snapshot.
+
+        Yields (table version, async iterator of batches of (event, starts_at)).
+        The version and rows come from the same read transaction, so they
+        agree even if writes land while the batches are consumed.
+        """
+        sql = f"SELECT {EVENT_COLUMNS}, starts_at FROM {TABLE_NAME} WHERE starts_at IS NOT NULL"
+        params: List[Any] = []
+        if location:
+            sql += " AND location = ? COLLATE NOCASE"
+            params.append(location.strip())
+        if organizer_id:
+            sql += " AND organizer_id = ?"
+            params.append(organizer_id)
+        if performer:
+            sql += (
+                f" AND id IN (SELECT event_id FROM {EVENT_PERFORMERS_TABLE_NAME} "
+                "WHERE performer = ? COLLATE NOCASE)"
+            )
+            params.append(performer.strip())
+        sql += " ORDER BY starts_at, id"
+        async with read_connection(self.db_path) as db:
+            await db.execute("BEGIN")  # the pool rolls it back on release
+            version = await table_versions.get_version(db, TABLE_NAME)
+            cursor = await db.execute(sql, params)
+
+            async def batches():
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield [(row_to_event(row), row[11]) for row in rows]
+
+            yield version, batches()
+
+    # -----------------------------------------------------
+    # Archive (see repos/archive.py)
+    # -----------------------------------------------------
+
+    async def archive_before(self, cutoff: str, limit: int) -> List[Event]:
+        """Move up to `limit` events with starts_at < `cutoff` into the archive,
+        adding them to the history aggregates in the same transaction.
+
+        Returns the moved events; listeners see them deleted, archive
+        listeners see them added.
+        """
+
+        async def _archive(db):
+            cursor = await db.execute(
+                f"SELECT {EVENT_COLUMNS} FROM {TABLE_NAME} "
+                "WHERE starts_at < ? ORDER BY starts_at LIMIT ?",
+                (cutoff, limit),
+            )
+            rows = await cursor.fetchall()
+            ids = [row[0] for row in rows]
+            archived_at = datetime.now().isoformat()
+            for chunk in chunked(ids):
+                marks = placeholders(len(chunk))
+                await db.execute(
+                    f"INSERT OR REPLACE INTO {EVENTS_ARCHIVE_TABLE_NAME} ({EVENT_COLUMNS}, starts_at, archived_at) "
+                    f"SELECT {EVENT_COLUMNS}, starts_at, ? FROM {TABLE_NAME} WHERE id IN ({marks})",
+                    (archived_at, *chunk),
+                )
+                # event_performers rows go with the event (ON DELETE CASCADE): keep a copy.
+                await db.execute(
+                    f"DELETE FROM {EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME} WHERE event_id IN ({marks})",
+                    tuple(chunk),
+                )
+                await db.execute(
+                    f"INSERT INTO {EVENTS_ARCHIVE_PERFORMERS_TABLE_NAME} (event_id, performer) "
+                    f"SELECT event_id, performer FROM {EVENT_PERFORMERS_TABLE_NAME} WHERE event_id IN ({marks})",
+                    tuple(chunk),
+                )
+                await db.execute(f"DELETE FROM {TABLE_NAME} WHERE id IN ({marks})", tuple(chunk))
+            await archive.add_to_history(db, ((row[3], row[4]) for row in rows))
+            return [row_to_event(row) for row in rows]
+
+        moved = await self.writes.submit(_archive)
+        self._notify(deletes=[e.id for e in moved])
+        if moved:
+            for listener in self._archive_listeners:
+                listener(moved, ())
+        return moved
+
+    async def history_counts(self, dimension: str) -> Dict[str, int]:
+        """Archived events per value of an event_history dimension."""
+        async with read_connection(self.db_path) as db:
+            cursor = await db.execute(
+                f"SELECT value, events FROM {EVENT_HISTORY_TABLE_NAME} WHERE dimension = ?",
+                (dimension,),
+            )
+            return dict(await cursor.fetchall())
+
+    async def locations(self) -> List[str]:
+        """Distinct locations of live and archived events (one spelling each)."""
+        async with read_connection(self.db_path) as db:
+            cursor = await db.execute(
+                f"SELECT location FROM {TABLE_NAME} WHERE location IS NOT NULL "
+                f"UNION SELECT location FROM {EVENTS_ARCHIVE_TABLE_NAME} WHERE location IS NOT NULL"
+            )
+            return list({row[0].strip().lower(): row[0] for row in await cursor.fetchall()}.values())
+
+    # -----------------------------------------------------
+    # Maintenance (see repos/maintenance.py)
+    # -----------------------------------------------------
+
+    async def reconcile_aggregates(self) -> Dict[str, int]:
+        """Repair derived tables that disagree with their source rows:
+        event_performers vs events.performers, event_history vs the archive.
+
+        Returns how many events / history rows were rewritten.
+        """
+        # Find suspects on a read connection so the write lock is only held
+        # for the rows that actually need fixing.
+        async with read_connection(self.db_path) as db:
+            cursor = await db.execute(
+                f"SELECT e.id, e.performers, group_concat(p.performer, char(31)) "
+                f"FROM {TABLE_NAME} e LEFT JOIN {EVENT_PERFORMERS_TABLE_NAME} p ON p.event_id = e.id "
+                "GROUP BY e.id"
+            )
+            suspects = [
+                event_id
+                for event_id, performers, stored in await cursor.fetchall()
+                if self._performer_set(performers) != set((stored or "").split("\x1f")) - {""}
+            ]
+
+        async def _reconcile(db):
+            fixed = 0
+            for chunk in chunked(suspects):
+                cursor = await db.execute(
+                    f"SELECT id, performers FROM {TABLE_NAME} WHERE id IN ({placeholders(len(chunk))})",
+                    tuple(chunk),
+                )
+                for event_id, performers in await cursor.fetchall():
+                    await self._write_performers(db, event_id, (performers or "").split(","))
+                    fixed += 1
+            return {
+                EVENT_PERFORMERS_TABLE_NAME: fixed,
+                EVENT_HISTORY_TABLE_NAME: await archive.reconcile_history(db),
+            }
+
+        return await self.writes.submit(_reconcile)
+
+    @staticmethod
+    def _performer_set(performers: Optional[str]) -> set:
+        return {p.strip() for p in (performers or "").split(",") if p.strip()}
@@ -0,0 +1,369 @@
+"""Recommendations of "similar events" from event text.
+
+Each event becomes a sparse TF-IDF vector over its title words, description
+words and performers (a performer is one term, "@a r rahman", so shared
+artists count for more than shared words). Two events are as similar as
+the cosine of their vectors.
+
+A query walks an inverted index from the event's rarest terms to its most
+common ones, adding up partial scores until SIMILAR_POSTINGS_BUDGET postings
+have been read. Very common words ("festival", "night") carry little weight
+and are what that budget cuts off. The best candidates are then re-scored
+exactly. A lookup costs about the same on 100k events as on 1k.
+
+Like the other snapshots it is built from `Repo.list()` on first use and kept
+current by the repo's write listener. Postings live in `array`s; removed
+events leave holes that are compacted away once they outnumber the live ones.
+With a `path`, the index is saved there on shutdown, tagged with the
+database's id and events table version, and loaded back instead of rebuilt
+while both still hold. The file is a JSON header followed by the raw bytes of
+the `array`s, so reading it can't run code the way unpickling can.
+"""
+import json
+import logging
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from collections import Counter, defaultdict
+from heapq import nlargest
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from constants import SIMILAR_POSTINGS_BUDGET
+from repos.event_index import RepoSnapshot, event_field
+from repos.fuzzy_index import normalize
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"FCSIMIDX"
+_FORMAT = 2  # bump when the saved layout changes
+_COMPACT_MIN_DEAD = 1000
+_RERANK = 64  # candidates re-scored exactly per query (at least)
+_DESCRIPTION_WORDS = 300  # longer descriptions are cut
+
+# Field weights: a title word says more than a description word, a shared
+# performer more than either.
+_TITLE = 2.0
+_DESCRIPTION = 1.0
+_PERFORMER = 3.0
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or the this to was will with".split()
+)
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return [w for w in normalize(text).split() if len(w) > 1 and w not in _STOPWORDS]
+
+
+def event_terms(event: Any) -> Dict[str, float]:
+    """Term -> weight (sublinear in how often and where the term appears)."""
+    raw: Dict[str, float] = Counter()
+    for word in _words(event_field(event, "title")):
+        raw[word] += _TITLE
+    for word in _words(event_field(event, "description"))[:_DESCRIPTION_WORDS]:
+        raw[word] += _DESCRIPTION
+    performers = event_field(event, "performers") or []
+    if isinstance(performers, str):
+        performers = performers.split(",")
+    for performer in performers:
+        name = normalize(performer)
+        if name:
+            raw[f"@{name}"] += _PERFORMER
+    return {term: 1.0 + math.log(weight) for term, weight in raw.items()}
+
+
+def _flatten(parts: Sequence[Optional[array]], typecode: str) -> Tuple[array, array]:
+    """(lengths, concatenation) of `parts`; a removed (None) part has length -1."""
+    lengths, flat = array("i"), array(typecode)
+    for part in parts:
+        if part is None:
+            lengths.append(-1)
+        else:
+            lengths.append(len(part))
+            flat.extend(part)
+    return lengths, flat
+
+
+def _split(lengths: array, flat: array) -> List[Optional[array]]:
+    parts: List[Optional[array]] = []
+    at = 0
+    for length in lengths:
+        if length < 0:
+            parts.append(None)
+        else:
+            parts.append(flat[at : at + length])
+            at += length
+    if at != len(flat):
+        raise ValueError("section lengths don't add up")
+    return parts
+
+
+def _write_file(f: BinaryIO, header: Dict[str, Any], sections: Sequence[array]):
+    header = dict(
+        header,
+        format=_FORMAT,
+        byteorder=sys.byteorder,
+        sections=[[part.typecode, part.itemsize, len(part)] for part in sections],
+    )
+    encoded = json.dumps(header).encode()
+    f.write(_MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+    for part in sections:
+        part.tofile(f)
+
+
+def _read_file(f: BinaryIO) -> Tuple[Dict[str, Any], List[array]]:
+    if f.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError("not a similar-events index")
+    (size,) = struct.unpack("<Q", f.read(8))
+    header = json.loads(f.read(size))
+    if header["format"] != _FORMAT or header["byteorder"] != sys.byteorder:
+        raise ValueError("written by another version or platform")
+    sections = []
+    for typecode, itemsize, count in header["sections"]:
+        if typecode not in ("i", "f"):
+            raise ValueError(f"unexpected array type {typecode!r}")
+        part = array(typecode)
+        if part.itemsize != itemsize:
+            raise ValueError("written on another platform")
+        part.fromfile(f, count)
+        sections.append(part)
+    return header, sections
+
+
+class SimilarEventsIndex(RepoSnapshot):
+    """TF-IDF nearest neighbours over event text (see the module docstring)."""
+
+    def __init__(self, max_age: float = 0, path: Optional[str] = None):
+        # Other workers' writes never reach this process's copy, so a saved
+        # file can't be trusted when snapshots expire (multi-worker).
+        self.path = path if max_age <= 0 else None
+        self._restore_tried = False
+        super().__init__(max_age)
+
+    def _clear(self):
+        self._term_of: Dict[str, int] = {}
+        self.df = array("i")  # live events per term
+        self._post_slots: List[array] = []  # term -> slots (dead ones included until compaction)
+        self._post_weights: List[array] = []
+        self.ids: List[Optional[str]] = []  # slot -> event id, None once removed
+        self._slot_of: Dict[str, int] = {}
+        self._terms: List[Optional[array]] = []
+        self._weights: List[Optional[array]] = []
+        self._norms = array("f")  # without idf; only ranks candidates before the exact pass
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    # -----------------------------------------------------
+    # Incremental maintenance
+    # -----------------------------------------------------
+
+    def _append(self, event: Any):
+        event_id = event_field(event, "id")
+        if not event_id:
+            return
+        slot = len(self.ids)
+        vector = event_terms(event)
+        term_of, df, post_slots, post_weights = self._term_of, self.df, self._post_slots, self._post_weights
+        terms = array("i")
+        for term, weight in vector.items():
+            code = term_of.get(term)
+            if code is None:
+                code = term_of[term] = len(df)
+                df.append(0)
+                post_slots.append(array("i"))
+                post_weights.append(array("f"))
+            df[code] += 1
+            post_slots[code].append(slot)
+            post_weights[code].append(weight)
+            terms.append(code)
+        weights = array("f", vector.values())
+        self.ids.append(event_id)
+        self._slot_of[event_id] = slot
+        self._terms.append(terms)
+        self._weights.append(weights)
+        self._norms.append(math.sqrt(sum(w * w for w in weights)) or 1.0)
+
+    def _remove(self, event_id: Optional[str]):
+        slot = self._slot_of.pop(event_id, None)
+        if slot is None:
+            return
+        for code in self._terms[slot]:
+            self.df[code] -= 1
+        self.ids[slot] = None
+        self._terms[slot] = self._weights[slot] = None
+        self.dead += 1
+
+    def _applied(self):
+        if self.dead >= _COMPACT_MIN_DEAD and self.dead > len(self._slot_of):
+            self._compact()
+
+    def _compact(self):
+        keep = [slot for slot, event_id in enumerate(self.ids) if event_id is not None]
+        new_slot = {old: new for new, old in enumerate(keep)}
+        for code, slots in enumerate(self._post_slots):
+            pairs = [(new_slot[s], w) for s, w in zip(slots, self._post_weights[code]) if s in new_slot]
+            self._post_slots[code] = array("i", (s for s, _ in pairs))
+            self._post_weights[code] = array("f", (w for _, w in pairs))
+        self.ids = [self.ids[slot] for slot in keep]
+        self._slot_of = {event_id: slot for slot, event_id in enumerate(self.ids)}
+        self._terms = [self._terms[slot] for slot in keep]
+        self._weights = [self._weights[slot] for slot in keep]
+        self._norms = array("f", (self._norms[slot] for slot in keep))
+        self.dead = 0
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+
+    def _idf(self, code: int, total: int) -> float:
+        return math.log((1 + total) / (1 + self.df[code])) + 1.0
+
+    def similar(
+        self, event_id: str, limit: int = 5, budget: int = SIMILAR_POSTINGS_BUDGET
+    ) -> Optional[List[Tuple[str, float]]]:
+        """Up to `limit` (event id, cosine score) pairs, most similar first;
+        None if `event_id` isn't indexed."""
+        slot = self._slot_of.get(event_id)
+        if slot is None:
+            return None
+        total = len(self._slot_of)
+        idf = {code: self._idf(code, total) for code in self._terms[slot]}
+        query = {code: w * idf[code] for code, w in zip(self._terms[slot], self._weights[slot])}
+        query_norm = math.sqrt(sum(v * v for v in query.values()))
+        if not query_norm:
+            return []
+
+        # Rarest terms first; stop once `budget` postings have been read.
+        partial: Dict[int, float] = defaultdict(float)
+        read = 0
+        for code in sorted(query, key=lambda code: self.df[code]):
+            if read >= budget:
+                break
+            slots = self._post_slots[code][: budget - read]
+            read += len(slots)
+            factor = query[code] * idf[code]
+            for other, weight in zip(slots, self._post_weights[code]):
+                partial[other] += factor * weight
+        partial.pop(slot, None)
+
+        candidates = nlargest(
+            max(_RERANK, limit * 4), partial, key=lambda other: partial[other] / self._norms[other]
+        )
+        scored = []
+        for other in candidates:
+            if self.ids[other] is None:
+                continue
+            dot = norm = 0.0
+            for code, weight in zip(self._terms[other], self._weights[other]):
+                value = weight * (idf[code] if code in idf else self._idf(code, total))
+                norm += value * value
+                dot += query.get(code, 0.0) * value
+            if dot > 0:
+                scored.append((dot / (query_norm * math.sqrt(norm)), self.ids[other]))
+        scored.sort(key=lambda hit: (-hit[0], hit[1]))
+        return [(other_id, round(score, 4)) for score, other_id in scored[:limit]]
+
+    # -----------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------
+
+    async def ensure_loaded(self, repo):
+        if self.loaded_at is None and self.path and not self._restore_tried:
+            async with self._lock:
+                if self.loaded_at is None and not self._restore_tried:
+                    self._restore_tried = True
+                    await self._restore(repo)
+        await super().ensure_loaded(repo)
+
+    async def _restore(self, repo):
+        if not os.path.exists(self.path):
+            return
+        database, version = await repo.database_id(), await repo.table_version()
+        start = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                header, state = self._read_state(f)
+        except Exception as exc:
+            # A truncated or corrupt file can fail in many ways: rebuild.
+            logger.warning("Ignoring unreadable similar-events index %s: %s", self.path, exc)
+            return
+        if header.get("database") != database or header.get("version") != version:
+            return  # another (e.g. recreated) database, or written before later writes: rebuild
+        # Writes committed while the file was read were not applied; start over then.
+        if await repo.table_version() != version:
+            return
+        self.__dict__.update(state)
+        self.loaded_at = time.monotonic()
+        logger.info("Loaded similar-events index (%d events) in %.3fs", len(self), time.perf_counter() - start)
+
+    async def save(self, repo):
+        """Write the index to `path` with the database id and current table
+        version (call on shutdown, once writes have stopped)."""
+        if not self.path or self.loaded_at is None:
+            return
+        header = {"database": await repo.database_id(), "version": await repo.table_version()}
+        # A name of its own, so a save that fails halfway never clobbers
+        # (or half-writes) the file another process is reading or writing.
+        directory, name = os.path.split(self.path)
+        fd, partial = tempfile.mkstemp(dir=directory or ".", prefix=name + ".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                self._write_state(f, header)
+            os.replace(partial, self.path)
+        except BaseException:
+            os.unlink(partial)
+            raise
+
+    def _write_state(self, f: BinaryIO, header: Dict[str, Any]):
+        post_lengths, post_slots = _flatten(self._post_slots, "i")
+        _, post_weights = _flatten(self._post_weights, "f")
+        term_lengths, terms = _flatten(self._terms, "i")
+        _, weights = _flatten(self._weights, "f")
+        header = dict(header, terms=sorted(self._term_of, key=self._term_of.get), ids=self.ids)
+        sections = (self.df, post_lengths, post_slots, post_weights, term_lengths, terms, weights, self._norms)
+        _write_file(f, header, sections)
+
+    def _read_state(self, f: BinaryIO) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(header, attributes) from a file written by `_write_state`; raises
+        on anything inconsistent, so a damaged file is never half-used."""
+        header, sections = _read_file(f)
+        df, post_lengths, post_slots, post_weights, term_lengths, terms, weights, norms = sections
+        names, ids = header["terms"], header["ids"]
+        if not all(isinstance(term, str) for term in names) or len(set(names)) != len(names):
+            raise ValueError("bad terms")
+        if not len(names) == len(df) == len(post_lengths) or min(post_lengths, default=0) < 0:
+            raise ValueError("bad postings")
+        if not len(ids) == len(term_lengths) == len(norms):
+            raise ValueError("bad events")
+        state_terms, state_weights = _split(term_lengths, terms), _split(term_lengths, weights)
+        if any((event_id is None) != (codes is None) for event_id, codes in zip(ids, state_terms)):
+            raise ValueError("bad removed events")
+        if not all(event_id is None or isinstance(event_id, str) for event_id in ids):
+            raise ValueError("bad event ids")
+        # Out-of-range slots or term codes would only fail later, in a query.
+        if post_slots and (min(post_slots) < 0 or max(post_slots) >= len(ids)):
+            raise ValueError("bad posting slots")
+        if terms and (min(terms) < 0 or max(terms) >= len(df)):
+            raise ValueError("bad term codes")
+        slot_of = {event_id: slot for slot, event_id in enumerate(ids) if event_id is not None}
+        if len(slot_of) != sum(event_id is not None for event_id in ids):
+            raise ValueError("duplicate event ids")
+        state = {
+            "_term_of": {term: code for code, term in enumerate(names)},
+            "df": df,
+            "_post_slots": _split(post_lengths, post_slots),
+            "_post_weights": _split(post_lengths, post_weights),
+            "ids": ids,
+            "_slot_of": slot_of,
+            "_terms": state_terms,
+            "_weights": state_weights,
+            "_norms": norms,
+            "dead": len(ids) - len(slot_of),
+        }
+        return header, state
@@ -0,0 +1,70 @@
+"""Change counters for tables, maintained by SQLite triggers.
+
+`table_versions` holds one row per tracked table whose `version` is bumped
+by AFTER INSERT/UPDATE/DELETE triggers, in the same transaction as the
+change. Caches of derived output (e.g. the iCalendar feed) key on it: one
+indexed read tells whether anything changed, including writes made by
+another worker process or by hand with the sqlite3 shell.
+
+A counter starts over at 0 in a new database file, so state saved outside
+the file (the similar-events index) is also tagged with `database_id`, a
+random id drawn when the schema is first created.
+"""
+import uuid
+
+from constants import DATABASE_META_TABLE_NAME, TABLE_VERSIONS_TABLE_NAME
+
+
+async def ensure_tracked(db, table: str):
+    """Create the counter row and triggers for `table` (idempotent)."""
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_VERSIONS_TABLE_NAME} (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """
+    )
+    await db.execute(
+        f"INSERT OR IGNORE INTO {TABLE_VERSIONS_TABLE_NAME} (name, version) VALUES (?, 0)", (table,)
+    )
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        await db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{operation.lower()}
+            AFTER {operation} ON {table}
+            BEGIN
+                UPDATE {TABLE_VERSIONS_TABLE_NAME} SET version = version + 1 WHERE name = '{table}';
+            END
+        """
+        )
+
+
+async def get_version(db, table: str) -> int:
+    cursor = await db.execute(
+        f"SELECT version FROM {TABLE_VERSIONS_TABLE_NAME} WHERE name = ?", (table,)
+    )
+    row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+async def ensure_database_id(db):
+    """Draw the file's random id on first use (idempotent)."""
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {DATABASE_META_TABLE_NAME} (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID
+    """
+    )
+    await db.execute(
+        f"INSERT OR IGNORE INTO {DATABASE_META_TABLE_NAME} (name, value) VALUES ('database_id', ?)",
+        (uuid.uuid4().hex,),
+    )
+
+
+async def get_database_id(db) -> str:
+    cursor = await db.execute(f"SELECT value FROM {DATABASE_META_TABLE_NAME} WHERE name = 'database_id'")
+    row = await cursor.fetchone()
+    return row[0] if row else ""
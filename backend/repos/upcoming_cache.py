@@ -0,0 +1,79 @@
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from constants import UPCOMING_CACHE_HOURS, UPCOMING_CACHE_REFRESH_S
+from models.data_models import Event
+from repos.dates import STARTS_AT_FORMAT, normalize_starts_at
+from repos.event_index import RepoSnapshot, event_field
+
+
+def start_of_today() -> str:
+    """`starts_at` lower bound of the upcoming feed: events dated today count."""
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).strftime(STARTS_AT_FORMAT)
+
+
+class UpcomingCache(RepoSnapshot):
+    """Events starting between the start of today and `hours` from now,
+    ordered by `starts_at`.
+
+    Loaded with one indexed range query and updated in place by the repo's
+    write listener; the window is re-read every `refresh_s` seconds so it
+    keeps looking ahead. Everything in the window is cached, so the first N
+    cached matches are the true next N events; when fewer than N match,
+    `upcoming` returns None and the caller queries the database.
+    """
+
+    def __init__(
+        self,
+        hours: int = UPCOMING_CACHE_HOURS,
+        refresh_s: float = UPCOMING_CACHE_REFRESH_S,
+        max_age: float = 0,
+    ):
+        self.hours = hours
+        self.refresh_s = refresh_s
+        self.window: Tuple[str, str] = ("", "")
+        super().__init__(max_age)
+
+    def _clear(self):
+        self._order: List[Tuple[str, str]] = []  # sorted (starts_at, id)
+        self._events: Dict[str, Tuple[str, Event]] = {}
+
+    async def _load(self, repo) -> List[Any]:
+        end = (datetime.now() + timedelta(hours=self.hours)).strftime(STARTS_AT_FORMAT)
+        self.window = (start_of_today(), end)
+        return await repo.starting_between(*self.window)
+
+    def _expired(self) -> bool:
+        if self.refresh_s > 0 and time.monotonic() - self.loaded_at > self.refresh_s:
+            return True
+        return super()._expired()
+
+    def _append(self, event: Any):
+        starts_at = event_field(event, "starts_at") or normalize_starts_at(event_field(event, "date"))
+        if not starts_at or not self.window[0] <= starts_at < self.window[1]:
+            return
+        if not isinstance(event, Event):
+            event = Event(**{name: event.get(name) for name in Event.model_fields if name in event})
+        insort(self._order, (starts_at, event.id))
+        self._events[event.id] = (starts_at, event)
+
+    def _remove(self, event_id: Optional[str]):
+        cached = self._events.pop(event_id, None)
+        if cached:
+            del self._order[bisect_left(self._order, (cached[0], event_id))]
+
+    def upcoming(self, since: str, limit: int, location: Optional[str] = None) -> Optional[List[Event]]:
+        """The next `limit` events from `since`, or None if the window can't tell."""
+        if since < self.window[0]:
+            return None
+        wanted = location.strip().lower() if location else None
+        found: List[Event] = []
+        for _, event_id in self._order[bisect_left(self._order, (since, "")):]:
+            event = self._events[event_id][1]
+            if wanted is None or (event.location or "").lower() == wanted:
+                found.append(event)
+                if len(found) == limit:
+                    return found
+        return None
@@ -0,0 +1,42 @@
+import asyncio
+import hmac
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from constants import ADMIN_TOKEN
+from dependencies import get_container
+from repos import backup
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Admin routes are off unless ADMIN_TOKEN is set, and then need it in X-Admin-Token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled; set ADMIN_TOKEN to enable it")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Missing or wrong X-Admin-Token")
+
+
+@router.post("/backups", status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
+async def create_backup() -> Dict[str, Any]:
+    """Take an online gzip snapshot of the database (writers keep running) and
+    prune old ones; returns the file, sizes and copy/compress timings.
+    With region partitions: {"partitions": [one such report per file]}"""
+    reports = []
+    try:
+        for db_path in get_container().db_paths:
+            reports.append(await asyncio.to_thread(backup.create_backup, db_path))
+    except backup.BackupInProgress:
+        raise HTTPException(status_code=409, detail="A backup is already running")
+    except (OSError, sqlite3.Error) as exc:
+        raise HTTPException(status_code=500, detail=f"Backup failed: {exc}")
+    return reports[0] if get_container().partitions is None else {"partitions": reports}
+
+
+@router.get("/backups", dependencies=[Depends(require_admin)])
+async def list_backups() -> List[Dict[str, Any]]:
+    """Snapshots in the backup directory, newest first"""
+    return backup.list_backups(backup.backup_dir(get_container().db_paths[0]))
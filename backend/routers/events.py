@@ -1,37 +1,163 @@
-from fastapi import APIRouter, status
-from typing import List, Dict, Any
-from models.data_models import Event
+from fastapi import APIRouter, Body, Depends, Header, Query, status
+from typing import Annotated, List, Literal, Dict, Any, Optional
+from constants import FUZZY_MIN_SCORE
+from models.data_models import MAX_BATCH_SIZE, MAX_FUZZY_MATCHES, MAX_SIMILAR_EVENTS, MAX_UPCOMING_EVENTS, AnalyticsQuery, BatchIds, CalendarBucket, Event, EventPatch
 from services.service import Service
-from repos.repo import Repo
-from constants import DB_NAME
+from dependencies import get_service
+from routers.preconditions import etag_matches, parse_if_match, set_etag
 from fastapi import Response
+from fastapi.responses import StreamingResponse
 
 router = APIRouter()
-repo = Repo(DB_NAME)
-service = Service(repo)
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=Event)
-async def create_event(event: Event):
-    """Create a new festival event"""
-    return await service.create_event(event)
+async def create_event(
+    event: Event,
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
+    service: Service = Depends(get_service),
+):
+    """Create a new festival event (send `Idempotency-Key` to make retries safe)"""
+    return await service.create_event(event, idempotency_key=idempotency_key)
 
 @router.get("/", response_model=List[Event])
-async def get_all_events():
-    """Retrieve all festival events"""
-    return await service.get_all_events()
+async def get_all_events(include_archived: bool = False, service: Service = Depends(get_service)):
+    """Retrieve all festival events (`include_archived` adds archived past events)"""
+    return await service.get_all_events(include_archived=include_archived)
+
+# -----------------------------------------------------
+# Batch endpoints: one query / one transaction per request
+# -----------------------------------------------------
+
+@router.post("/batch-get")
+async def batch_get_events(body: BatchIds, service: Service = Depends(get_service)) -> Dict[str, Any]:
+    """Retrieve several events by ID"""
+    return await service.get_events(body.ids)
+
+@router.post("/batch-update")
+async def batch_update_events(
+    events: List[Event] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
+    """Update several events (each must carry its id)"""
+    return await service.update_events(events)
+
+@router.post("/batch-delete")
+async def batch_delete_events(body: BatchIds, service: Service = Depends(get_service)) -> Dict[str, Any]:
+    """Delete several events by ID"""
+    return await service.delete_events(body.ids)
+
+# Fixed paths must be declared before `/{event_id}`.
+
+@router.get("/calendar")
+async def event_calendar(
+    date_from: Optional[str] = Query(default=None, alias="from"),
+    date_to: Optional[str] = Query(default=None, alias="to"),
+    bucket: CalendarBucket = "month",
+    include_ids: bool = False,
+    include_empty: bool = False,
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
+    """Event counts per day/week/month between `from` and `to` (inclusive),
+    optionally with the event IDs in each bucket and zero-count buckets"""
+    return await service.get_calendar(
+        date_from, date_to, bucket, include_ids=include_ids, include_empty=include_empty
+    )
+
+@router.get("/calendar.ics", response_class=StreamingResponse)
+async def calendar_feed(
+    location: Optional[str] = None,
+    performer: Optional[str] = None,
+    organizer_id: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    service: Service = Depends(get_service),
+):
+    """iCalendar feed of dated events for calendar subscriptions, optionally
+    filtered (send `If-None-Match` to get 304 while nothing changed)"""
+    etag, body = await service.get_ical_feed(location, performer, organizer_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return StreamingResponse(body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+@router.get("/upcoming")
+async def upcoming_events(
+    limit: int = Query(default=10, ge=1, le=MAX_UPCOMING_EVENTS),
+    location: Optional[str] = None,
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
+    """Next events from today onwards, soonest first"""
+    events = await service.get_upcoming_events(limit=limit, location=location)
+    return {"count": len(events), "events": events}
+
+@router.get("/search")
+async def fuzzy_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    field: Literal["title", "location"] = "title",
+    limit: int = Query(default=5, ge=1, le=MAX_FUZZY_MATCHES),
+    min_score: float = Query(default=FUZZY_MIN_SCORE, ge=0, le=1),
+    include_archived: bool = False,
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
+    """Ranked fuzzy matches for a misspelt/partial event title or location"""
+    if field == "location":
+        return await service.find_locations_fuzzy(
+            q, limit=limit, min_score=min_score, include_archived=include_archived
+        )
+    return await service.find_events_fuzzy(
+        q, limit=limit, min_score=min_score, include_archived=include_archived
+    )
 
 @router.get("/{event_id}", response_model=Event)
-async def get_event(event_id: str):
-    """Retrieve a single event by ID"""
-    return await service.get_event(event_id)
+async def get_event(
+    event_id: str,
+    response: Response,
+    include_archived: bool = False,
+    service: Service = Depends(get_service),
+):
+    """Retrieve a single event by ID (the ETag is its version)"""
+    event = await service.get_event(event_id, include_archived=include_archived)
+    set_etag(response, event.version)
+    return event
+
+@router.get("/{event_id}/similar")
+async def similar_events(
+    event_id: str,
+    limit: int = Query(default=5, ge=1, le=MAX_SIMILAR_EVENTS),
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
+    """Events most like this one by title, description and performers, with a 0-1 score"""
+    return await service.find_similar_events(event_id, limit=limit)
 
 @router.put("/{event_id}", response_model=Event)
-async def update_event(event_id: str, event: Event):
-    """Update an existing event"""
-    return await service.update_event(event_id, event)
+async def update_event(
+    event_id: str,
+    event: Event,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    service: Service = Depends(get_service),
+):
+    """Update an existing event (412 if `If-Match` / body version is stale)"""
+    updated = await service.update_event(event_id, event, expected_version=parse_if_match(if_match))
+    set_etag(response, updated.version)
+    return updated
+
+@router.patch("/{event_id}", response_model=Event)
+async def patch_event(
+    event_id: str,
+    patch: EventPatch,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    service: Service = Depends(get_service),
+):
+    """Update only the fields sent in the body (412 if `If-Match` is stale)"""
+    updated = await service.patch_event(
+        event_id, patch.model_dump(exclude_unset=True), expected_version=parse_if_match(if_match)
+    )
+    set_etag(response, updated.version)
+    return updated
 
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_event(event_id: str):
+async def delete_event(event_id: str, service: Service = Depends(get_service)):
     """Delete an event"""
     await service.delete_event(event_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -42,49 +168,62 @@ async def delete_event(event_id: str):
 # -----------------------------------------------------
 
 @router.get("/analytics/total")
-async def total_events() -> Dict[str, int]:
+async def total_events(service: Service = Depends(get_service)) -> Dict[str, int]:
     """Return total number of events"""
     total = await service.get_total_events()
     return {"total_events": total}
 
 
 @router.get("/analytics/this-month")
-async def events_this_month() -> Dict[str, Any]:
+async def events_this_month(service: Service = Depends(get_service)) -> Dict[str, Any]:
     """Return events scheduled for the current month"""
     events = await service.get_events_this_month()
     return {"count": len(events), "events": events}
 
 
 @router.get("/analytics/top-city")
-async def city_with_most_events() -> Dict[str, Any]:
+async def city_with_most_events(service: Service = Depends(get_service)) -> Dict[str, Any]:
     """Return the city/location hosting the most events"""
     return await service.get_city_with_most_events()
 
 
 @router.get("/analytics/top-performer")
-async def performer_with_most_events() -> Dict[str, Any]:
+async def performer_with_most_events(service: Service = Depends(get_service)) -> Dict[str, Any]:
     """Return the performer appearing in the most events"""
     return await service.get_top_performer()
 
 
+@router.get("/analytics/query")
+async def analytics_query(
+    query: Annotated[AnalyticsQuery, Query()],
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
+    """Count events (or distinct values) grouped by location, month, year,
+    performer, organizer or category, with optional filters and top-k"""
+    return await service.query_analytics(query)
+
+
 # -----------------------------------------------------
 # Auditing endpoints (Challenge 4)
 # -----------------------------------------------------
 
 @router.get("/audit/most-recent")
-async def most_recent_event() -> Dict[str, Any]:
+async def most_recent_event(service: Service = Depends(get_service)) -> Dict[str, Any]:
     """Return the most recently added event"""
     return await service.get_most_recent_event()
 
 
 @router.get("/audit/last-15-days")
-async def events_last_fifteen_days(days: int = 15) -> Dict[str, Any]:
+async def events_last_fifteen_days(
+    days: int = 15,
+    service: Service = Depends(get_service),
+) -> Dict[str, Any]:
     """List events created in the last N days (default 15)"""
     events = await service.get_recent_events_15_days(days=days)
     return {"count": len(events), "events": events, "days": days}
 
 
 @router.get("/audit/top-location")
-async def location_with_most_history() -> Dict[str, Any]:
+async def location_with_most_history(service: Service = Depends(get_service)) -> Dict[str, Any]:
     """Return the location that has hosted the most past events"""
     return await service.get_location_with_most_past_events()
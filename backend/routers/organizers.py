@@ -1,43 +1,109 @@
-from fastapi import APIRouter, status, Query, Response
-from typing import List, Dict, Any
+from fastapi import APIRouter, Body, Depends, Header, status, Query, Response
+from typing import List, Dict, Any, Optional
 
-from constants import DB_NAME
-from models.data_models import Organizer
-from repos.organizer_repo import OrganizerRepo
+from dependencies import get_organizer_service
+from models.data_models import MAX_BATCH_SIZE, BatchIds, Organizer, OrganizerPatch
+from routers.preconditions import parse_if_match, set_etag
 from services.organizer_service import OrganizerService
 
 
 router = APIRouter()
-repo = OrganizerRepo(DB_NAME)
-service = OrganizerService(repo)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=Organizer)
-async def create_organizer(organizer: Organizer):
-    """Create a new organizer entry."""
-    return await service.create_organizer(organizer)
+async def create_organizer(
+    organizer: Organizer,
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
+    service: OrganizerService = Depends(get_organizer_service),
+):
+    """Create a new organizer entry (send `Idempotency-Key` to make retries safe)."""
+    return await service.create_organizer(organizer, idempotency_key=idempotency_key)
 
 
 @router.get("/", response_model=List[Organizer])
-async def list_organizers():
+async def list_organizers(service: OrganizerService = Depends(get_organizer_service)):
     """List all organizers."""
     return await service.list_organizers()
 
 
+# Batch operations
+
+@router.post("/batch-get")
+async def batch_get_organizers(
+    body: BatchIds,
+    service: OrganizerService = Depends(get_organizer_service),
+) -> Dict[str, Any]:
+    """Get several organizers by ID."""
+    return await service.get_organizers(body.ids)
+
+
+@router.post("/batch-update")
+async def batch_update_organizers(
+    organizers: List[Organizer] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    service: OrganizerService = Depends(get_organizer_service),
+) -> Dict[str, Any]:
+    """Update several organizers (each must carry its organizer_id)."""
+    return await service.update_organizers(organizers)
+
+
+@router.post("/batch-delete")
+async def batch_delete_organizers(
+    body: BatchIds,
+    service: OrganizerService = Depends(get_organizer_service),
+) -> Dict[str, Any]:
+    """Delete several organizers by ID."""
+    return await service.delete_organizers(body.ids)
+
+
 @router.get("/{organizer_id}", response_model=Organizer)
-async def get_organizer(organizer_id: str):
-    """Get a single organizer by ID."""
-    return await service.get_organizer(organizer_id)
+async def get_organizer(
+    organizer_id: str,
+    response: Response,
+    service: OrganizerService = Depends(get_organizer_service),
+):
+    """Get a single organizer by ID (the ETag is its version)."""
+    organizer = await service.get_organizer(organizer_id)
+    set_etag(response, organizer.version)
+    return organizer
 
 
 @router.put("/{organizer_id}", response_model=Organizer)
-async def update_organizer(organizer_id: str, organizer: Organizer):
-    """Update organizer information."""
-    return await service.update_organizer(organizer_id, organizer)
+async def update_organizer(
+    organizer_id: str,
+    organizer: Organizer,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    service: OrganizerService = Depends(get_organizer_service),
+):
+    """Update organizer information (412 if `If-Match` / body version is stale)."""
+    updated = await service.update_organizer(
+        organizer_id, organizer, expected_version=parse_if_match(if_match)
+    )
+    set_etag(response, updated.version)
+    return updated
+
+
+@router.patch("/{organizer_id}", response_model=Organizer)
+async def patch_organizer(
+    organizer_id: str,
+    patch: OrganizerPatch,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    service: OrganizerService = Depends(get_organizer_service),
+):
+    """Update only the fields sent in the body (412 if `If-Match` is stale)."""
+    updated = await service.patch_organizer(
+        organizer_id, patch.model_dump(exclude_unset=True), expected_version=parse_if_match(if_match)
+    )
+    set_etag(response, updated.version)
+    return updated
 
 
 @router.delete("/{organizer_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_organizer(organizer_id: str):
+async def delete_organizer(
+    organizer_id: str,
+    service: OrganizerService = Depends(get_organizer_service),
+):
     """Delete an organizer."""
     await service.delete_organizer(organizer_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -46,19 +112,33 @@ async def delete_organizer(organizer_id: str):
 # Analytics
 
 @router.get("/analytics/company-events")
-async def company_events(company: str = Query(..., description="Company name")):
+async def company_events(
+    company: str = Query(..., description="Company name"),
+    service: OrganizerService = Depends(get_organizer_service),
+):
     """Return how many events are managed by a given company."""
     return await service.events_managed_by_company(company)
 
 
 @router.get("/analytics/top-region")
-async def top_region_for_cultural_events():
+async def top_region_for_cultural_events(
+    service: OrganizerService = Depends(get_organizer_service),
+):
     """Return region hosting maximum cultural events."""
     return await service.region_with_max_cultural_events()
 
 
+@router.get("/analytics/top-organizer")
+async def top_organizer_for_year(
+    year: int = Query(..., ge=1900, le=2999, description="Calendar year"),
+    service: OrganizerService = Depends(get_organizer_service),
+):
+    """Return the organizer linked to the most events dated in `year`."""
+    return await service.top_organizer_for_year(year)
+
+
 @router.get("/analytics/top-organizer-2025")
-async def top_organizer_2025():
+async def top_organizer_2025(service: OrganizerService = Depends(get_organizer_service)):
     """Return organizer handling the most events in 2025."""
     organizer = await service.top_organizer_2025()
     if not organizer:
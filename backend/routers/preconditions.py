@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+
+def etag(version: Optional[int]) -> str:
+    return f'"{version or 1}"'
+
+
+def set_etag(response: Response, version: Optional[int]):
+    response.headers["ETag"] = etag(version)
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Turn an `If-Match: "<version>"` header into the expected version.
+
+    A missing header or `*` means "any version" (unconditional write).
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be a version ETag")
+    return int(value)
+
+
+def etag_matches(if_none_match: Optional[str], current: str) -> bool:
+    """True if an `If-None-Match` header lists `current` (or is `*`); weak
+    comparison, as RFC 9110 prescribes for GET."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        value = candidate.strip()
+        if value == "*":
+            return True
+        if value.startswith("W/"):
+            value = value[2:]
+        if value == current:
+            return True
+    return False
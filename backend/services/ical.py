@@ -0,0 +1,173 @@
+"""iCalendar (RFC 5545) rendering for GET /events/calendar.ics, and the
+cache of rendered feeds.
+
+Calendar apps poll subscribed feeds every few minutes. A rendered feed is
+cached per filter together with the events table version it was read at
+(see repos/table_versions.py), so a poll costs one counter read until an
+event changes; the version is also the feed's ETag, so most polls end in
+304 Not Modified.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from constants import ICAL_CACHE_MAX_BYTES
+from models.data_models import Event
+from repos.dates import STARTS_AT_FORMAT
+
+PRODID = "-//FestiveConnect//Events//EN"
+UID_DOMAIN = "festiveconnect"
+_MAX_LINE_OCTETS = 75
+
+FeedKey = Tuple[str, str, str]  # (location, performer, organizer_id), normalised
+
+
+def feed_key(location: Optional[str], performer: Optional[str], organizer_id: Optional[str]) -> FeedKey:
+    return (
+        (location or "").strip().lower(),
+        (performer or "").strip().lower(),
+        (organizer_id or "").strip(),
+    )
+
+
+def feed_etag(version: int) -> str:
+    return f'"ics-{version}"'
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+        .replace("\r", "")
+    )
+
+
+def _fold(line: str) -> str:
+    """Split a content line into 75-octet pieces (continuations start with a
+    space), never inside a UTF-8 character."""
+    if len(line.encode("utf-8")) <= _MAX_LINE_OCTETS:
+        return line + "\r\n"
+    pieces, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        limit = _MAX_LINE_OCTETS if not pieces else _MAX_LINE_OCTETS - 1
+        if size + width > limit:
+            pieces.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    pieces.append("".join(current))
+    return "\r\n ".join(pieces) + "\r\n"
+
+
+def _utc_stamp(value: Optional[str]) -> Optional[str]:
+    """Local ISO timestamp (created_at/updated_at) as a UTC DATE-TIME."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()  # stored in server local time
+    return parsed.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def calendar_header(name: str) -> str:
+    return "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escape(name)}",
+        )
+    )
+
+
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+
+
+def render_event(event: Event, starts_at: str) -> str:
+    """One VEVENT. Events whose `date` has no time of day are all-day;
+    others use floating local time, as stored."""
+    start = datetime.strptime(starts_at, STARTS_AT_FORMAT)
+    if ":" in (event.date or ""):
+        dtstart = f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}"
+    else:
+        dtstart = f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}"
+    stamp = (
+        _utc_stamp(event.updated_at)
+        or _utc_stamp(event.created_at)
+        or start.strftime("%Y%m%dT%H%M%SZ")
+    )
+    description = event.description or ""
+    if event.performers:
+        performers = f"Performers: {', '.join(event.performers)}"
+        description = f"{description}\n{performers}" if description else performers
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.id}@{UID_DOMAIN}",
+        f"DTSTAMP:{stamp}",
+        f"LAST-MODIFIED:{stamp}",
+        f"SEQUENCE:{max(0, (event.version or 1) - 1)}",
+        dtstart,
+        f"SUMMARY:{_escape(event.title)}",
+        f"LOCATION:{_escape(event.location)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{_escape(description)}")
+    if event.category:
+        lines.append(f"CATEGORIES:{_escape(event.category)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def render_events(events: Iterable[Tuple[Event, str]]) -> str:
+    return "".join(render_event(event, starts_at) for event, starts_at in events)
+
+
+class FeedCache:
+    """Rendered feeds by filter, each tagged with the table version it was
+    read at; least recently used feeds go first past `max_bytes`."""
+
+    def __init__(self, max_bytes: int = ICAL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._feeds: "OrderedDict[FeedKey, Tuple[int, bytes]]" = OrderedDict()
+
+    def get(self, key: FeedKey, version: int) -> Optional[bytes]:
+        entry = self._feeds.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._feeds.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: FeedKey, version: int, body: bytes):
+        old = self._feeds.pop(key, None)
+        if old is not None:
+            self.size -= len(old[1])
+        if old is not None and old[0] > version:
+            self._feeds[key] = old  # a newer render got there first
+            self.size += len(old[1])
+            return
+        if len(body) > self.max_bytes:
+            return
+        self._feeds[key] = (version, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._feeds.popitem(last=False)
+            self.size -= len(evicted)
+
+
+async def stream_once(body: bytes) -> AsyncIterator[bytes]:
+    yield body
@@ -1,27 +1,41 @@
+import sqlite3
 from fastapi import HTTPException
 from uuid import uuid4
 from typing import List, Optional
 
 from models.data_models import Organizer
 from repos.organizer_repo import OrganizerRepo
+from repos.idempotency import IdempotencyKeyReused, fingerprint
 
 
 class OrganizerService:
     def __init__(self, repo: OrganizerRepo):
         self.repo = repo
 
-    async def create_organizer(self, organizer: Organizer) -> Organizer:
+    async def create_organizer(
+        self, organizer: Organizer, idempotency_key: Optional[str] = None
+    ) -> Organizer:
         await self.repo.init_db()
+        request_fingerprint = fingerprint(organizer.model_dump())
         data = organizer.copy()
         data.organizer_id = data.organizer_id or str(uuid4())
 
-        existing = await self.repo.get(data.organizer_id)
-        if existing:
+        try:
+            created = await self.repo.insert(
+                data,
+                idempotency_key=idempotency_key,
+                request_fingerprint=request_fingerprint,
+            )
+        except sqlite3.IntegrityError as exc:
             raise HTTPException(
                 status_code=409, detail="Organizer with this ID already exists"
-            )
-        await self.repo.insert(data)
-        return data
+            ) from exc
+        except IdempotencyKeyReused as exc:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request body",
+            ) from exc
+        return Organizer(**created)
 
     async def list_organizers(self) -> List[Organizer]:
         await self.repo.init_db()
@@ -34,14 +48,39 @@ class OrganizerService:
             raise HTTPException(status_code=404, detail="Organizer not found")
         return organizer
 
-    async def update_organizer(self, organizer_id: str, organizer: Organizer) -> Organizer:
+    async def _raise_not_updated(self, organizer_id: str, expected_version: Optional[int]):
+        if expected_version is not None and await self.repo.get(organizer_id):
+            raise HTTPException(
+                status_code=412,
+                detail="Organizer was modified concurrently; reload it and retry",
+            )
+        raise HTTPException(status_code=404, detail="Organizer not found to update")
+
+    async def update_organizer(
+        self, organizer_id: str, organizer: Organizer, expected_version: Optional[int] = None
+    ) -> Organizer:
         await self.repo.init_db()
         data = organizer.copy()
         data.organizer_id = organizer_id
-        updated = await self.repo.update(data)
-        if not updated:
-            raise HTTPException(status_code=404, detail="Organizer not found to update")
-        return data
+        if expected_version is None:
+            expected_version = data.version
+        new_version = await self.repo.update(data, expected_version)
+        if new_version is None:
+            await self._raise_not_updated(organizer_id, expected_version)
+        # Re-read so the derived event statistics are current.
+        return await self.get_organizer(organizer_id)
+
+    async def patch_organizer(
+        self, organizer_id: str, fields: dict, expected_version: Optional[int] = None
+    ) -> Organizer:
+        await self.repo.init_db()
+        for required in ("name", "company", "region"):
+            if required in fields and not fields[required]:
+                raise HTTPException(status_code=422, detail=f"{required} cannot be empty")
+        new_version = await self.repo.patch(organizer_id, fields, expected_version)
+        if new_version is None:
+            await self._raise_not_updated(organizer_id, expected_version)
+        return await self.get_organizer(organizer_id)
 
     async def delete_organizer(self, organizer_id: str):
         await self.repo.init_db()
@@ -49,6 +88,40 @@ class OrganizerService:
         if deleted == 0:
             raise HTTPException(status_code=404, detail="Organizer not found to delete")
 
+    async def get_organizers(self, organizer_ids: List[str]) -> dict:
+        await self.repo.init_db()
+        organizers = await self.repo.get_many(organizer_ids)
+        found = {o.organizer_id for o in organizers}
+        missing = [i for i in dict.fromkeys(organizer_ids) if i not in found]
+        return {"organizers": organizers, "missing": missing}
+
+    async def update_organizers(self, organizers: List[Organizer]) -> dict:
+        await self.repo.init_db()
+        if any(not o.organizer_id for o in organizers):
+            raise HTTPException(
+                status_code=422, detail="Every organizer in a batch update needs an organizer_id"
+            )
+        result = await self.repo.update_many(organizers)
+        updated_ids = set(result["updated"])
+        conflicts = set(result["conflicts"])
+        updated = await self.repo.get_many(list(updated_ids))
+        return {
+            "updated": updated,
+            "conflicts": list(conflicts),
+            "missing": [
+                o.organizer_id
+                for o in organizers
+                if o.organizer_id not in updated_ids and o.organizer_id not in conflicts
+            ],
+        }
+
+    async def delete_organizers(self, organizer_ids: List[str]) -> dict:
+        await self.repo.init_db()
+        deleted = await self.repo.delete_many(organizer_ids)
+        deleted_set = set(deleted)
+        missing = [i for i in dict.fromkeys(organizer_ids) if i not in deleted_set]
+        return {"deleted": deleted, "missing": missing}
+
     async def events_managed_by_company(self, company: str) -> dict:
         await self.repo.init_db()
         total = await self.repo.events_managed_by_company(company)
@@ -59,7 +132,15 @@ class OrganizerService:
         result = await self.repo.region_with_max_cultural_events()
         return result
 
-    async def top_organizer_2025(self) -> Optional[Organizer]:
+    async def top_organizer_for_year(self, year: int) -> dict:
         await self.repo.init_db()
-        return await self.repo.top_organizer_2025()
+        result = await self.repo.top_organizer_for_year(year)
+        if not result:
+            return {"year": year, "organizer": None, "events": 0}
+        organizer, count = result
+        return {"year": year, "organizer": organizer, "events": count}
+
+    async def top_organizer_2025(self) -> Optional[Organizer]:
+        result = await self.top_organizer_for_year(2025)
+        return result["organizer"]
 
@@ -1,9 +1,20 @@
-from typing import List, Union, Any, Optional
+import json
+import sqlite3
+from typing import AsyncIterator, List, Union, Any, Optional, Tuple
 from fastapi import HTTPException
-from models.data_models import Event
+from constants import FUZZY_MIN_SCORE
+from models.data_models import MAX_CALENDAR_BUCKETS, AnalyticsQuery, CalendarBucket, Event
 from repos.repo import Repo
+from repos.event_index import EventIndex, most_common, to_timestamp
+from repos.dates import parse_event_datetime
+from repos.archive import HISTORY_LOCATION, HISTORY_PERFORMER, HISTORY_TOTAL
+from repos.fuzzy_index import ArchivedTextIndex, EventTextIndex
+from repos.similar_index import SimilarEventsIndex
+from repos.upcoming_cache import UpcomingCache, start_of_today
+from repos.idempotency import IdempotencyKeyReused, fingerprint
+from services import ical
 from uuid import uuid4
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from collections import Counter
 
 EventLike = Union[Event, dict]
@@ -29,19 +40,139 @@ def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
         except Exception:
             return None
 
+def _raise_for_integrity_error(exc: sqlite3.IntegrityError):
+    if "FOREIGN KEY" in str(exc):
+        raise HTTPException(status_code=422, detail="Unknown organizer_id") from exc
+    if "UNIQUE" in str(exc):
+        raise HTTPException(status_code=409, detail="Event already exists") from exc
+    raise exc
+
+
+def _calendar_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    parsed = parse_event_datetime(value)
+    if parsed is None:
+        raise HTTPException(status_code=422, detail=f"`{name}` is not a recognised date: {value!r}")
+    return parsed.date()
+
+def _calendar_week(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+def _calendar_bucket_count(start: date, end: date, bucket: str) -> int:
+    """len(_calendar_buckets(start, end, bucket)), without listing them."""
+    if bucket == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if bucket == "week":
+        return (end - _calendar_week(start)).days // 7 + 1
+    return (end - start).days + 1
+
+def _calendar_buckets(start: date, end: date, bucket: str) -> List[str]:
+    """Every bucket key between two dates, matching repos.analytics.CALENDAR_BUCKETS."""
+    if bucket == "month":
+        keys, year, month = [], start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            keys.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return keys
+    step = timedelta(days=7 if bucket == "week" else 1)
+    current = _calendar_week(start) if bucket == "week" else start
+    keys = [current.isoformat()]
+    while end - current >= step:  # not `current += step` past date.max
+        current += step
+        keys.append(current.isoformat())
+    return keys
+
+def _calendar_end(start: date) -> date:
+    """Last day of the twelve months starting with `start`'s month."""
+    if start.year == date.max.year:
+        return date.max
+    return date(start.year + 1, start.month, 1) - timedelta(days=1)
+
+def _after_day(day: date) -> str:
+    """Exclusive `starts_at` bound just after `day` (24:00 on the last date)."""
+    if day == date.max:
+        return f"{day.isoformat()}T24:00:00"
+    return f"{(day + timedelta(days=1)).isoformat()}T00:00:00"
+
+
+def _idempotency_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=422,
+        detail="Idempotency-Key was already used with a different request body",
+    )
+
+
 class Service:
-    def __init__(self, repo: Repo):
+    def __init__(
+        self,
+        repo: Repo,
+        event_index: Optional[EventIndex] = None,
+        text_index: Optional[EventTextIndex] = None,
+        upcoming_cache: Optional[UpcomingCache] = None,
+        ical_cache: Optional[ical.FeedCache] = None,
+        similar_index: Optional[SimilarEventsIndex] = None,
+    ):
         self.repo = repo
+        # When set, analytics run over this columnar snapshot (kept current by
+        # the repo's write listeners) instead of scanning every Event.
+        self.event_index = event_index
+        # Trigram index for fuzzy title/location lookups; created on first use
+        # if the caller didn't share one.
+        self.text_index = text_index
+        # Hot cache of the next UPCOMING_CACHE_HOURS for get_upcoming_events
+        self.upcoming_cache = upcoming_cache
+        # Fuzzy index over archived events, built on the first search asking for them
+        self.archived_text_index: Optional[ArchivedTextIndex] = None
+        # Rendered iCalendar feeds, valid while the events table version holds
+        self.ical_cache = ical_cache or ical.FeedCache()
+        # TF-IDF neighbours for "similar events"; created on first use if not shared
+        self.similar_index = similar_index
+
+    async def _text_index(self) -> EventTextIndex:
+        if self.text_index is None:
+            self.text_index = EventTextIndex()
+            self.repo.add_listener(self.text_index.apply)
+        await self.text_index.ensure_loaded(self.repo)
+        return self.text_index
+
+    async def _archived_text_index(self) -> ArchivedTextIndex:
+        if self.archived_text_index is None:
+            self.archived_text_index = ArchivedTextIndex()
+            self.repo.add_archive_listener(self.archived_text_index.apply)
+        await self.archived_text_index.ensure_loaded(self.repo)
+        return self.archived_text_index
+
+    async def _similar_index(self) -> SimilarEventsIndex:
+        if self.similar_index is None:
+            self.similar_index = SimilarEventsIndex()
+            self.repo.add_listener(self.similar_index.apply)
+        await self.similar_index.ensure_loaded(self.repo)
+        return self.similar_index
+
+    async def _upcoming_cache(self) -> UpcomingCache:
+        if self.upcoming_cache is None:
+            self.upcoming_cache = UpcomingCache()
+            self.repo.add_listener(self.upcoming_cache.apply)
+        await self.upcoming_cache.ensure_loaded(self.repo)
+        return self.upcoming_cache
+
+    async def _index(self) -> Optional[EventIndex]:
+        if self.event_index is None:
+            return None
+        await self.event_index.ensure_loaded(self.repo)
+        return self.event_index
 
     # -----------------------------------------------------
     # CRUD OPERATIONS
     # -----------------------------------------------------
 
-    async def create_event(self, event: Event) -> Event:
-        """Create a new event"""
+    async def create_event(self, event: Event, idempotency_key: Optional[str] = None) -> Event:
+        """Create a new event (a retry with the same idempotency key replays the first result)"""
         await self.repo.init_db()
 
         event_data = event.dict() if hasattr(event, "dict") else dict(event)
+        request_fingerprint = fingerprint(event_data)
 
         # Add unique ID and created_at timestamp
         event_data["id"] = event_data.get("id") or str(uuid4())
@@ -49,37 +180,130 @@ class Service:
         event_data["created_at"] = event_data.get("created_at") or timestamp
         event_data["updated_at"] = event_data.get("updated_at") or timestamp
 
-        existing = await self.repo.get(event_data["id"])
-        if existing:
-            raise HTTPException(status_code=409, detail="Event already exists")
+        # Duplicate ids are caught by the primary key, not by a read first.
+        try:
+            created = await self.repo.insert(
+                event_data,
+                idempotency_key=idempotency_key,
+                request_fingerprint=request_fingerprint,
+            )
+        except sqlite3.IntegrityError as exc:
+            _raise_for_integrity_error(exc)
+        except IdempotencyKeyReused as exc:
+            raise _idempotency_conflict() from exc
+        return Event(**created)
 
-        await self.repo.insert(event_data)
-        return Event(**event_data)
+    async def get_all_events(self, include_archived: bool = False) -> List[Event]:
+        """Return all events (past the archive horizon only with include_archived)"""
+        await self.repo.init_db()
+        return await self.repo.list(include_archived=include_archived)
 
-    async def get_all_events(self) -> List[Event]:
-        """Return all events"""
+    async def get_upcoming_events(self, limit: int = 10, location: Optional[str] = None) -> List[Event]:
+        """Next events from the start of today, soonest first (optionally in one location)"""
         await self.repo.init_db()
-        return await self.repo.list()
+        since = start_of_today()
+        cache = await self._upcoming_cache()
+        events = cache.upcoming(since, limit, location)
+        if events is None:
+            events = await self.repo.upcoming(since, limit, location)
+        return events
 
-    async def get_event(self, event_id: str) -> Event:
+    async def get_ical_feed(
+        self,
+        location: Optional[str] = None,
+        performer: Optional[str] = None,
+        organizer_id: Optional[str] = None,
+    ) -> Tuple[str, AsyncIterator[bytes]]:
+        """(ETag, body chunks) of the iCalendar feed of dated events, optionally
+        filtered. Served from the cache while the events table is unchanged,
+        otherwise rendered into the cache first: the read snapshot and its
+        pooled connection are released before the client is sent anything."""
+        await self.repo.init_db()
+        key = ical.feed_key(location, performer, organizer_id)
+        version = await self.repo.table_version()
+        cached = self.ical_cache.get(key, version)
+        if cached is not None:
+            return ical.feed_etag(version), ical.stream_once(cached)
+        version, body = await self._render_ical_feed(location, performer, organizer_id)
+        self.ical_cache.put(key, version, body)
+        return ical.feed_etag(version), ical.stream_once(body)
+
+    async def _render_ical_feed(
+        self,
+        location: Optional[str],
+        performer: Optional[str],
+        organizer_id: Optional[str],
+    ) -> Tuple[int, bytes]:
+        """(table version, feed) read from one snapshot."""
+        filters = [f"in {location.strip()}" if location else "", f"with {performer.strip()}" if performer else ""]
+        if organizer_id:
+            filters.append(f"by organizer {organizer_id}")
+        name = " ".join(["FestiveConnect events", *filter(None, filters)])
+        chunks = [ical.calendar_header(name).encode("utf-8")]
+        async with self.repo.feed_snapshot(location, performer, organizer_id) as (version, batches):
+            async for batch in batches:
+                chunks.append(ical.render_events(batch).encode("utf-8"))
+        chunks.append(ical.CALENDAR_FOOTER.encode("utf-8"))
+        return version, b"".join(chunks)
+
+    async def get_event(self, event_id: str, include_archived: bool = False) -> Event:
         """Return single event by ID"""
         await self.repo.init_db()
-        event = await self.repo.get(event_id)
+        event = await self.repo.get(event_id, include_archived=include_archived)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
         return event
 
-    async def update_event(self, event_id: str, event: Event) -> Event:
-        """Update existing event"""
+    async def _raise_not_updated(self, event_id: str, expected_version: Optional[int]):
+        # Only reached when the CAS update matched no row: tell a stale
+        # version (412) apart from a missing event (404).
+        if expected_version is not None and await self.repo.get(event_id):
+            raise HTTPException(
+                status_code=412,
+                detail="Event was modified concurrently; reload it and retry",
+            )
+        raise HTTPException(status_code=404, detail="Event not found to update")
+
+    async def update_event(
+        self, event_id: str, event: Event, expected_version: Optional[int] = None
+    ) -> Event:
+        """Update existing event.
+
+        The write only applies if the stored version equals `expected_version`
+        (If-Match) or, failing that, the `version` carried by the event.
+        """
         await self.repo.init_db()
         event_data = event.dict() if hasattr(event, "dict") else dict(event)
         event_data["id"] = event_id
         event_data["updated_at"] = datetime.now().isoformat()
-        updated = await self.repo.update(event_data)
-        if not updated:
-            raise HTTPException(status_code=404, detail="Event not found to update")
+        if expected_version is None:
+            expected_version = event_data.get("version")
+        try:
+            new_version = await self.repo.update(event_data, expected_version)
+        except sqlite3.IntegrityError as exc:
+            _raise_for_integrity_error(exc)
+        if new_version is None:
+            await self._raise_not_updated(event_id, expected_version)
+        event_data["version"] = new_version
         return Event(**event_data)
 
+    async def patch_event(
+        self, event_id: str, fields: dict, expected_version: Optional[int] = None
+    ) -> Event:
+        """Update only the given fields of an event"""
+        await self.repo.init_db()
+        for required in ("title", "date", "location"):
+            if required in fields and not fields[required]:
+                raise HTTPException(status_code=422, detail=f"{required} cannot be empty")
+        fields = dict(fields, updated_at=datetime.now().isoformat())
+        try:
+            patched = await self.repo.patch(event_id, fields, expected_version)
+        except sqlite3.IntegrityError as exc:
+            _raise_for_integrity_error(exc)
+        if patched is None:
+            await self._raise_not_updated(event_id, expected_version)
+        return patched
+
     async def delete_event(self, event_id: str):
         """Delete event"""
         await self.repo.init_db()
@@ -88,19 +312,225 @@ class Service:
             raise HTTPException(status_code=404, detail="Event not found to delete")
         return None
 
+    # -----------------------------------------------------
+    # FUZZY SEARCH
+    # -----------------------------------------------------
+
+    async def find_events_fuzzy(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = FUZZY_MIN_SCORE,
+        include_archived: bool = False,
+    ) -> dict:
+        """Events whose title resembles `query` (typos, partial titles), best first"""
+        await self.repo.init_db()
+        index = await self._text_index()
+        hits = index.titles.search(query, limit=limit, min_score=min_score)
+        if include_archived:
+            archived = await self._archived_text_index()
+            hits += archived.titles.search(query, limit=limit, min_score=min_score)
+            hits.sort(key=lambda hit: -hit[1])
+        score_of = {}
+        for _, score, event_ids in hits:
+            for event_id in sorted(event_ids)[:limit]:
+                score_of.setdefault(event_id, score)
+        events = await self.repo.get_many(list(score_of), include_archived=include_archived)
+        matches = sorted(
+            ({"score": score_of[e.id], "event": e} for e in events),
+            key=lambda match: (-match["score"], match["event"].id),
+        )
+        return {"query": query, "matches": matches[:limit]}
+
+    async def find_locations_fuzzy(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = FUZZY_MIN_SCORE,
+        include_archived: bool = False,
+    ) -> dict:
+        """Stored locations resembling `query` (typos, known aliases) with their event counts"""
+        await self.repo.init_db()
+        index = await self._text_index()
+        matches = {
+            location: {"location": location, "score": score, "events": len(event_ids)}
+            for location, score, event_ids in index.search_locations(query, limit=limit, min_score=min_score)
+        }
+        if include_archived:
+            archived = await self._archived_text_index()
+            for location, score, event_ids in archived.search_locations(query, limit=limit, min_score=min_score):
+                match = matches.setdefault(location, {"location": location, "score": score, "events": 0})
+                match["events"] += len(event_ids)
+        return {
+            "query": query,
+            "matches": sorted(matches.values(), key=lambda match: -match["score"])[:limit],
+        }
+
+    async def find_similar_events(self, event_id: str, limit: int = 5) -> dict:
+        """Events whose title, description and performers resemble this one's, best first"""
+        await self.repo.init_db()
+        index = await self._similar_index()
+        hits = index.similar(event_id, limit=limit)
+        if hits is None:
+            await self.get_event(event_id)  # 404 for unknown ids
+            hits = []
+        score_of = dict(hits)
+        events = await self.repo.get_many(list(score_of))
+        matches = sorted(
+            ({"score": score_of[e.id], "event": e} for e in events),
+            key=lambda match: (-match["score"], match["event"].id),
+        )
+        return {"event_id": event_id, "matches": matches}
+
+    # -----------------------------------------------------
+    # BATCH OPERATIONS
+    # -----------------------------------------------------
+
+    async def get_events(self, event_ids: List[str]) -> dict:
+        """Return the events for several IDs plus the IDs that don't exist"""
+        await self.repo.init_db()
+        events = await self.repo.get_many(event_ids)
+        found = {e.id for e in events}
+        missing = [i for i in dict.fromkeys(event_ids) if i not in found]
+        return {"events": events, "missing": missing}
+
+    async def find_events_by_titles(self, titles: List[str]) -> List[Event]:
+        """Return events whose title matches one of `titles` (case-insensitive)"""
+        await self.repo.init_db()
+        return await self.repo.find_by_titles(titles)
+
+    async def update_events(self, events: List[Event]) -> dict:
+        """Update several events in one transaction"""
+        await self.repo.init_db()
+        if any(not e.id for e in events):
+            raise HTTPException(status_code=422, detail="Every event in a batch update needs an id")
+        timestamp = datetime.now().isoformat()
+        rows = []
+        for event in events:
+            event_data = event.dict()
+            event_data["updated_at"] = timestamp
+            rows.append(event_data)
+        try:
+            result = await self.repo.update_many(rows)
+        except sqlite3.IntegrityError as exc:
+            _raise_for_integrity_error(exc)
+        versions = result["updated"]
+        conflicts = set(result["conflicts"])
+        return {
+            "updated": [
+                Event(**dict(r, version=versions[r["id"]])) for r in rows if r["id"] in versions
+            ],
+            "conflicts": list(conflicts),
+            "missing": [
+                r["id"] for r in rows if r["id"] not in versions and r["id"] not in conflicts
+            ],
+        }
+
+    async def delete_events(self, event_ids: List[str]) -> dict:
+        """Delete several events in one transaction"""
+        await self.repo.init_db()
+        deleted = await self.repo.delete_many(event_ids)
+        deleted_set = set(deleted)
+        missing = [i for i in dict.fromkeys(event_ids) if i not in deleted_set]
+        return {"deleted": deleted, "missing": missing}
+
     # -----------------------------------------------------
     # ANALYTICAL FUNCTIONS
     # -----------------------------------------------------
 
+    async def query_analytics(self, query: AnalyticsQuery) -> dict:
+        """Answer a group-by question with one SQL query (see repos/analytics.py)"""
+        await self.repo.init_db()
+        try:
+            rows = await self.repo.analytics_query(query)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        results = []
+        for row in rows:
+            result = {"group": row[0], "value": row[1]}
+            if len(row) > 2:
+                result["name"] = row[2]
+            results.append(result)
+        return {
+            "dimension": query.dimension,
+            "metric": query.metric if query.metric == "count" else f"distinct {query.distinct}",
+            "results": results,
+        }
+
+    async def get_calendar(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        bucket: CalendarBucket = "month",
+        include_ids: bool = False,
+        include_empty: bool = False,
+    ) -> dict:
+        """Event counts per day/week/month between two dates (both inclusive).
+
+        Defaults to the twelve months starting with the current one. Buckets
+        are keyed "YYYY-MM-DD" (day), the week's Monday (week) or "YYYY-MM".
+        """
+        await self.repo.init_db()
+        start = _calendar_date(date_from, "from") or datetime.now().date().replace(day=1)
+        end = _calendar_date(date_to, "to") or _calendar_end(start)
+        if end < start:
+            raise HTTPException(status_code=422, detail="`to` must not be before `from`")
+        if include_empty:
+            count = _calendar_bucket_count(start, end, bucket)
+            if count > MAX_CALENDAR_BUCKETS:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Too many {bucket} buckets to fill in ({count} > {MAX_CALENDAR_BUCKETS})",
+                )
+
+        rows = await self.repo.calendar(
+            f"{start.isoformat()}T00:00:00",
+            _after_day(end),
+            bucket,
+            include_ids=include_ids,
+        )
+        buckets = []
+        for row in rows:
+            entry = {"bucket": row[0], "count": row[1]}
+            if include_ids:
+                entry["event_ids"] = json.loads(row[2])
+            buckets.append(entry)
+
+        if include_empty:
+            keys = _calendar_buckets(start, end, bucket)
+            found = {entry["bucket"]: entry for entry in buckets}
+            empty = {"count": 0, "event_ids": []} if include_ids else {"count": 0}
+            buckets = [found.get(key) or {"bucket": key, **empty} for key in keys]
+
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "bucket": bucket,
+            "total": sum(entry["count"] for entry in buckets),
+            "buckets": buckets,
+        }
+
     async def get_total_events(self) -> int:
         await self.repo.init_db()
+        archived = (await self.repo.history_counts(HISTORY_TOTAL)).get("", 0)
+        index = await self._index()
+        if index is not None:
+            return len(index) + archived
         events = await self.repo.list()
-        return len(events)
+        return len(events) + archived
 
     async def get_events_this_month(self) -> List[Event]:
         await self.repo.init_db()
-        events = await self.repo.list()
         now = datetime.now()
+        index = await self._index()
+        if index is not None:
+            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
+            ids = index.ids_with_date_between(
+                to_timestamp(month_start.isoformat()), to_timestamp(next_month.isoformat())
+            )
+            return await self.repo.get_many(ids)
+        events = await self.repo.list()
 
         monthly = []
         for e in events:
@@ -123,19 +553,35 @@ class Service:
 
     async def get_city_with_most_events(self) -> dict:
         await self.repo.init_db()
+        archived = await self.repo.history_counts(HISTORY_LOCATION)
+        index = await self._index()
+        if index is not None:
+            top = index.top_location(extra=archived)
+            if not top:
+                return {"city": None, "count": 0}
+            return {"city": top[0], "count": top[1]}
         events = await self.repo.list()
-        cities = [
+        cities = Counter(
             _event_field(e, "city") or _event_field(e, "location")
             for e in events
             if _event_field(e, "city") or _event_field(e, "location")
-        ]
-        if not cities:
+        )
+        cities.update(archived)
+        top = most_common(cities)
+        if not top:
             return {"city": None, "count": 0}
-        city, count = Counter(cities).most_common(1)[0]
+        city, count = top
         return {"city": city, "count": count}
 
     async def get_top_performer(self) -> dict:
         await self.repo.init_db()
+        archived = await self.repo.history_counts(HISTORY_PERFORMER)
+        index = await self._index()
+        if index is not None:
+            top = index.top_performer(extra=archived)
+            if not top:
+                return {"performer": None, "count": 0}
+            return {"performer": top[0], "count": top[1]}
         events = await self.repo.list()
         performers = []
         for e in events:
@@ -146,14 +592,24 @@ class Service:
             performer = _event_field(e, "performer") or _event_field(e, "artist")
             if performer:
                 performers.append(performer.strip())
-        if not performers:
+        performer_counts = Counter(performers)
+        performer_counts.update(archived)
+        top = most_common(performer_counts)
+        if not top:
             return {"performer": None, "count": 0}
-        performer, count = Counter(performers).most_common(1)[0]
+        performer, count = top
         return {"performer": performer, "count": count}
 
     async def get_most_recent_event(self) -> dict:
         """Find the event added most recently"""
         await self.repo.init_db()
+        index = await self._index()
+        if index is not None:
+            latest_id = index.latest_id()
+            latest = await self.repo.get(latest_id) if latest_id else None
+            if not latest:
+                return {"message": "No events found"}
+            return _event_dict(latest)
         events = await self.repo.list()
         if not events:
             return {"message": "No events found"}
@@ -171,8 +627,11 @@ class Service:
     async def get_recent_events_15_days(self, days: int = 15) -> List[Event]:
         """List all events created in the last `days` days (default 15)."""
         await self.repo.init_db()
-        events = await self.repo.list()
         cutoff = datetime.now() - timedelta(days=days)
+        index = await self._index()
+        if index is not None:
+            return await self.repo.get_many(index.ids_since(to_timestamp(cutoff.isoformat())))
+        events = await self.repo.list()
 
         recent = []
         for e in events:
@@ -190,8 +649,16 @@ class Service:
     async def get_location_with_most_past_events(self) -> dict:
         """Find which location hosted the most past events"""
         await self.repo.init_db()
-        events = await self.repo.list()
         now = datetime.now()
+        # Archived events are all in the past.
+        archived = await self.repo.history_counts(HISTORY_LOCATION)
+        index = await self._index()
+        if index is not None:
+            top = index.top_location(date_before=to_timestamp(now.isoformat()), extra=archived)
+            if not top:
+                return {"location": None, "count": 0}
+            return {"location": top[0], "count": top[1]}
+        events = await self.repo.list()
 
         past_locations = []
         for e in events:
@@ -206,8 +673,11 @@ class Service:
                 except Exception:
                     continue
 
-        if not past_locations:
+        location_counts = Counter(past_locations)
+        location_counts.update(archived)
+        top = most_common(location_counts)
+        if not top:
             return {"location": None, "count": 0}
-        location, count = Counter(past_locations).most_common(1)[0]
+        location, count = top
         return {"location": location, "count": count}
 
@@ -0,0 +1,52 @@
+"""Admission control: who counts as a client, and rejections browsers can read."""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from middleware import admission
+from middleware.admission import client_key
+
+
+def _scope(*forwarded, peer="10.0.0.9"):
+    return {"client": (peer, 1234), "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded]}
+
+
+@pytest.mark.parametrize("scope, proxies, key", [
+    (_scope("203.0.113.7"), 0, "10.0.0.9"),
+    (_scope("203.0.113.7"), 1, "203.0.113.7"),
+    # Spoofed entries on the left are ignored.
+    (_scope("1.2.3.4, 5.6.7.8, 203.0.113.7"), 1, "203.0.113.7"),
+    (_scope("1.2.3.4, 203.0.113.7, 130.211.0.1"), 2, "203.0.113.7"),
+    (_scope("1.2.3.4", "203.0.113.7"), 1, "203.0.113.7"),  # repeated header lines
+    (_scope(), 1, "10.0.0.9"),
+    (_scope("203.0.113.7"), 2, "10.0.0.9"),  # didn't pass both proxies
+])
+def test_client_key(scope, proxies, key):
+    assert client_key(scope, proxies) == key
+
+
+async def _two_requests():
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"])  # as get_fast_api_app does
+    admission.install(app, enabled=True, rate_per_s=0.01, burst=1)
+
+    @app.get("/events/{event_id}")
+    async def event(event_id: str):
+        return {"id": event_id}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"Origin": "https://frontend.example"}
+        return [await client.get("/events/e1", headers=headers) for _ in range(2)]
+
+
+def test_rejections_carry_cors_headers():
+    admitted, rejected = asyncio.run(_two_requests())
+    assert admitted.status_code == 200
+    assert rejected.status_code == 429
+    assert rejected.headers["access-control-allow-origin"] == "*"
+    assert rejected.headers["access-control-expose-headers"] == "retry-after"
+    assert int(rejected.headers["retry-after"]) >= 1
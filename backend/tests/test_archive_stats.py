@@ -0,0 +1,97 @@
+"""Archiving past events must not change any count the API reports."""
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from dependencies import Container, set_container
+from repos.archive import Archiver
+from repos.partitioned import Partitions
+from routers import events, organizers
+
+EVENTS = [
+    # Two 2025 events for o1 (archived below) and one far in the future
+    {"title": "Goa Carnival", "date": "2025-02-10T18:00", "location": "Goa",
+     "performers": ["DJ Riz", "Nucleya"], "category": "cultural", "organizer_id": "o1"},
+    {"title": "Diwali Night", "date": "2025-10-20T19:00", "location": "Goa",
+     "performers": ["DJ Riz"], "category": "cultural", "organizer_id": "o1"},
+    {"title": "Future Fest", "date": "2099-01-05T17:00", "location": "Pune",
+     "performers": ["Nucleya"], "category": "music", "organizer_id": "o1"},
+    {"title": "Pune Folk Night", "date": "2025-05-01T18:00", "location": "Pune",
+     "performers": ["Kutle Khan"], "category": "cultural", "organizer_id": "o2"},
+    {"title": "Beach Bash", "date": "2025-01-15T20:00", "location": "goa",
+     "performers": ["dj riz"], "category": "music"},
+    {"title": "Jazz Evening", "date": "2099-03-01T20:00", "location": "Delhi",
+     "performers": ["Kenny"], "category": "music"},
+]
+
+CHECKED = [
+    "/events/analytics/total",
+    "/events/analytics/top-city",
+    "/events/analytics/top-performer",
+    "/events/analytics/query?dimension=location",
+    "/events/analytics/query?dimension=performer",
+    "/events/analytics/query?dimension=month&metric=distinct&distinct=performer",
+    "/events/analytics/query?dimension=organizer&year=2025",
+    "/events/analytics/query?dimension=category&performer=dj%20riz",
+    "/events/calendar?from=2025-01-01&to=2025-12-31",
+    "/organizers/",
+    "/organizers/o1",
+    "/organizers/analytics/top-organizer-2025",
+    "/organizers/analytics/top-organizer?year=2025",
+    "/organizers/analytics/company-events?company=Festive%20Co",
+    "/organizers/analytics/top-region",
+]
+
+
+async def _answers(client):
+    answers = {}
+    for path in CHECKED:
+        response = await client.get(path)
+        assert response.status_code == 200, (path, response.text)
+        answers[path] = response.json()
+    return answers
+
+
+async def _archive_and_compare(container):
+    app = FastAPI()
+    app.include_router(events.router, prefix="/events")
+    app.include_router(organizers.router, prefix="/organizers")
+    set_container(container)
+    await container.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for organizer_id, region in (("o1", "South"), ("o2", "West")):
+                response = await client.post("/organizers/", json={
+                    "organizer_id": organizer_id, "name": f"Org {organizer_id}",
+                    "company": "Festive Co", "region": region, "experience": 3,
+                })
+                assert response.status_code == 201, response.text
+            for event in EVENTS:
+                response = await client.post("/events/", json=event)
+                assert response.status_code == 201, response.text
+
+            before = await _answers(client)
+            assert before["/organizers/o1"]["managed_events"] == 3
+            assert before["/organizers/o1"]["events_2025"] == 2
+
+            moved = await Archiver(container.repo, after_days=30).run_once()
+            assert moved == 4
+            assert len((await client.get("/events/")).json()) == 2
+
+            assert await _answers(client) == before
+    finally:
+        await container.shutdown()
+        set_container(None)
+
+
+def test_archiving_keeps_counts(tmp_path):
+    asyncio.run(_archive_and_compare(Container(db_path=os.path.join(tmp_path, "events.db"))))
+
+
+@pytest.mark.parametrize("regions", ["south=Goa;west=Pune"])
+def test_archiving_keeps_counts_partitioned(tmp_path, regions):
+    partitions = Partitions(os.path.join(tmp_path, "partitions"), regions)
+    asyncio.run(_archive_and_compare(Container(partitions=partitions)))
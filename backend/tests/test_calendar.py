@@ -0,0 +1,49 @@
+"""Calendar ranges at the edge of the date range, and the empty-bucket cap."""
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from dependencies import Container, set_container
+from models.data_models import MAX_CALENDAR_BUCKETS
+from routers import events
+
+EVENT = {"title": "Last Party", "date": "9999-12-31T22:00", "location": "Goa",
+         "performers": ["DJ Riz"], "category": "music"}
+
+
+async def _get(tmp_path, *paths):
+    app = FastAPI()
+    app.include_router(events.router, prefix="/events")
+    container = Container(db_path=os.path.join(tmp_path, "events.db"))
+    set_container(container)
+    await container.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/events/", json=EVENT)
+            assert response.status_code == 201, response.text
+            return [await client.get(path) for path in paths]
+    finally:
+        await container.shutdown()
+        set_container(None)
+
+
+@pytest.mark.parametrize("query, buckets", [
+    ("from=9999-12-01&to=9999-12-31", [{"bucket": "9999-12", "count": 1}]),
+    ("from=9999-12-01", [{"bucket": "9999-12", "count": 1}]),
+    ("from=9999-12-27&bucket=week&include_empty=true", [{"bucket": "9999-12-27", "count": 1}]),
+    ("from=9999-12-30&bucket=day&include_empty=true",
+     [{"bucket": "9999-12-30", "count": 0}, {"bucket": "9999-12-31", "count": 1}]),
+])
+def test_last_representable_dates(tmp_path, query, buckets):
+    response, = asyncio.run(_get(tmp_path, f"/events/calendar?{query}"))
+    assert response.status_code == 200, response.text
+    assert response.json()["buckets"] == buckets
+
+
+def test_too_many_empty_buckets_is_rejected(tmp_path):
+    response, = asyncio.run(_get(tmp_path, "/events/calendar?from=0001-01-01&to=9999-12-31&bucket=day&include_empty=true"))
+    assert response.status_code == 422
+    assert f"> {MAX_CALENDAR_BUCKETS})" in response.json()["detail"]
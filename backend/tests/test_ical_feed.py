@@ -0,0 +1,39 @@
+"""A feed being sent to a slow client holds no database connection."""
+import asyncio
+import os
+
+from constants import SQLITE_READ_POOL_SIZE
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from services import ical
+from services.service import Service
+
+EVENT = {"title": "Goa Carnival", "date": "2099-02-10T18:00", "location": "Goa",
+         "performers": ["DJ Riz"], "category": "cultural"}
+
+
+async def _stalled_feeds(db_path):
+    await OrganizerRepo(db_path).init_db()
+    repo = Repo(db_path)
+    await repo.init_db()
+    try:
+        await repo.insert(dict(EVENT, id="ev-1"))
+        service = Service(repo)
+        stalled = []
+        for _ in range(SQLITE_READ_POOL_SIZE + 1):
+            service.ical_cache = ical.FeedCache()  # render every time
+            etag, body = await asyncio.wait_for(service.get_ical_feed("Goa"), timeout=5)
+            received = b""
+            while b"BEGIN:VEVENT" not in received:  # the client stops reading here
+                received += await anext(body)
+            stalled.append(body)
+        await repo.insert(dict(EVENT, id="ev-2"))
+        version = await asyncio.wait_for(repo.table_version(), timeout=5)
+        return etag, version
+    finally:
+        await repo.writes.close()
+
+
+def test_stalled_feeds_release_the_read_pool(tmp_path):
+    etag, version = asyncio.run(_stalled_feeds(os.path.join(tmp_path, "events.db")))
+    assert etag == ical.feed_etag(version - 1)
@@ -0,0 +1,49 @@
+"""The fast path answers bare places only, and leaves empty lookups to the model."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from agent import intent_router  # noqa: E402
+
+
+@pytest.mark.parametrize("question", [
+    "Show all events in Goa next month",
+    "Show all events in December 2025",
+    "Which events are scheduled for next week?",
+    "What's next in Goa for music lovers?",
+    "Show upcoming events in Goa this weekend",
+])
+def test_qualified_places_go_to_the_model(question):
+    assert intent_router.match_intent(question) is None
+
+
+@pytest.mark.parametrize("question, intent, place", [
+    ("Show all events in Bangalore", "events_in", "Bangalore"),
+    ("Show me events in 'St. Louis'", "events_in", "St. Louis"),
+    ("Which events are scheduled for December?", "events_in", "December"),
+    ("What's next in New Delhi?", "next_events", "New Delhi"),
+])
+def test_bare_places_are_routed(question, intent, place):
+    matched, found = intent_router.match_intent(question)
+    assert (matched.name, found.group("place")) == (intent, place)
+
+
+@pytest.mark.parametrize("question", [
+    "Show all events in Atlantis",
+    "Show all events in December",
+    "What's next in Atlantis",
+])
+def test_empty_lookups_fall_through(monkeypatch, question):
+    async def no_events(*args, **kwargs):
+        return []
+
+    async def no_next_events(**kwargs):
+        return {"events": []}
+
+    monkeypatch.setattr(intent_router.tools, "events_by_location", no_events)
+    monkeypatch.setattr(intent_router.tools, "events_by_month", no_events)
+    monkeypatch.setattr(intent_router.tools, "next_events", no_next_events)
+    intent, found = intent_router.match_intent(question)
+    assert asyncio.run(intent.answer(found)) is None
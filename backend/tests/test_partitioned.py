@@ -0,0 +1,158 @@
+"""Region partitions: moves between files keep optimistic concurrency, rows
+routed under an older map stay readable by location, and a single-file
+database can be imported."""
+import asyncio
+import os
+
+from models.data_models import AnalyticsQuery, Organizer
+from repos.db import get_write_queue
+from repos.organizer_repo import OrganizerRepo
+from repos.partitioned import (
+    PartitionedOrganizerRepo,
+    PartitionedRepo,
+    Partitions,
+    import_database,
+    needs_import,
+)
+from repos.repo import Repo
+
+EVENT = {
+    "id": "ev-1", "title": "Carnival", "date": "2099-02-10T18:00", "location": "Goa",
+    "performers": ["DJ Riz"], "category": "cultural",
+}
+
+
+def _race_into_copy(target, write):
+    """Run `write` after `target` stores the moved copy, before the old one goes."""
+    copy = target.import_events if hasattr(target, "import_events") else target.import_organizers
+    name = copy.__name__
+
+    async def import_then_write(rows, *args, **kwargs):
+        count = await copy(rows, *args, **kwargs)
+        setattr(target, name, copy)
+        await write()
+        return count
+
+    setattr(target, name, import_then_write)
+
+
+async def _event_move_loses_to_a_write(directory):
+    partitions = Partitions(directory, "south=Goa;west=Pune")
+    repo = PartitionedRepo(partitions)
+    await repo.init_db()
+    try:
+        await repo.insert(dict(EVENT))
+        south, west = partitions.events["south"], partitions.events["west"]
+        edited = dict(EVENT, title="Carnival (edited)")
+        _race_into_copy(west, lambda: south.update(edited, expected_version=1))
+
+        assert await repo.update(dict(EVENT, location="Pune"), expected_version=1) is None
+        assert await west.get("ev-1") is None  # the new copy was dropped again
+        kept = await repo.get("ev-1")
+        assert (kept.title, kept.location, kept.version) == ("Carnival (edited)", "Goa", 2)
+
+        # Without an expected version the move is retried on the new row.
+        _race_into_copy(west, lambda: south.update(dict(edited, title="Again"), expected_version=2))
+        assert await repo.update(dict(EVENT, location="Pune")) == 4
+        moved = await repo.get("ev-1")
+        assert (moved.location, moved.version) == ("Pune", 4)
+        assert await south.get("ev-1") is None
+    finally:
+        await partitions.close()
+
+
+def test_event_move_loses_to_a_concurrent_write(tmp_path):
+    asyncio.run(_event_move_loses_to_a_write(os.path.join(tmp_path, "partitions")))
+
+
+async def _organizer_move_loses_to_a_write(directory):
+    partitions = Partitions(directory, "south=Goa;west=Pune")
+    repo = PartitionedOrganizerRepo(partitions)
+    await PartitionedRepo(partitions).init_db()
+    try:
+        organizer = Organizer(organizer_id="o1", name="Org", company="Co", region="South")
+        await repo.insert(organizer)
+        south, west = partitions.organizers["south"], partitions.organizers["west"]
+        renamed = organizer.model_copy(update={"name": "Renamed"})
+        _race_into_copy(west, lambda: south.update(renamed, expected_version=1))
+
+        moving = organizer.model_copy(update={"region": "West"})
+        assert await repo.update(moving, expected_version=1) is None
+        assert await west.get("o1") is None
+        kept = await repo.get("o1")
+        assert (kept.name, kept.region, kept.version) == ("Renamed", "South", 2)
+    finally:
+        await partitions.close()
+
+
+def test_organizer_move_loses_to_a_concurrent_write(tmp_path):
+    asyncio.run(_organizer_move_loses_to_a_write(os.path.join(tmp_path, "partitions")))
+
+
+async def _reads_by_location(repo, location):
+    upcoming = await repo.upcoming("2000-01-01T00:00", 10, location)
+    counts = await repo.analytics_query(AnalyticsQuery(dimension="category", location=location))
+    async with repo.feed_snapshot(location) as (_, batches):
+        feed = [event.id async for batch in batches for event, _ in batch]
+    return [event.id for event in upcoming], counts, feed
+
+
+async def _remapped_location(directory):
+    partitions = Partitions(directory, "south=Bangalore")
+    repo = PartitionedRepo(partitions)
+    await repo.init_db()
+    await repo.insert(dict(EVENT, id="old", location="Bangalore"))
+    await partitions.close()
+
+    partitions = Partitions(directory, "karnataka=Bangalore")
+    repo = PartitionedRepo(partitions)
+    await repo.init_db()
+    try:
+        await repo.insert(dict(EVENT, id="new", location="bangalore", date="2099-03-01T18:00"))
+        assert partitions.holding("Bangalore") == ["karnataka", "south"]
+        return await _reads_by_location(repo, "Bangalore")
+    finally:
+        await partitions.close()
+
+
+def test_rows_under_an_older_region_map_are_still_read_by_location(tmp_path):
+    upcoming, counts, feed = asyncio.run(_remapped_location(os.path.join(tmp_path, "partitions")))
+    assert upcoming == feed == ["old", "new"]
+    assert counts == [("cultural", 2)]
+
+
+async def _imported(tmp_path):
+    source = os.path.join(tmp_path, "festiveconnect.db")
+    events, organizers = Repo(source), OrganizerRepo(source)
+    await events.init_db()
+    await organizers.init_db()
+    await organizers.insert(Organizer(organizer_id="o1", name="Org", company="Co", region="South"))
+    await events.insert(dict(EVENT, id="goa", organizer_id="o1"))
+    await events.insert(dict(EVENT, id="pune", location="Pune"))
+    await events.insert(dict(EVENT, id="delhi", location="Delhi", date="2020-01-01T10:00"))
+    await events.archive_before("2021-01-01T00:00", 100)
+    await get_write_queue(source).close()
+
+    partitions = Partitions(os.path.join(tmp_path, "partitions"), "south=Goa;west=Pune")
+    assert needs_import(partitions, source)
+    first = await import_database(partitions, source)
+    again = await import_database(partitions, source)
+    repo = PartitionedRepo(partitions)
+    await repo.init_db()
+    try:
+        homes = {name: [e.id for e in await partitions.events[name].list(include_archived=True)]
+                 for name in partitions.names}
+        organizer = await PartitionedOrganizerRepo(partitions).get("o1")
+        history = await repo.history_counts("location")
+        return first, again, needs_import(partitions, source), homes, organizer, history
+    finally:
+        await partitions.close()
+
+
+def test_single_file_database_is_imported_once(tmp_path):
+    first, again, pending, homes, organizer, history = asyncio.run(_imported(tmp_path))
+    assert first["events"] == 2 and first["events_archive"] == 1 and first["organizers"] == 1
+    assert again == {} and not pending
+    assert homes == {"other": ["delhi"], "south": ["goa"], "west": ["pune"]}
+    assert (organizer.organizer_id, organizer.managed_events) == ("o1", 1)
+    assert history == {"Delhi": 1}
@@ -0,0 +1,97 @@
+"""A saved similar-events index is reloaded; anything unreadable, or saved
+for another database, is rebuilt."""
+import asyncio
+import os
+import pickle
+
+import pytest
+
+from repos.organizer_repo import OrganizerRepo
+from repos.repo import Repo
+from repos.similar_index import SimilarEventsIndex
+
+EVENT = {
+    "id": "ev-1", "title": "Goa Carnival", "date": "2025-02-10T18:00", "location": "Goa",
+    "description": "parade and music", "performers": ["DJ Riz"], "category": "cultural",
+}
+
+
+class _Exploit:
+    def __reduce__(self):
+        return (os.system, ("touch exploited",))
+
+
+CORRUPT = [
+    b"",
+    b"not an index",
+    b"FCSIMIDX\xff\xff\xff",  # truncated header
+    b"FCSIMIDX" + (3).to_bytes(8, "little") + b"\xff\xfe\xfd",  # bad UTF-8 header
+    pickle.dumps({"format": 1, "version": 0, "state": {"ids": []}}),
+    pickle.dumps(_Exploit()),
+]
+
+
+async def _repo(db_path, event):
+    await OrganizerRepo(db_path).init_db()
+    repo = Repo(db_path)
+    await repo.init_db()
+    await repo.insert(dict(EVENT, **event))
+    return repo
+
+
+async def _restored(repo, path):
+    """(loaded from the file, events in the index, ids) for a fresh index."""
+    restored = SimilarEventsIndex(path=path)
+    await restored._restore(repo)
+    loaded = restored.loaded_at is not None
+    await restored.ensure_loaded(repo)  # rebuilds when the file was ignored
+    return loaded, len(restored), sorted(restored._slot_of)
+
+
+async def _saved_then_restored(tmp_path, corrupt):
+    repo = await _repo(os.path.join(tmp_path, "events.db"), {})
+    try:
+        path = os.path.join(tmp_path, "events.similar.index")
+        index = SimilarEventsIndex(path=path)
+        await index.ensure_loaded(repo)
+        await index.save(repo)
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+        if corrupt is not None:
+            with open(path, "wb") as f:
+                f.write(corrupt)
+        return await _restored(repo, path)
+    finally:
+        await repo.writes.close()
+
+
+def test_saved_index_is_loaded(tmp_path):
+    assert asyncio.run(_saved_then_restored(tmp_path, None)) == (True, 1, ["ev-1"])
+
+
+@pytest.mark.parametrize("corrupt", CORRUPT)
+def test_unreadable_index_is_rebuilt(tmp_path, corrupt, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert asyncio.run(_saved_then_restored(tmp_path, corrupt)) == (False, 1, ["ev-1"])
+    assert not os.path.exists(os.path.join(tmp_path, "exploited"))
+
+
+async def _recreated_database(tmp_path):
+    db_path = os.path.join(tmp_path, "events.db")
+    path = os.path.join(tmp_path, "events.similar.index")
+    repo = await _repo(db_path, {"id": "old1"})
+    index = SimilarEventsIndex(path=path)
+    await index.ensure_loaded(repo)
+    await index.save(repo)
+    await repo.writes.close()
+    for name in os.listdir(tmp_path):  # "Reset Database": the index file stays
+        if name.startswith("events.db"):
+            os.remove(os.path.join(tmp_path, name))
+    repo = await _repo(db_path, {"id": "new1"})  # same table version as before
+    try:
+        return await _restored(repo, path)
+    finally:
+        await repo.writes.close()
+
+
+def test_index_of_a_recreated_database_is_rebuilt(tmp_path):
+    assert asyncio.run(_recreated_database(tmp_path)) == (False, 1, ["new1"])
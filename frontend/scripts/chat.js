@@ -445,23 +445,72 @@ async function sendMessage(text, attachedFile = null) {
     newMessage: { role: "user", parts },
     sessionId: activeSessionId,
     stateDelta: null,
-    streaming: false,
+    // Token streaming: the ADK emits `partial` events with text deltas,
+    // followed by one aggregated event per model response.
+    streaming: true,
     userId: "user",
   };
 
   try {
     await ApiService.postWithStream("/run_sse", payload, async (chunk) => {
       if (chunk && typeof chunk === "object") {
-        appendMessage(chunk.content, "model");
-        messagesEl.scrollTop = messagesEl.scrollHeight;
+        handleStreamEvent(chunk);
       }
     });
   } catch (err) {
     console.error("Chat error:", err);
   } finally {
+    finishStreamingMessage();
     setSending(false);
   }
 }
 
+// -- Streaming helpers --
+// Draft bubble for the model reply currently being streamed. It is only
+// rendered, never persisted; the aggregated final event replaces it.
+let streamingEl = null;
+let streamingText = "";
+
+function handleStreamEvent(chunk) {
+  if (chunk.error) {
+    finishStreamingMessage();
+    appendMessage({ parts: [{ text: `⚠️ ${chunk.error}` }] }, "model");
+    return;
+  }
+  const content = chunk.content;
+  if (!content || !content.parts) return;
+
+  if (chunk.partial) {
+    const delta = content.parts
+      .filter((part) => part.text && !part.thought)
+      .map((part) => part.text)
+      .join("");
+    if (delta) appendStreamingText(delta);
+    return;
+  }
+
+  // Tool-progress events (functionCall / functionResponse) and the final
+  // aggregated text both go through appendMessage so they are persisted.
+  finishStreamingMessage();
+  appendMessage(content, "model");
+}
+
+function appendStreamingText(delta) {
+  if (!streamingEl) {
+    streamingEl = document.createElement("div");
+    streamingEl.className = "message model streaming";
+    messagesEl.appendChild(streamingEl);
+  }
+  streamingText += delta;
+  streamingEl.innerHTML = marked.parse(streamingText);
+  messagesEl.scrollTop = messagesEl.scrollHeight;
+}
+
+function finishStreamingMessage() {
+  if (streamingEl) streamingEl.remove();
+  streamingEl = null;
+  streamingText = "";
+}
+
 // File input handler
 // Event listeners for file input and form are attached in `initChat`.
@@ -12,6 +12,9 @@ const sortSelect = document.getElementById("sortSelect");
 const heroCardEl = document.getElementById("heroCard");
 
 let editEventId = null;
+// Version of the event being edited; sent as If-Match so concurrent edits
+// (e.g. by the agent) are rejected instead of silently overwritten.
+let editEventVersion = null;
 
 document.addEventListener("DOMContentLoaded", () => {
   if (!eventListEl) return;
@@ -85,7 +88,9 @@ eventForm.addEventListener("submit", async (e) => {
 
   try {
     if (editEventId) {
-      await ApiService.put(`/events/${encodeURIComponent(editEventId)}`, eventData);
+      // PATCH only touches the form's fields (organizer/category are kept).
+      const headers = editEventVersion ? { "If-Match": `"${editEventVersion}"` } : {};
+      await ApiService.patch(`/events/${encodeURIComponent(editEventId)}`, eventData, headers);
     } else {
       await ApiService.post("/events/", eventData);
     }
@@ -93,6 +98,12 @@ eventForm.addEventListener("submit", async (e) => {
     await loadEvents();
   } catch (error) {
     console.error("Error saving event:", error);
+    if (error.status === 412) {
+      alert("⚠️ This event was changed by someone else. Reloading the latest version.");
+      closeModal();
+      await loadEvents();
+      return;
+    }
     alert("❌ Failed to save event. Please try again.");
   }
 });
@@ -220,6 +231,7 @@ eventListEl.addEventListener("click", async (e) => {
     if (action === "edit") {
       const ev = await ApiService.get(`/events/${encodeURIComponent(id)}`);
       editEventId = id;
+      editEventVersion = ev.version ?? null;
       openModal(ev);
     } else if (action === "delete") {
       const confirmed = await customConfirm("🗑️ Delete this event?");
@@ -253,6 +265,7 @@ function openModal(eventData = null) {
 function closeModal() {
   modal.style.display = "none";
   editEventId = null;
+  editEventVersion = null;
 }
 
 function escapeHtml(str = "") {
@@ -9,7 +9,9 @@ const API_CONFIG = {
 const handleResponse = async (response) => {
   if (!response.ok) {
     const error = await response.json().catch(() => ({}));
-    throw new Error(error.message || `HTTP error! status: ${response.status}`);
+    const err = new Error(error.message || error.detail || `HTTP error! status: ${response.status}`);
+    err.status = response.status;
+    throw err;
   }
   return response.json();
 };
@@ -76,12 +78,12 @@ class ApiService {
     }
   }
 
-  // PATCH request
-  static async patch(endpoint, data = {}) {
+  // PATCH request (extra headers, e.g. If-Match, are merged in)
+  static async patch(endpoint, data = {}, headers = {}) {
     try {
       const response = await fetch(buildURL(endpoint), {
         method: "PATCH",
-        headers: API_CONFIG.headers,
+        headers: { ...API_CONFIG.headers, ...headers },
         body: JSON.stringify(data),
       });
 
@@ -152,9 +154,9 @@ class ApiService {
 
         if (done) {
           // Process any remaining data in the buffer
-          if (buffer && onChunk) {
+          if (buffer.startsWith("data:") && onChunk) {
             try {
-              const jsonData = JSON.parse(buffer);
+              const jsonData = JSON.parse(buffer.slice(5).trim());
               await onChunk(jsonData);
             } catch (e) {
               console.warn("Error parsing final chunk:", e);
@@ -174,9 +176,11 @@ class ApiService {
           const chunk = buffer.slice(0, newlineIndex);
           buffer = buffer.slice(newlineIndex + 1);
 
-          if (chunk.trim() && onChunk) {
+          // SSE frames are `data: {...}` lines separated by blank lines;
+          // skip keep-alives/comments and anything that is not a data line.
+          if (chunk.startsWith("data:") && onChunk) {
             try {
-              const data = chunk.slice(6);
+              const data = chunk.slice(5).trim();
               const jsonData = JSON.parse(data);
               await onChunk(jsonData);
             } catch (e) {